@@ -0,0 +1,83 @@
+"""Throughput of the batch trade engine against the scalar add_trade_to_position.
+
+Run with `python -m benchmarks.engine`.
+"""
+import time
+
+import numpy as np
+
+from libs.common.engine import TradeBatch, apply_trades
+from libs.common.position import add_trade_to_position
+from libs.common.trade import Side, Trade
+
+
+def random_batch(count: int, symbols: int, seed: int = 0) -> TradeBatch:
+    rng = np.random.default_rng(seed)
+    sides = rng.random(count) < 0.5
+    quantities = rng.integers(1, 20, count).astype(np.float64)
+    return TradeBatch(
+        symbols=np.array([f"SYM{i}" for i in range(symbols)], dtype=object)[
+            rng.integers(0, symbols, count)
+        ],
+        sides=sides,
+        currencies=np.full(count, "USD", dtype=object),
+        quantities=np.where(sides, quantities, -quantities),
+        unit_prices=rng.uniform(1, 500, count),
+    )
+
+
+def to_trades(batch: TradeBatch):
+    return [
+        Trade(
+            symbol=symbol,
+            side=Side.BUY if side else Side.SELL,
+            currency=currency,
+            quantity=quantity,
+            unit_price=unit_price,
+        )
+        for symbol, side, currency, quantity, unit_price in zip(
+            batch.symbols,
+            batch.sides,
+            batch.currencies,
+            batch.quantities,
+            batch.unit_prices,
+        )
+    ]
+
+
+def scalar_apply(trades):
+    positions = {}
+    for trade in trades:
+        position, _ = add_trade_to_position(trade, positions.get(trade.symbol))
+        if position is None:
+            positions.pop(trade.symbol, None)
+        else:
+            positions[trade.symbol] = position
+
+
+def trades_per_minute(count: int, seconds: float) -> float:
+    return count / seconds * 60
+
+
+def main(count: int = 1_000_000, symbols: int = 1000, scalar_count: int = 100_000):
+    batch = random_batch(count, symbols)
+    start = time.perf_counter()
+    apply_trades(batch)
+    elapsed = time.perf_counter() - start
+    print(
+        f"batch engine: {count} trades in {elapsed:.2f}s "
+        f"({trades_per_minute(count, elapsed):,.0f} trades/minute)"
+    )
+
+    trades = to_trades(random_batch(scalar_count, symbols))
+    start = time.perf_counter()
+    scalar_apply(trades)
+    elapsed = time.perf_counter() - start
+    print(
+        f"add_trade_to_position: {scalar_count} trades in {elapsed:.2f}s "
+        f"({trades_per_minute(scalar_count, elapsed):,.0f} trades/minute)"
+    )
+
+
+if __name__ == "__main__":
+    main()
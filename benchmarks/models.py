@@ -0,0 +1,72 @@
+"""Per-trade and per-PnL overhead of the pydantic models against the fast-path records.
+
+Run with `python -m benchmarks.models`.
+"""
+import time
+from typing import Callable
+
+from benchmarks.engine import random_batch, to_trades
+from libs.common.currency import Currency
+from libs.common.position import Position, add_trade_to_position
+from libs.common.records import PositionRecord, TradeRecord, apply_trade
+
+
+def per_call(count: int, run: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    run()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def report(name: str, model_us: float, record_us: float):
+    print(
+        f"{name}: model {model_us:.2f}us, record {record_us:.2f}us "
+        f"({model_us / record_us:.1f}x)"
+    )
+
+
+def main(count: int = 200_000, symbols: int = 1000):
+    trades = to_trades(random_batch(count, symbols))
+    records = [TradeRecord.from_model(trade) for trade in trades]
+
+    def apply_models():
+        positions = {}
+        for trade in trades:
+            position, _ = add_trade_to_position(trade, positions.get(trade.symbol))
+            if position is None:
+                positions.pop(trade.symbol, None)
+            else:
+                positions[trade.symbol] = position
+
+    def apply_records():
+        positions = {}
+        for trade in records:
+            position, _ = apply_trade(trade, positions.get(trade.symbol))
+            if position is None:
+                positions.pop(trade.symbol, None)
+            else:
+                positions[trade.symbol] = position
+
+    report("per trade", per_call(count, apply_models), per_call(count, apply_records))
+
+    position = Position(symbol="SYM", quantity=100, cost=1000, currency=Currency.USD)
+    record = PositionRecord.from_model(position)
+
+    def pnl_models():
+        for _ in range(count):
+            position.calculate_pnl(12.5, 10)
+
+    def pnl_records():
+        for _ in range(count):
+            record.calculate_pnl(12.5, 10)
+
+    report("per pnl", per_call(count, pnl_models), per_call(count, pnl_records))
+
+    report(
+        "per model build",
+        per_call(count, lambda: [Position(**position.dict()) for _ in range(count)]),
+        per_call(count, lambda: [record.to_model() for _ in range(count)]),
+    )
+
+
+if __name__ == "__main__":
+    main()
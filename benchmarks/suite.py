@@ -0,0 +1,314 @@
+"""Benchmark suite of the core and CLI hot paths with a stored baseline.
+
+Run `python -m benchmarks.suite` (with `cli` on the PYTHONPATH, see `make benchmarks`) to
+compare the current tree against `benchmarks/baseline.json`, and `--save` to record a new
+baseline. Timings depend on the machine: record the baseline and compare on the same host.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional
+from unittest import mock
+
+from atcmoney_cli.config import ATCMONEY_POSITION_STORE, ATCMONEY_PROVIDER
+from atcmoney_cli.main import cli
+from click.testing import CliRunner
+
+from benchmarks.engine import random_batch, to_trades
+from libs.common.currency import Currency
+from libs.common.position import Position, add_trade_to_position
+from libs.providers import ClientType
+from libs.providers.mock.client import Client as MockClient
+from libs.store import StoreFactory, StoreType
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.25
+STORE_SIZES = (10, 1_000, 100_000)
+MOCK_LATENCY = 0.02
+
+
+@dataclass
+class Benchmark:
+    """A timed operation.
+
+    Args:
+        name: unique benchmark name
+        setup: function called once with a scratch directory, returning the operation to
+            time
+        number: the number of operations timed together, results are per operation
+    """
+
+    name: str
+    setup: Callable[[str], Callable[[], None]]
+    number: int = 1
+
+
+BENCHMARKS: List[Benchmark] = []
+
+
+def benchmark(name: str, number: int = 1):
+    def register(setup: Callable[[str], Callable[[], None]]):
+        BENCHMARKS.append(Benchmark(name, setup, number))
+        return setup
+
+    return register
+
+
+def positions(count: int) -> List[Position]:
+    return [
+        Position(
+            symbol=f"SYM{i}", quantity=i + 1, cost=10.0 * (i + 1), currency=Currency.USD
+        )
+        for i in range(count)
+    ]
+
+
+@benchmark("add_trade_to_position", number=10_000)
+def bench_add_trade_to_position(_: str) -> Callable[[], None]:
+    trades = to_trades(random_batch(10_000, 100))
+
+    def run():
+        book = {}
+        for trade in trades:
+            position, _ = add_trade_to_position(trade, book.get(trade.symbol))
+            if position is None:
+                book.pop(trade.symbol, None)
+            else:
+                book[trade.symbol] = position
+
+    return run
+
+
+@benchmark("Position.calculate_pnl", number=10_000)
+def bench_calculate_pnl(_: str) -> Callable[[], None]:
+    position = positions(1)[0]
+
+    def run():
+        for _ in range(10_000):
+            position.calculate_pnl(12.5, 0.5)
+
+    return run
+
+
+def register_store_benchmarks():
+    for store_type in StoreType:
+        for size in STORE_SIZES:
+
+            def store_setup(directory: str, store_type=store_type, size=size):
+                book = positions(size)
+
+                def run():
+                    store = StoreFactory[store_type](directory)
+                    store.store_positions(book)
+                    store.close()
+
+                return run
+
+            def load_setup(directory: str, store_type=store_type, size=size):
+                store = StoreFactory[store_type](directory)
+                store.store_positions(positions(size))
+                store.close()
+
+                def run():
+                    store = StoreFactory[store_type](directory)
+                    store.load_positions()
+                    store.close()
+
+                return run
+
+            def book_setup(directory: str, store_type=store_type, size=size):
+                store = StoreFactory[store_type](directory)
+                store.store_positions(positions(size))
+                store.close()
+
+                def run():
+                    store = StoreFactory[store_type](directory)
+                    store.load_book()
+                    store.close()
+
+                return run
+
+            name = f"{store_type.value.lower()}.%s[{size}]"
+            BENCHMARKS.append(Benchmark(name % "store_positions", store_setup))
+            BENCHMARKS.append(Benchmark(name % "load_positions", load_setup))
+            BENCHMARKS.append(Benchmark(name % "load_book", book_setup))
+
+
+register_store_benchmarks()
+
+
+@contextmanager
+def mock_latency(seconds: float) -> Iterator[None]:
+    """Delay every mock provider quote."""
+    get_quote = MockClient.get_quote
+
+    def delayed(self, symbol: str):
+        time.sleep(seconds)
+        return get_quote(self, symbol)
+
+    with mock.patch.object(MockClient, "get_quote", delayed):
+        yield
+
+
+@contextmanager
+def cli_environment() -> Iterator[None]:
+    """Use the mock provider, with latency, and the default position store."""
+    environ = dict(os.environ)
+    os.environ[ATCMONEY_PROVIDER] = ClientType.MOCK.value
+    os.environ.pop(ATCMONEY_POSITION_STORE, None)
+    try:
+        with mock_latency(MOCK_LATENCY), mock.patch(
+            "inquirer.list_input", side_effect=lambda message, choices: choices[-1]
+        ):
+            yield
+    finally:
+        os.environ.clear()
+        os.environ.update(environ)
+
+
+def cli_benchmark(
+    name: str, args: List[str], input: Optional[str] = None, positions_count: int = 0
+):
+    """Register an end to end run of `atcmoney args` in a config dir with positions."""
+
+    def setup(directory: str) -> Callable[[], None]:
+        store = StoreFactory[StoreType.JOURNAL](directory)
+        store.store_positions(positions(positions_count))
+        store.close()
+
+        def run():
+            with cli_environment():
+                result = CliRunner().invoke(cli, ["-c", directory, *args], input=input)
+            if result.exit_code != 0:
+                raise RuntimeError(f"atcmoney {' '.join(args)} failed: {result.output}")
+
+        return run
+
+    BENCHMARKS.append(Benchmark(name, setup))
+
+
+cli_benchmark("cli.quote[10 symbols]", ["quote", *[f"SYM{i}" for i in range(10)]])
+cli_benchmark("cli.position[1000]", ["position"], positions_count=1000)
+cli_benchmark(
+    "cli.position_details[1000]",
+    ["position", "details", "-s", "SYM1"],
+    positions_count=1000,
+)
+cli_benchmark(
+    "cli.position_buy[1000]",
+    ["position", "buy"],
+    input="SYM1\n10\n150\n",
+    positions_count=1000,
+)
+
+
+def run_benchmarks(
+    benchmarks: List[Benchmark], repeat: int = DEFAULT_REPEAT
+) -> Dict[str, float]:
+    """Time benchmarks, keeping the best of `repeat` runs.
+
+    Returns:
+        A dictionary benchmark name -> seconds per operation
+    """
+    results = {}
+    for bench in benchmarks:
+        with tempfile.TemporaryDirectory() as directory:
+            run = bench.setup(directory)
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                run()
+                timings.append(time.perf_counter() - start)
+        results[bench.name] = min(timings) / bench.number
+        print(f"{bench.name}: {format_duration(results[bench.name])}", file=sys.stderr)
+    return results
+
+
+def format_duration(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+def compare(
+    results: Dict[str, float],
+    baseline: Dict[str, float],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> List[str]:
+    """Print a comparison report of the results against a baseline.
+
+    Args:
+        results: benchmark name -> seconds per operation
+        baseline: baseline benchmark name -> seconds per operation
+        tolerance: relative slowdown over which a benchmark is a regression
+
+    Returns:
+        The names of the regressed benchmarks
+    """
+    regressions = []
+    width = max(len(name) for name in results)
+    print(f"{'benchmark':<{width}}  {'baseline':>10}  {'current':>10}  change")
+    for name, seconds in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"{name:<{width}}  {'-':>10}  {format_duration(seconds):>10}  new")
+            continue
+        change = seconds / reference - 1
+        status = ""
+        if change > tolerance:
+            regressions.append(name)
+            status = "  REGRESSION"
+        print(
+            f"{name:<{width}}  {format_duration(reference):>10}  "
+            f"{format_duration(seconds):>10}  {change:+.1%}{status}"
+        )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", "--filter", default="", help="run matching benchmarks")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="record a new baseline")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        [bench for bench in BENCHMARKS if args.filter in bench.name], args.repeat
+    )
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+            f.write("\n")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(
+            f"{len(regressions)} benchmark(s) regressed more than {args.tolerance:.0%}"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
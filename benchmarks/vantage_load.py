@@ -0,0 +1,122 @@
+"""Load test of the vantage clients against the local Alpha Vantage stand-in server.
+
+Run with `python -m benchmarks.vantage_load --latency normal:0.05,0.01`, see `--help`.
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import List, Optional
+
+import numpy as np
+
+from libs.providers.exception import ProviderAPIError
+from libs.providers.mock.client import parse_latency
+from libs.providers.vantage.async_client import AsyncClient
+from libs.providers.vantage.client import Client
+from libs.providers.vantage.stub import StubServer
+
+
+class Timings:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self._lock = Lock()
+
+    def record(self, latency: float, error: bool):
+        with self._lock:
+            self.latencies.append(latency)
+            self.errors += error
+
+    def report(self, elapsed: float):
+        latencies = np.array(self.latencies) * 1000
+        p50, p95, p99 = (
+            np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0, 0, 0)
+        )
+        print(
+            f"{len(latencies)} requests in {elapsed:.2f}s"
+            f" ({len(latencies) / elapsed:,.1f} requests/s), {self.errors} errors"
+        )
+        print(f"latency p50 {p50:.1f}ms, p95 {p95:.1f}ms, p99 {p99:.1f}ms")
+
+
+def sync_load(client: Client, symbols: List[str], timings: Timings):
+    def call(symbol: str):
+        start = time.perf_counter()
+        error = False
+        try:
+            client.get_quote(symbol)
+        except ProviderAPIError:
+            error = True
+        timings.record(time.perf_counter() - start, error)
+
+    with ThreadPoolExecutor(max_workers=client.max_workers) as executor:
+        list(executor.map(call, symbols))
+
+
+async def async_load(client: AsyncClient, symbols: List[str], timings: Timings):
+    semaphore = asyncio.Semaphore(client.max_concurrency)
+
+    async def call(symbol: str):
+        async with semaphore:
+            start = time.perf_counter()
+            error = False
+            try:
+                await client.get_quote(symbol)
+            except ProviderAPIError:
+                error = True
+            timings.record(time.perf_counter() - start, error)
+
+    async with client:
+        await asyncio.gather(*(call(symbol) for symbol in symbols))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--pool-size", type=int, help="defaults to the concurrency")
+    parser.add_argument("--async", dest="use_async", action="store_true")
+    parser.add_argument("--latency", help="stub latency, i.e normal:0.05,0.01")
+    parser.add_argument("--requests-per-minute", type=float)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--server-error-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    symbols = [f"SYM{i % args.symbols}" for i in range(args.requests)]
+    timings = Timings()
+    with StubServer(
+        latency=parse_latency(args.latency) if args.latency else None,
+        requests_per_minute=args.requests_per_minute,
+        error_rate=args.error_rate,
+        server_error_rate=args.server_error_rate,
+    ) as stub:
+        start = time.perf_counter()
+        if args.use_async:
+            client = AsyncClient(
+                "stub",
+                stub.url,
+                max_concurrency=args.concurrency,
+                pool_size=args.pool_size or args.concurrency,
+                backoff_factor=0,
+            )
+            asyncio.run(async_load(client, symbols, timings))
+        else:
+            client = Client(
+                "stub",
+                stub.url,
+                max_workers=args.concurrency,
+                pool_size=args.pool_size,
+                backoff_factor=0,
+            )
+            sync_load(client, symbols, timings)
+            client.close()
+        elapsed = time.perf_counter() - start
+        print(f"stub counts: {stub.counts}")
+    timings.report(elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,35 @@
 import os
+from functools import lru_cache
 from logging import getLogger
 from os import PathLike
-from typing import Optional
-
-from dotenv import load_dotenv
+from typing import TYPE_CHECKING, Callable, Optional
 
+from libs.common.env import env_flag
 from libs.providers import ClientFactory, ClientType
+from libs.providers.cache import DEFAULT_MAX_SIZE, CachingClient
 from libs.providers.client import Client
+from libs.providers.fx import DEFAULT_FX_TTL, FxCachingClient
+from libs.providers.single_flight import SingleFlightClient
+from libs.store import StoreFactory, StoreType
+
+if TYPE_CHECKING:
+    from atcmoney_cli.remote import DaemonConnection
+
+    from libs.store.store import PositionStore
 
 logger = getLogger("ATCMONEY")
 ATCMONEY_CONFIG_DIR_KEY = "ATCMONEY_CONFIG_DIR"
 ATCMONEY_PROVIDER = "ATCMONEY_PROVIDER"
+ATCMONEY_QUOTE_CACHE_TTL = "ATCMONEY_QUOTE_CACHE_TTL"
+ATCMONEY_QUOTE_CACHE_SIZE = "ATCMONEY_QUOTE_CACHE_SIZE"
+ATCMONEY_QUOTE_CACHE_DISK = "ATCMONEY_QUOTE_CACHE_DISK"
+ATCMONEY_FX_CACHE_TTL = "ATCMONEY_FX_CACHE_TTL"
+ATCMONEY_POSITION_STORE = "ATCMONEY_POSITION_STORE"
+DAEMON_SOCKET_FILE_NAME = ".atcmoney.sock"
 DEFAULT_CONFIG_DIR = os.path.join(os.environ.get("HOME"), ".atcmoney")
 
+_pending_env: Optional[Callable[[], None]] = None
+
 
 def load_env(config_dir: Optional[PathLike] = None):
     """Load environment from config file into os.environ.
@@ -24,6 +41,8 @@ def load_env(config_dir: Optional[PathLike] = None):
     if config_dir is None:
         config_dir = DEFAULT_CONFIG_DIR
 
+    from dotenv import load_dotenv
+
     env_path = os.path.join(config_dir, ".env")
     if not os.path.exists(env_path):
         logger.info(f"Config file not found, creating config file {env_path}")
@@ -32,13 +51,91 @@ def load_env(config_dir: Optional[PathLike] = None):
     os.environ[ATCMONEY_CONFIG_DIR_KEY] = config_dir
 
 
-def get_provider() -> Client:
+def defer_env(loader: Callable[[], None]):
+    """Register the environment loader to run before the first config lookup.
+
+    Commands that never read the config (i.e --help) do not touch the filesystem.
+
+    Args:
+        loader: function loading the environment, i.e calling load_env
+    """
+    global _pending_env
+    _pending_env = loader
+
+
+def ensure_env():
+    """Run the deferred environment loader, once."""
+    global _pending_env
+    if _pending_env is not None:
+        loader, _pending_env = _pending_env, None
+        loader()
+
+
+@lru_cache(maxsize=None)
+def _provider(
+    provider: str, ttl: float, max_size: int, cache_dir: Optional[str], fx_ttl: float
+) -> Client:
+    client = FxCachingClient(SingleFlightClient(ClientFactory[provider]()), ttl=fx_ttl)
+    if ttl <= 0:
+        return client
+    return CachingClient(client, ttl=ttl, max_size=max_size, cache_dir=cache_dir)
+
+
+def daemon_socket_file() -> str:
+    """Get path to the socket of the daemon serving the config dir.
+
+    Returns:
+        path to the daemon socket
+    """
+    ensure_env()
+    return os.path.join(os.environ[ATCMONEY_CONFIG_DIR_KEY], DAEMON_SOCKET_FILE_NAME)
+
+
+def _daemon() -> Optional["DaemonConnection"]:
+    """Connect to the daemon of the config dir, None if it is not running."""
+    path = daemon_socket_file()
+    if not os.path.exists(path):
+        return None
+    from atcmoney_cli.remote import connect
+
+    return connect(path)
+
+
+def local_provider() -> Client:
     """Get data provider client.
 
+    Concurrent quote calls for the same symbol are coalesced into one provider call and
+    exchange rates are cached for ATCMONEY_FX_CACHE_TTL seconds (an hour by default).
+    The client is wrapped in a quote cache when ATCMONEY_QUOTE_CACHE_TTL (seconds) is set
+    to a positive value, ATCMONEY_QUOTE_CACHE_DISK persists that cache in the config dir.
+
     Returns:
         Provider client
     """
-    return ClientFactory[os.environ.get(ATCMONEY_PROVIDER, ClientType.MOCK)]()
+    ensure_env()
+    return _provider(
+        os.environ.get(ATCMONEY_PROVIDER, ClientType.MOCK),
+        float(os.environ.get(ATCMONEY_QUOTE_CACHE_TTL, 0)),
+        int(os.environ.get(ATCMONEY_QUOTE_CACHE_SIZE, DEFAULT_MAX_SIZE)),
+        os.environ.get(ATCMONEY_CONFIG_DIR_KEY)
+        if env_flag(ATCMONEY_QUOTE_CACHE_DISK)
+        else None,
+        float(os.environ.get(ATCMONEY_FX_CACHE_TTL, DEFAULT_FX_TTL)),
+    )
+
+
+def get_provider() -> Client:
+    """Get data provider client, the daemon one when a daemon serves the config dir.
+
+    Returns:
+        Provider client, see local_provider
+    """
+    connection = _daemon()
+    if connection is not None:
+        from atcmoney_cli.remote import RemoteClient
+
+        return RemoteClient(connection)
+    return local_provider()
 
 
 def position_store_file() -> str:
@@ -47,4 +144,47 @@ def position_store_file() -> str:
     Returns:
         path to position store file
     """
-    return os.path.join(os.environ[ATCMONEY_CONFIG_DIR_KEY], ".positions.json")
+    from libs.store.journal import SNAPSHOT_FILE_NAME
+
+    ensure_env()
+    return os.path.join(os.environ[ATCMONEY_CONFIG_DIR_KEY], SNAPSHOT_FILE_NAME)
+
+
+def history_provider() -> Client:
+    """Get data provider client caching price histories in the config dir.
+
+    Returns:
+        Provider client, see get_provider and HistoryCachingClient
+    """
+    from libs.providers.history import HistoryCachingClient
+
+    provider = get_provider()
+    return HistoryCachingClient(provider, os.environ[ATCMONEY_CONFIG_DIR_KEY])
+
+
+def local_position_store() -> "PositionStore":
+    """Get the position store of the config dir.
+
+    The store backend is selected with ATCMONEY_POSITION_STORE (JOURNAL by default).
+
+    Returns:
+        Position store
+    """
+    ensure_env()
+    return StoreFactory[os.environ.get(ATCMONEY_POSITION_STORE, StoreType.JOURNAL)](
+        os.environ[ATCMONEY_CONFIG_DIR_KEY]
+    )
+
+
+def position_store() -> "PositionStore":
+    """Get the position store, the daemon one when a daemon serves the config dir.
+
+    Returns:
+        Position store, see local_position_store
+    """
+    connection = _daemon()
+    if connection is not None:
+        from atcmoney_cli.remote_store import RemoteStore
+
+        return RemoteStore(connection)
+    return local_position_store()
@@ -0,0 +1,237 @@
+"""Daemon keeping the provider client and position store of a config dir warm.
+
+`atcmoney daemon` serves, until stopped, the provider client (its connection pool and
+quote cache) and the position store (its in memory book) on a unix socket in the config
+dir. While it runs, the quote and position commands of that config dir use them through
+the daemon (see atcmoney_cli.remote) instead of building them on every invocation, and
+fall back to in-process execution when no daemon answers. The daemon serves with the
+configuration (.env and environment) it was started with.
+"""
+import json
+import os
+import signal
+from datetime import date
+from logging import getLogger
+from socketserver import StreamRequestHandler, ThreadingUnixStreamServer
+from threading import Lock, Thread
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import click
+from atcmoney_cli.config import (
+    daemon_socket_file,
+    local_position_store,
+    local_provider,
+)
+from atcmoney_cli.remote import (
+    DaemonError,
+    connect,
+    encode_error,
+    encode_history,
+    encode_quote_result,
+)
+from atcmoney_cli.remote_store import (
+    encode_entry,
+    encode_pnl,
+    encode_position,
+)
+
+from libs.common.position import Position
+from libs.common.trade import Trade
+from libs.providers.client import Client
+from libs.providers.exception import ProviderAPIError
+from libs.store.store import PositionStore
+
+logger = getLogger(__name__)
+
+
+class Daemon:
+    def __init__(self, path: str, provider: Client, store: PositionStore):
+        """Threaded unix socket server answering provider and position store requests.
+
+        Quote requests are served concurrently, store requests one at a time since stores
+        are not thread safe. The socket is only accessible to the current user.
+
+        Args:
+            path: the socket path, a stale socket file is replaced
+            provider: the provider client to serve
+            store: the position store to serve, closed with the daemon
+
+        Raises:
+            DaemonError: a daemon is already listening on the socket
+        """
+        self.path = path
+        self.provider = provider
+        self.store = store
+        self._store_lock = Lock()
+        self._methods: Dict[str, Callable[..., Any]] = {
+            "ping": lambda: None,
+            "requests_per_minute": lambda: self.provider.requests_per_minute,
+            "get_quote": self.get_quote,
+            "get_history": self.get_history,
+            "get_fx_rate": self.provider.get_fx_rate,
+            "load_position": self.load_position,
+            "load_aggregates": self.load_aggregates,
+            "store_positions": self.store_positions,
+            "record_trade": self.record_trade,
+            "record_trades": self.record_trades,
+        }
+        self._streams: Dict[str, Callable[..., Iterator[Any]]] = {
+            "iter_quotes": self.iter_quotes,
+            "load_positions": self.load_positions,
+            "read_journal": self.read_journal,
+        }
+
+        if connect(path) is not None:
+            raise DaemonError(f"A daemon is already listening on {path}")
+        if os.path.exists(path):
+            os.remove(path)
+        self._server = ThreadingUnixStreamServer(path, _handler(self))
+        self._server.daemon_threads = True
+        os.chmod(path, 0o600)
+        self._thread: Optional[Thread] = None
+
+    def serve_forever(self, poll_interval: float = 0.5):
+        self._server.serve_forever(poll_interval)
+
+    def start(self) -> "Daemon":
+        """Serve in a background thread."""
+        self._thread = Thread(target=self.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """Release the socket and the store, once the daemon is stopped."""
+        self._server.server_close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        with self._store_lock:
+            self.store.close()
+
+    def _shutdown(self):
+        # shutdown waits for serve_forever to return, it cannot run on a handler thread
+        Thread(target=self._server.shutdown, daemon=True).start()
+
+    def handle(self, line: bytes) -> Iterator[Dict]:
+        """Serve a request line.
+
+        Returns:
+            An iterator of the response messages
+        """
+        try:
+            request = json.loads(line)
+            method, params = request["method"], request.get("params", {})
+            if method == "shutdown":
+                yield {"result": None}
+                # only once the reply is sent, the process exits when serving stops
+                self._shutdown()
+            elif method in self._streams:
+                for item in self._streams[method](**params):
+                    yield {"item": item}
+                yield {"result": None}
+            elif method in self._methods:
+                yield {"result": self._methods[method](**params)}
+            else:
+                raise DaemonError(f"Unknown method {method!r}")
+        except Exception as ex:
+            if not isinstance(ex, (ProviderAPIError, ValueError, DaemonError)):
+                logger.exception(f"Failed to serve {line!r}")
+            yield {"error": encode_error(ex)}
+
+    def get_quote(self, symbol: str) -> Dict:
+        return encode_quote_result(self.provider.get_quote(symbol))
+
+    def get_history(self, symbol: str, start: str, end: str) -> Dict:
+        return encode_history(
+            self.provider.get_history(
+                symbol, date.fromisoformat(start), date.fromisoformat(end)
+            )
+        )
+
+    def iter_quotes(self, symbols: List[str]) -> Iterator[Dict]:
+        for symbol, result in self.provider.iter_quotes(symbols):
+            yield {"symbol": symbol, "quote": encode_quote_result(result)}
+
+    def load_positions(self) -> Iterator[Dict]:
+        with self._store_lock:
+            positions = self.store.load_positions()
+        return (encode_position(position) for position in positions)
+
+    def load_position(self, symbol: str) -> Optional[Dict]:
+        with self._store_lock:
+            return encode_position(self.store.load_position(symbol))
+
+    def load_aggregates(self) -> Dict:
+        with self._store_lock:
+            return self.store.load_aggregates().to_dict()
+
+    def store_positions(self, positions: List[Dict]):
+        positions = [Position(**position) for position in positions]
+        with self._store_lock:
+            self.store.store_positions(positions)
+
+    def record_trade(self, trade: Dict) -> Dict:
+        trade = Trade(**trade)
+        with self._store_lock:
+            position, pnl = self.store.record_trade(trade)
+        return {"position": encode_position(position), "pnl": encode_pnl(pnl)}
+
+    def record_trades(self, trades: List[Dict]) -> List[Optional[Dict]]:
+        trades = [Trade(**trade) for trade in trades]
+        with self._store_lock:
+            pnls = self.store.record_trades(trades)
+        return [encode_pnl(pnl) for pnl in pnls]
+
+    def read_journal(self) -> Iterator[Dict]:
+        with self._store_lock:
+            entries = list(self.store.read_journal())
+        return (encode_entry(entry) for entry in entries)
+
+
+def _handler(daemon: Daemon):
+    class Handler(StreamRequestHandler):
+        def handle(self):
+            try:
+                for line in self.rfile:
+                    for message in daemon.handle(line):
+                        self.wfile.write(json.dumps(message).encode() + b"\n")
+                        self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # the client went away (i.e stopped reading a stream)
+                pass
+
+    return Handler
+
+
+@click.command()
+@click.option("--stop", is_flag=True, help="Stop the daemon of the config dir")
+def daemon(stop: bool):
+    """Serve the provider and position store of the config dir to the other commands."""
+    path = daemon_socket_file()
+    if stop:
+        connection = connect(path)
+        if connection is None:
+            click.echo("No daemon is running")
+            return
+        connection.call("shutdown")
+        click.echo("Daemon stopped")
+        return
+
+    try:
+        server = Daemon(path, local_provider(), local_position_store())
+    except DaemonError as ex:
+        raise click.ClickException(str(ex))
+    # stop cleanly (removing the socket) on SIGTERM as on ctrl-c
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    click.echo(f"Daemon listening on {path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
@@ -1,14 +1,42 @@
 #!/usr/bin/python
+import importlib
 from os import PathLike
-from typing import Optional
+from typing import Dict, List, Optional
 
 import click
-from atcmoney_cli.config import load_env
-from atcmoney_cli.position import position
-from atcmoney_cli.quote import quote
+from atcmoney_cli.config import defer_env, load_env
 
 
-@click.group()
+class LazyGroup(click.Group):
+    def __init__(
+        self, *args, lazy_subcommands: Optional[Dict[str, str]] = None, **kwargs
+    ):
+        """Click group importing the module of a subcommand only when it is used.
+
+        Args:
+            lazy_subcommands: subcommand name -> "module.attribute" of the click command
+        """
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = lazy_subcommands or {}
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted([*super().list_commands(ctx), *self.lazy_subcommands])
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        if cmd_name in self.lazy_subcommands:
+            module, name = self.lazy_subcommands[cmd_name].rsplit(".", 1)
+            return getattr(importlib.import_module(module), name)
+        return super().get_command(ctx, cmd_name)
+
+
+@click.group(
+    cls=LazyGroup,
+    lazy_subcommands={
+        "daemon": "atcmoney_cli.daemon.daemon",
+        "quote": "atcmoney_cli.quote.quote",
+        "position": "atcmoney_cli.position.position",
+    },
+)
 @click.option(
     "-c",
     "--config-folder-path",
@@ -17,8 +45,4 @@ from atcmoney_cli.quote import quote
 )
 def cli(config_folder_path: Optional[PathLike] = None):
     """Main cli command with config flag."""
-    load_env(config_folder_path)
-
-
-cli.add_command(quote)
-cli.add_command(position)
+    defer_env(lambda: load_env(config_folder_path))
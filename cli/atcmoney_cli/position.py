@@ -1,19 +1,32 @@
+import csv
 import json
+import math
+from datetime import date
+from itertools import chain, islice
 from json import JSONDecodeError
-from typing import Dict, List, Optional
+from typing import IO, Dict, Iterator, List, Optional, Set, Tuple
 
 import click
-import inquirer
-from atcmoney_cli.config import get_provider, position_store_file
+from atcmoney_cli.config import (
+    get_provider,
+    history_provider,
+    position_store,
+    position_store_file,
+)
 from atcmoney_cli.logging import logger
 from click.exceptions import BadParameter
 
+from libs.common.aggregates import CurrencyAggregates
+from libs.common.book import BookTotals, PortfolioBook
 from libs.common.currency import Currency
-from libs.common.position import Position, add_trade_to_position
+from libs.common.position import Position
 from libs.common.quote import Quote
+from libs.common.records import TradeRecord
 from libs.common.trade import Side, Trade
 from libs.providers.exception import ProviderAPIError
 
+IMPORT_CHUNK_SIZE = 10000
+
 
 def dollar_precision(value: float) -> float:
     return round(value, 2)
@@ -24,8 +37,9 @@ def dollar_precision(value: float) -> float:
 def position(ctx):
     if ctx.invoked_subcommand is None:
         click.echo("Fetching positions")
-        for position in load_positions():
-            print_dict(_position_print_data(position))
+        book = load_book()
+        for symbol in book.symbols:
+            print_dict(_position_print_data(book.position(symbol)))
         click.echo("Done Fetching positions")
 
 
@@ -44,10 +58,21 @@ def _position_print_data(position: Position) -> Dict:
     }
 
 
-def _position_details_print_data(position: Position, quote: Quote) -> Dict:
+def _position_details_print_data(
+    position: Position, quote: Quote, rate: Optional[float] = None
+) -> Dict:
+    """Print data of a position valued at a quote.
+
+    Args:
+        position: the position
+        quote: the quote of the position symbol
+        rate: price of one unit of the quote currency in the position currency, the gains
+            are left out when the currencies differ and the rate is unknown
+    """
     data = _position_print_data(position)
-    pnl = position.calculate_pnl(quote.price)
-    if position.currency == quote.currency:
+    price = _position_price(position, quote, rate)
+    if price is not None:
+        pnl = position.calculate_pnl(price)
         data[
             "absolute gains"
         ] = f"{dollar_precision(pnl.absolute_gains)} {position.currency}"
@@ -60,29 +85,45 @@ def _position_details_print_data(position: Position, quote: Quote) -> Dict:
     return data
 
 
+def _position_price(
+    position: Position, quote: Quote, rate: Optional[float] = None
+) -> Optional[float]:
+    """Return the quote price in the position currency, None if it cannot be converted."""
+    if quote.currency == position.currency:
+        return quote.price
+    if rate is None or math.isnan(rate):
+        return None
+    return quote.price * rate
+
+
+def _totals_print_data(currency: str, totals: BookTotals) -> Dict:
+    return {
+        "total": currency,
+        "cost": f"{dollar_precision(totals.cost)} {currency}",
+        "market value": f"{dollar_precision(totals.market_value)} {currency}",
+        "absolute gains": f"{dollar_precision(totals.absolute_gains)} {currency}",
+        "relative gain": f"{round(100 * totals.relative_gains, 6)}%",
+    }
+
+
 def load_positions() -> List[Position]:
     try:
-        positions = [
-            Position(**position) for position in json.load(open(position_store_file()))
-        ]
-    except FileNotFoundError:
-        logger.warning(
-            f"Position data file did not exist, creating file in {position_store_file()}"
-        )
-        json.dump([], open(position_store_file(), "w"))
-        return []
+        return position_store().load_positions()
     except (ValueError, JSONDecodeError):
         logger.warning(f"Unreadable position data store: {position_store_file()}")
         return []
-    return positions
+
+
+def load_book() -> PortfolioBook:
+    try:
+        return position_store().load_book()
+    except (ValueError, JSONDecodeError):
+        logger.warning(f"Unreadable position data store: {position_store_file()}")
+        return PortfolioBook()
 
 
 def store_positions(positions: List[Position]):
-    # This is silly but it converts a pydantic model to  a jsonable dictionary
-    json.dump(
-        [json.loads(position.json()) for position in positions],
-        open(position_store_file(), "w"),
-    )
+    position_store().store_positions(positions)
 
 
 def load_positions_map() -> Dict[str, Position]:
@@ -90,6 +131,8 @@ def load_positions_map() -> Dict[str, Position]:
 
 
 def user_select_from_stocks(symbols: List[str]) -> str:
+    import inquirer
+
     questions = [
         inquirer.List(
             "stock",
@@ -108,22 +151,485 @@ def user_select_from_stocks(symbols: List[str]) -> str:
     help="Position symbol to get details for",
 )
 def details(symbol: Optional[str] = None):
-    positions_map = load_positions_map()
     if symbol is None:
-        symbol = user_select_from_stocks([s for s in positions_map.keys()])
+        symbol = user_select_from_stocks(list(load_book().symbols))
 
-    if symbol not in positions_map.keys():
+    try:
+        position = position_store().load_position(symbol)
+    except (ValueError, JSONDecodeError):
+        logger.warning(f"Unreadable position data store: {position_store_file()}")
+        position = None
+    if position is None:
         click.echo(f"No position found for {symbol=}")
         return
 
+    provider = get_provider()
     try:
-        quote = get_provider().get_quote(symbol)
+        quote = provider.get_quote(symbol)
     except ProviderAPIError as ex:
         logger.warning(ex.message)
-        print_dict(_position_print_data(positions_map[symbol]))
+        print_dict(_position_print_data(position))
+        return
+
+    rate = None
+    if quote.currency != position.currency:
+        try:
+            rate = provider.get_fx_rate(quote.currency, position.currency)
+        except ProviderAPIError as ex:
+            logger.warning(ex.message)
+    print_dict(_position_details_print_data(position, quote, rate))
+
+
+@click.command()
+@click.option(
+    "-c",
+    "--currency",
+    type=click.Choice([currency.value for currency in Currency]),
+    default=None,
+    help="Reporting currency of an additional total of every position",
+)
+def value(currency: Optional[str] = None):
+    """Price every position concurrently, streaming rows as quotes arrive, then totals.
+
+    Quotes in another currency than their position are converted once the exchange rates
+    of every currency involved are fetched in one batch.
+    """
+    book = load_book()
+    if not len(book):
+        click.echo("No positions found")
+        return
+
+    provider = get_provider()
+    prices: Dict[str, float] = {}
+    converted: Dict[str, Quote] = {}
+    for symbol, result in provider.iter_quotes(book.symbols):
+        if isinstance(result, ProviderAPIError):
+            logger.warning(result.message)
+            continue
+        position = book.position(symbol)
+        if result.currency != position.currency:
+            converted[symbol] = result
+            continue
+        print_dict(_position_details_print_data(position, result))
+        prices[symbol] = result.price
+
+    rates = None
+    if converted or currency is not None:
+        from libs.providers.fx import fetch_rate_matrix
+
+        currencies = set(book.currencies)
+        currencies.update(quote.currency for quote in converted.values())
+        rates, errors = fetch_rate_matrix(
+            provider, currencies, currency or Currency.USD.value
+        )
+        for ex in errors.values():
+            logger.warning(ex.message)
+    for symbol, quote in converted.items():
+        position = book.position(symbol)
+        rate = rates.rate(quote.currency, position.currency)
+        print_dict(_position_details_print_data(position, quote, rate))
+        price = _position_price(position, quote, rate)
+        if price is not None:
+            prices[symbol] = price
+
+    if len(prices) < len(book):
+        click.echo(f"{len(book) - len(prices)} position(s) could not be priced")
+    book_prices = book.prices(prices)
+    for code, totals in book.totals(book_prices).items():
+        print_dict(_totals_print_data(code, totals))
+    if currency is not None:
+        data = _totals_print_data(
+            currency, book.converted_totals(book_prices, rates, currency)
+        )
+        data["total"] = f"all positions in {currency}"
+        print_dict(data)
+
+
+def _aggregates_print_data(currency: str, values: CurrencyAggregates) -> Dict:
+    return {
+        "total": currency,
+        "positions": values.positions,
+        "long cost": f"{dollar_precision(values.long_cost)} {currency}",
+        "short cost": f"{dollar_precision(values.short_cost)} {currency}",
+        "gross exposure": f"{dollar_precision(values.gross_exposure)} {currency}",
+        "net exposure": f"{dollar_precision(values.net_exposure)} {currency}",
+        "realized gains": f"{dollar_precision(values.realized)} {currency}",
+    }
+
+
+@click.command()
+def summary():
+    """Print position count, exposure at cost and realized gains from store aggregates."""
+    try:
+        aggregates = position_store().load_aggregates()
+    except (ValueError, JSONDecodeError):
+        logger.warning(f"Unreadable position data store: {position_store_file()}")
+        return
+    if not aggregates.currencies:
+        click.echo("No positions found")
+        return
+
+    click.echo(f"positions: {aggregates.positions}")
+    for currency, values in sorted(aggregates.currencies.items()):
+        print_dict(_aggregates_print_data(currency, values))
+
+
+def _unexplained_positions(
+    stored: List[Position], replayed: PortfolioBook
+) -> List[str]:
+    """Return the symbols of the stored positions their replayed trade history differs from.
+
+    Args:
+        stored: the stored positions
+        replayed: the positions rebuilt from the trade history
+    """
+    symbols = []
+    for position in stored:
+        row = replayed.index.get(position.symbol)
+        if (
+            row is None
+            or not math.isclose(position.quantity, replayed.quantities[row])
+            or not math.isclose(position.cost, replayed.costs[row])
+        ):
+            symbols.append(position.symbol)
+    return symbols
+
+
+def _history_print_data(
+    date, currency: str, market_value: float, realized: float, unrealized: float
+) -> Dict:
+    return {
+        "date": date,
+        "market value": f"{dollar_precision(market_value)} {currency}",
+        "realized gains": f"{dollar_precision(realized)} {currency}",
+        "unrealized gains": f"{dollar_precision(unrealized)} {currency}",
+        "absolute gains": f"{dollar_precision(realized + unrealized)} {currency}",
+    }
+
+
+@click.command()
+@click.option(
+    "--start",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help="First day of the history, the day of the first trade by default",
+)
+@click.option(
+    "--end",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help="Last day of the history, today by default",
+)
+@click.option(
+    "-s",
+    "--symbol",
+    default=None,
+    help="Position symbol to get the history for, every position by default",
+)
+def history(start, end, symbol: Optional[str] = None):
+    """Print the daily market value and gains of the positions from the trade history.
+
+    The positions are rebuilt from the recorded trades only. Stored positions the trade
+    history does not lead to (i.e held before the trades were recorded, or kept by a store
+    without trade history) are reported and left out.
+    """
+    from libs.common.engine import apply_trades
+    from libs.common.performance import curve_dates, performance_curves, trade_days
+
+    store = position_store()
+    try:
+        stored = [
+            position
+            for position in store.load_positions()
+            if symbol is None or position.symbol == symbol
+        ]
+        entries = [
+            entry
+            for entry in store.read_journal()
+            if symbol is None or entry.trade.symbol == symbol
+        ]
+    except (ValueError, JSONDecodeError):
+        logger.warning(f"Unreadable position data store: {position_store_file()}")
+        return
+    finally:
+        store.close()
+    unexplained = _unexplained_positions(
+        stored, apply_trades([entry.trade for entry in entries]).book
+    )
+    if unexplained:
+        click.echo(
+            f"{len(unexplained)} position(s) not explained by the trade history are"
+            f" left out: {', '.join(unexplained)}"
+        )
+    if not entries:
+        click.echo("No trade history found")
         return
 
-    print_dict(_position_details_print_data(positions_map[symbol], quote))
+    days = trade_days([entry.timestamp for entry in entries])
+    start = days.min() if start is None else start.date()
+    end = date.today() if end is None else end.date()
+    dates = curve_dates(start, end)
+    if len(dates) == 0:
+        click.echo(f"No trading day between {start} and {end}")
+        return
+
+    symbols = list(dict.fromkeys(entry.trade.symbol for entry in entries))
+    results = history_provider().get_histories(
+        symbols, dates[0].item(), dates[-1].item()
+    )
+    histories = {}
+    for traded_symbol, result in results.items():
+        if isinstance(result, ProviderAPIError):
+            logger.warning(result.message)
+            continue
+        histories[traded_symbol] = result
+
+    curves = performance_curves(
+        [entry.trade for entry in entries], days, histories, dates
+    )
+    for currency, totals in curves.totals().items():
+        for row, day in enumerate(curves.dates):
+            print_dict(
+                _history_print_data(
+                    day,
+                    currency,
+                    totals.market_values[row],
+                    totals.realized[row],
+                    totals.unrealized[row],
+                )
+            )
+
+
+def _import_rows(stream: IO[str]) -> Iterator[Tuple[int, Optional[Dict]]]:
+    """Read the rows of a CSV (with a header line) or JSON lines stream.
+
+    Yields:
+        (line number, row) tuples, the row is None when the line is not a JSON object
+    """
+    first_line = stream.readline()
+    lines = chain([first_line], stream)
+    if not first_line.lstrip().startswith("{"):
+        reader = csv.DictReader(lines, skipinitialspace=True)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except JSONDecodeError:
+            row = None
+        yield number, row if isinstance(row, dict) else None
+
+
+@click.command()
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Maximum number of worker processes, the number of CPUs by default",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Replace the stored positions that differ from the replayed ones",
+)
+def rebuild(workers: Optional[int] = None, force: bool = False):
+    """Rebuild the positions by replaying the trade history.
+
+    The history is sharded by symbol and replayed across worker processes. The stored
+    positions of traded symbols are replaced with the replayed ones, the positions of
+    symbols without trade history (i.e imported from a legacy store) are kept.
+
+    A stored position that differs from its replayed history may hold quantities the
+    history does not explain (i.e a legacy position traded since the import): the
+    differing symbols are then only reported and nothing is written, unless --force.
+    """
+    from libs.common.engine import apply_trades_sharded, realized_by_currency
+
+    store = position_store()
+    try:
+        try:
+            stored = {position.symbol: position for position in store.load_positions()}
+            trades = store.read_trade_batch()
+        except (ValueError, JSONDecodeError):
+            logger.warning(f"Unreadable position data store: {position_store_file()}")
+            return
+        if not len(trades):
+            click.echo("No trade history found")
+            return
+
+        result = apply_trades_sharded(trades, workers=workers)
+        replayed = {
+            position.symbol: position for position in result.book.to_positions()
+        }
+        traded = set(trades.symbols.tolist())
+        differing = _unexplained_positions(
+            [position for symbol, position in stored.items() if symbol in traded],
+            result.book,
+        ) + sorted(symbol for symbol in replayed if symbol not in stored)
+        if differing and not force:
+            click.echo(
+                f"{len(differing)} position(s) differ from the trade history:"
+                f" {', '.join(differing)}"
+            )
+            click.echo("Positions left unchanged, use --force to replace them")
+        else:
+            positions = list(replayed.values()) + [
+                position for symbol, position in stored.items() if symbol not in traded
+            ]
+            store.store_positions(positions)
+            click.echo(
+                f"Rebuilt {len(replayed)} position(s) from {len(trades)} trade(s),"
+                f" {len(differing)} differed from the stored ones"
+            )
+    finally:
+        store.close()
+    for currency, gains in realized_by_currency(trades, result).items():
+        print_dict(
+            {
+                "total": currency,
+                "realized gains": f"{dollar_precision(gains)} {currency}",
+            }
+        )
+
+
+def _import_number(row: Dict, field: str) -> float:
+    try:
+        value = float(row[field])
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be a number")
+    if not math.isfinite(value):
+        raise ValueError(f"{field} must be finite")
+    return value
+
+
+def _import_trade(row: Optional[Dict]) -> Trade:
+    """Build the trade of an imported row.
+
+    Fields are checked here, with the Trade model constraints, and the model is built
+    without validating it again (see TradeRecord), validation would dominate imports.
+
+    Raises:
+        ValueError or KeyError if the row is not a valid trade
+    """
+    if row is None:
+        raise ValueError("unreadable row")
+    symbol = row["symbol"]
+    if not isinstance(symbol, str) or not symbol:
+        raise ValueError("missing symbol")
+    side = Side(str(row["side"]).upper())
+    currency = Currency(row["currency"])
+    quantity = _import_number(row, "quantity")
+    if quantity <= 0:
+        raise ValueError("quantity must be greater than zero")
+    unit_price = _import_number(row, "unit_price")
+    # a zero cost position has no relative gains to realize
+    if unit_price <= 0:
+        raise ValueError("unit_price must be greater than zero")
+    if side == Side.SELL:
+        quantity = -quantity
+    return TradeRecord(symbol, side, currency, quantity, unit_price).to_model()
+
+
+@click.command(name="import")
+@click.argument("file", type=click.File("r"))
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=IMPORT_CHUNK_SIZE,
+    show_default=True,
+    help="Number of trades written to the position store at once",
+)
+@click.option(
+    "--summary",
+    "summary_only",
+    is_flag=True,
+    help="Only print the total realized gains, not the gains of every trade",
+)
+def import_trades(file: IO[str], chunk_size: int, summary_only: bool):
+    """Import the trades of a CSV or JSON lines FILE (- for stdin).
+
+    Every row has a symbol, side (BUY or SELL), quantity, unit_price and currency. Rows
+    are read and recorded in chunks, invalid rows and trades on symbols the market
+    provider does not know are skipped. Symbols without a position are checked with the
+    market provider once, in a batch per chunk.
+    """
+    store = position_store()
+    try:
+        try:
+            known = set(store.load_book().symbols)
+        except (ValueError, JSONDecodeError):
+            logger.warning(f"Unreadable position data store: {position_store_file()}")
+            return
+        rejected: Set[str] = set()
+        imported, skipped = 0, 0
+        realized: Dict[str, float] = {}
+        rows = _import_rows(file)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+
+            trades: List[Tuple[int, Trade]] = []
+            for number, row in chunk:
+                try:
+                    trades.append((number, _import_trade(row)))
+                except KeyError as ex:
+                    click.echo(f"line {number}: invalid trade, missing {ex.args[0]}")
+                    skipped += 1
+                except ValueError as ex:
+                    click.echo(f"line {number}: invalid trade, {ex}")
+                    skipped += 1
+
+            new_symbols = {trade.symbol for _, trade in trades} - known - rejected
+            if new_symbols:
+                for symbol, result in (
+                    get_provider().get_quotes(sorted(new_symbols)).items()
+                ):
+                    if isinstance(result, ProviderAPIError):
+                        logger.warning(result.message)
+                        click.echo(f"Market Provider failed to find quote for {symbol}")
+                        rejected.add(symbol)
+                    else:
+                        known.add(symbol)
+            if rejected:
+                accepted = [item for item in trades if item[1].symbol not in rejected]
+                skipped += len(trades) - len(accepted)
+                trades = accepted
+
+            if not trades:
+                continue
+            pnls = store.record_trades([trade for _, trade in trades])
+            imported += len(trades)
+            for (number, trade), pnl in zip(trades, pnls):
+                if pnl is None:
+                    continue
+                currency = trade.currency.value
+                realized[currency] = realized.get(currency, 0.0) + pnl.absolute_gains
+                if not summary_only:
+                    print_dict(
+                        {
+                            "line": number,
+                            "symbol": trade.symbol,
+                            "absolute gains": f"{pnl.absolute_gains} {currency}",
+                            "relative gains": f"{round(100 * pnl.relative_gains, 6)}%",
+                        }
+                    )
+    finally:
+        store.close()
+
+    click.echo(f"Imported {imported} trade(s), skipped {skipped}")
+    for currency, gains in sorted(realized.items()):
+        print_dict(
+            {
+                "total": currency,
+                "realized gains": f"{dollar_precision(gains)} {currency}",
+            }
+        )
 
 
 def _register_trade(side: Side):
@@ -152,6 +658,8 @@ def _register_trade(side: Side):
             return float(value)
         raise BadParameter(message="Must be float greater than or equal zero")
 
+    import inquirer
+
     symbol = click.prompt("What is the instrument symbol?", type=str)
     quantity = click.prompt(
         f"How many units are you {side.lower()}ing?", value_proc=float_larger_than_zero
@@ -171,9 +679,6 @@ def _register_trade(side: Side):
     if side == Side.SELL:
         quantity = (-1) * quantity
 
-    positions_map = load_positions_map()
-    position = positions_map.get(symbol)
-
     if total_or_unit_price == "Total":
         unit_price = unit_price / abs(quantity)
 
@@ -185,15 +690,19 @@ def _register_trade(side: Side):
         unit_price=unit_price,
     )
 
-    if position is None:
-        try:
-            get_provider().get_quote(symbol)
-        except ProviderAPIError as ex:
-            logger.warning(ex.message)
-            click.echo("Market Provider failed to find quote, aborting trade")
-            return
-
-    position, pnl = add_trade_to_position(trade, position)
+    store = position_store()
+    try:
+        if store.load_position(symbol) is None:
+            try:
+                get_provider().get_quote(symbol)
+            except ProviderAPIError as ex:
+                logger.warning(ex.message)
+                click.echo("Market Provider failed to find quote, aborting trade")
+                return
+
+        position, pnl = store.record_trade(trade)
+    finally:
+        store.close()
     if pnl is not None:
         click.echo(
             f"absolute gains: {pnl.absolute_gains} {trade.currency},"
@@ -201,14 +710,10 @@ def _register_trade(side: Side):
         )
 
     if position is None:
-        del positions_map[symbol]
         click.echo("Position was liquidated")
     else:
-        positions_map[symbol] = position
         click.echo(f"Position updated to {position.quantity} units")
 
-    store_positions(list(positions_map.values()))
-
 
 @click.command(name="buy")
 def register_buy():
@@ -224,5 +729,10 @@ def register_sell():
 
 
 position.add_command(details)
+position.add_command(value)
+position.add_command(history)
+position.add_command(summary)
 position.add_command(register_buy)
 position.add_command(register_sell)
+position.add_command(import_trades)
+position.add_command(rebuild)
@@ -4,35 +4,51 @@ import click
 from atcmoney_cli.config import get_provider
 from atcmoney_cli.logging import logger
 
-from libs.providers.client import Client
+from libs.providers.client import QuoteResult
 from libs.providers.exception import ProviderAPIError
+from libs.providers.stream import DEFAULT_MIN_INTERVAL, stream_quotes
 
-MAX_QUOTE_CALL = 5
 
-
-def print_quote(symbol: str, provider: Client):
-    """Fetch and print quote using provider client.
+def print_quote(symbol: str, result: QuoteResult):
+    """Print quote or log the provider error for a symbol.
 
     Args:
-        symbol: symbol to get a quote for
-        provider: quote data provider client
+        symbol: symbol the quote was fetched for
+        result: quote or provider error returned by the provider client
     """
-    try:
-        quote = provider.get_quote(symbol)
-        click.echo(f"{symbol}: {quote.price} {quote.currency}")
-    except ProviderAPIError as ex:
-        logger.warning(ex.message)
+    if isinstance(result, ProviderAPIError):
+        logger.warning(result.message)
+        return
+    click.echo(f"{symbol}: {result.price} {result.currency}")
 
 
 @click.command()
 @click.argument("symbols", nargs=-1)
-def quote(symbols: List[str]):
+@click.option(
+    "-w",
+    "--watch",
+    is_flag=True,
+    help="Keep refreshing the quotes and print them when they change",
+)
+@click.option(
+    "--min-interval",
+    type=float,
+    default=DEFAULT_MIN_INTERVAL,
+    show_default=True,
+    help="Minimum seconds between two refreshes in watch mode",
+)
+def quote(symbols: List[str], watch: bool, min_interval: float):
     """Command to get quote(s) for (a) symbol(s)."""
-    if len(symbols) > MAX_QUOTE_CALL:
-        logger.warning(
-            f"No more than {MAX_QUOTE_CALL} symbols supported "
-            + f"at a time, will skip symbols after {symbols[MAX_QUOTE_CALL]}"
-        )
-
-    for symbol in symbols[:MAX_QUOTE_CALL]:
-        print_quote(symbol, get_provider())
+    if not watch:
+        for symbol, result in get_provider().get_quotes(symbols).items():
+            print_quote(symbol, result)
+        return
+
+    # refreshes are spaced to fit the provider rate budget, ctrl-c stops watching
+    try:
+        for symbol, result in stream_quotes(
+            get_provider(), symbols, min_interval=min_interval
+        ):
+            print_quote(symbol, result)
+    except KeyboardInterrupt:
+        pass
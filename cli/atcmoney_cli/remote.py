@@ -0,0 +1,175 @@
+"""Client side of the daemon protocol, see atcmoney_cli.daemon.
+
+A request is a json line {"method": ..., "params": {...}} sent to the daemon unix socket.
+The daemon answers with json lines: zero or more {"item": ...} for streamed results, then
+either {"result": ...} or {"error": {"type": ..., "message": ...}}.
+"""
+import json
+import os
+import socket
+from datetime import date
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from libs.common.quote import Quote
+from libs.providers.client import Client, QuoteResult
+from libs.providers.exception import ProviderAPIError, ProviderThrottleError
+
+if TYPE_CHECKING:
+    from libs.common.history import PriceHistory
+
+PROVIDER_ERRORS = {
+    "ProviderAPIError": ProviderAPIError,
+    "ProviderThrottleError": ProviderThrottleError,
+}
+
+
+class DaemonError(Exception):
+    """The daemon failed to serve a request."""
+
+    pass
+
+
+def encode_error(ex: Exception) -> Dict:
+    if isinstance(ex, ProviderAPIError):
+        return {"type": type(ex).__name__, "message": ex.message}
+    if isinstance(ex, ValueError):
+        return {"type": "ValueError", "message": str(ex)}
+    return {"type": "DaemonError", "message": f"{type(ex).__name__}: {ex}"}
+
+
+def decode_error(data: Dict) -> Exception:
+    """Rebuild a remote error, provider and value errors keep their type."""
+    if data["type"] in PROVIDER_ERRORS:
+        return PROVIDER_ERRORS[data["type"]](message=data["message"])
+    if data["type"] == "ValueError":
+        return ValueError(data["message"])
+    return DaemonError(data["message"])
+
+
+def encode_quote_result(result: QuoteResult) -> Dict:
+    if isinstance(result, ProviderAPIError):
+        return {"error": encode_error(result)}
+    return {"price": result.price, "currency": result.currency}
+
+
+def decode_quote_result(data: Dict) -> QuoteResult:
+    if "error" in data:
+        return decode_error(data["error"])
+    return Quote(data["price"], data["currency"])
+
+
+def encode_history(history: "PriceHistory") -> Dict:
+    return {
+        "dates": history.dates.astype("int64").tolist(),
+        "closes": history.closes.tolist(),
+        "currency": history.currency,
+    }
+
+
+def decode_history(data: Dict) -> "PriceHistory":
+    import numpy as np
+
+    from libs.common.history import PriceHistory
+
+    return PriceHistory(
+        np.array(data["dates"], dtype="int64").astype("datetime64[D]"),
+        np.array(data["closes"], dtype=np.float64),
+        data["currency"],
+    )
+
+
+class DaemonConnection:
+    def __init__(self, path: str):
+        """Requests to the daemon listening on a unix socket, one connection per request.
+
+        Args:
+            path: the daemon socket path
+        """
+        self.path = path
+
+    def _exchange(self, method: str, params: Dict) -> Iterator[Dict]:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.path)
+            request = {"method": method, "params": params}
+            sock.sendall(json.dumps(request).encode() + b"\n")
+            with sock.makefile("rb") as f:
+                for line in f:
+                    message = json.loads(line)
+                    if "error" in message:
+                        raise decode_error(message["error"])
+                    yield message
+                    if "result" in message:
+                        return
+        raise DaemonError(f"Connection closed by the daemon during {method}")
+
+    def call(self, method: str, **params) -> Any:
+        """Send a request and return its result.
+
+        Raises:
+            OSError: the daemon is not reachable
+            DaemonError: the daemon failed to serve the request
+            ProviderAPIError, ValueError: the error raised by the daemon
+        """
+        for message in self._exchange(method, params):
+            if "result" in message:
+                return message["result"]
+
+    def stream(self, method: str, **params) -> Iterator[Any]:
+        """Send a request and yield its items as the daemon sends them, see call."""
+        for message in self._exchange(method, params):
+            if "item" in message:
+                yield message["item"]
+
+
+def connect(path: str) -> Optional[DaemonConnection]:
+    """Connect to the daemon listening on a socket.
+
+    Returns:
+        The daemon connection, None if no daemon answers (i.e stale socket file)
+    """
+    if not os.path.exists(path):
+        return None
+    connection = DaemonConnection(path)
+    try:
+        connection.call("ping")
+    except (OSError, DaemonError):
+        return None
+    return connection
+
+
+class RemoteClient(Client):
+    def __init__(self, connection: DaemonConnection):
+        """Provider client forwarding provider calls to the daemon provider client.
+
+        Args:
+            connection: the daemon connection
+        """
+        self.connection = connection
+
+    @property
+    def requests_per_minute(self) -> Optional[float]:
+        return self.connection.call("requests_per_minute")
+
+    def get_quote(self, symbol: str) -> Quote:
+        return decode_quote_result(self.connection.call("get_quote", symbol=symbol))
+
+    def get_history(self, symbol: str, start: date, end: date) -> "PriceHistory":
+        return decode_history(
+            self.connection.call(
+                "get_history",
+                symbol=symbol,
+                start=start.isoformat(),
+                end=end.isoformat(),
+            )
+        )
+
+    def get_fx_rate(self, from_currency: str, to_currency: str) -> float:
+        return self.connection.call(
+            "get_fx_rate",
+            from_currency=getattr(from_currency, "value", from_currency),
+            to_currency=getattr(to_currency, "value", to_currency),
+        )
+
+    def iter_quotes(self, symbols: Iterable[str]) -> Iterator[Tuple[str, QuoteResult]]:
+        for item in self.connection.stream("iter_quotes", symbols=list(symbols)):
+            yield item["symbol"], decode_quote_result(item["quote"])
@@ -0,0 +1,93 @@
+"""Position store proxy of the daemon, see atcmoney_cli.remote for the protocol."""
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from atcmoney_cli.remote import DaemonConnection
+
+from libs.common.aggregates import PortfolioAggregates
+from libs.common.currency import Currency
+from libs.common.position import Position
+from libs.common.records import PnLRecord, PositionRecord
+from libs.common.trade import PnL, Trade
+from libs.store.store import JournalEntry, PositionStore
+
+
+def encode_position(position: Optional[Position]) -> Optional[Dict]:
+    return position.dict() if position is not None else None
+
+
+def decode_position(data: Optional[Dict]) -> Optional[Position]:
+    """Build a position sent by the daemon, it was validated by the daemon store."""
+    if data is None:
+        return None
+    return PositionRecord(
+        data["quantity"], data["cost"], data["symbol"], Currency(data["currency"])
+    ).to_model()
+
+
+def encode_pnl(pnl: Optional[PnL]) -> Optional[Dict]:
+    return pnl.dict() if pnl is not None else None
+
+
+def decode_pnl(data: Optional[Dict]) -> Optional[PnL]:
+    if data is None:
+        return None
+    return PnLRecord(data["absolute_gains"], data["relative_gains"]).to_model()
+
+
+def encode_entry(entry: JournalEntry) -> Dict:
+    return {
+        "sequence": entry.sequence,
+        "timestamp": entry.timestamp,
+        "trade": entry.trade.dict(),
+    }
+
+
+def decode_entry(data: Dict) -> JournalEntry:
+    return JournalEntry(
+        sequence=data["sequence"],
+        timestamp=data["timestamp"],
+        trade=Trade(**data["trade"]),
+    )
+
+
+class RemoteStore(PositionStore):
+    def __init__(self, connection: DaemonConnection):
+        """Position store forwarding every call to the daemon position store.
+
+        The daemon store stays open between calls, closing the proxy is a no-op.
+
+        Args:
+            connection: the daemon connection
+        """
+        self.connection = connection
+
+    def load_positions(self) -> List[Position]:
+        return [
+            decode_position(data) for data in self.connection.stream("load_positions")
+        ]
+
+    def load_position(self, symbol: str) -> Optional[Position]:
+        return decode_position(self.connection.call("load_position", symbol=symbol))
+
+    def load_aggregates(self) -> PortfolioAggregates:
+        return PortfolioAggregates.from_dict(self.connection.call("load_aggregates"))
+
+    def store_positions(self, positions: List[Position]):
+        self.connection.call(
+            "store_positions",
+            positions=[encode_position(position) for position in positions],
+        )
+
+    def record_trade(self, trade: Trade) -> Tuple[Optional[Position], Optional[PnL]]:
+        result = self.connection.call("record_trade", trade=trade.dict())
+        return decode_position(result["position"]), decode_pnl(result["pnl"])
+
+    def record_trades(self, trades: List[Trade]) -> List[Optional[PnL]]:
+        pnls = self.connection.call(
+            "record_trades", trades=[trade.dict() for trade in trades]
+        )
+        return [decode_pnl(pnl) for pnl in pnls]
+
+    def read_journal(self) -> Iterator[JournalEntry]:
+        for data in self.connection.stream("read_journal"):
+            yield decode_entry(data)
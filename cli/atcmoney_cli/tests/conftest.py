@@ -1,9 +1,19 @@
 import os
 from unittest import mock
 
+# modules imported lazily by the cli are loaded before the fake file system is set up
+import atcmoney_cli.position  # noqa
+import atcmoney_cli.quote  # noqa
+import inquirer  # noqa
 import pytest
 from atcmoney_cli.config import ATCMONEY_CONFIG_DIR_KEY
 
+import libs.common.performance  # noqa
+import libs.providers.history  # noqa
+import libs.providers.mock.history  # noqa
+import libs.store.journal  # noqa
+from libs.providers.mock.client import Client
+
 
 @pytest.fixture(autouse=True)
 def mock_load_env():
@@ -15,3 +25,11 @@ def mock_load_env():
 @pytest.fixture(autouse=True)
 def mock_file_system(fs):
     pass
+
+
+@pytest.fixture(autouse=True)
+def reset_mock_provider():
+    Client.set_exception(None)
+    Client.set_quote_value(None)
+    Client.set_history_exception(None)
+    Client.set_fx_exception(None)
@@ -0,0 +1,180 @@
+"""Commands served by a daemon, run on the real file system since it needs a unix socket"""
+import os
+from datetime import date
+from unittest import mock
+
+import pytest
+from atcmoney_cli.config import (
+    ATCMONEY_CONFIG_DIR_KEY,
+    DAEMON_SOCKET_FILE_NAME,
+    get_provider,
+    position_store,
+)
+from atcmoney_cli.daemon import Daemon
+from atcmoney_cli.main import cli
+from atcmoney_cli.remote import DaemonError, RemoteClient, connect
+from atcmoney_cli.remote_store import RemoteStore
+from click.testing import CliRunner
+
+from libs.common.trade import Side, Trade
+from libs.providers.exception import ProviderAPIError, ProviderThrottleError
+from libs.providers.mock.client import Client, seeded_price
+from libs.providers.mock.history import synthetic_history
+from libs.store.journal import JournalStore
+
+SEED = 7
+
+
+@pytest.fixture(autouse=True)
+def mock_file_system():
+    """Override the fake file system, unix sockets need the real one."""
+    pass
+
+
+@pytest.fixture
+def config_dir(tmp_path, monkeypatch):
+    monkeypatch.setitem(os.environ, ATCMONEY_CONFIG_DIR_KEY, str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def daemon(config_dir):
+    server = Daemon(
+        str(config_dir / DAEMON_SOCKET_FILE_NAME),
+        Client(seed=SEED),
+        JournalStore(config_dir),
+    ).start()
+    yield server
+    server.stop()
+    server.close()
+
+
+def test_quote_served_by_daemon(daemon):
+    assert isinstance(get_provider(), RemoteClient)
+    result = CliRunner().invoke(cli, ["quote", "AAPL", "MSFT"])
+    assert result.exit_code == 0
+    assert f"AAPL: {seeded_price(SEED, 'AAPL')} USD" in result.output
+    assert f"MSFT: {seeded_price(SEED, 'MSFT')} USD" in result.output
+    assert daemon.provider.calls == 2
+    assert get_provider().requests_per_minute is None
+
+
+def test_provider_errors_keep_their_type(daemon):
+    Client.set_exception(ProviderThrottleError(message="Fake throttle"))
+    with pytest.raises(ProviderThrottleError) as ex:
+        get_provider().get_quote("AAPL")
+    assert ex.value.message == "Fake throttle"
+
+    Client.set_exception(ProviderAPIError(message="Fake Provider error"))
+    results = get_provider().get_quotes(["AAPL"])
+    assert isinstance(results["AAPL"], ProviderAPIError)
+    assert results["AAPL"].message == "Fake Provider error"
+
+
+def test_fx_rates_served_by_daemon(daemon):
+    rates = get_provider().get_fx_rates(["EUR", "XXX"], "USD")
+    assert rates["EUR"] == pytest.approx(1.08)
+    assert isinstance(rates["XXX"], ProviderAPIError)
+
+
+@mock.patch("inquirer.list_input")
+def test_trade_recorded_in_daemon_store(mock_list_input, daemon):
+    mock_list_input.side_effect = ["Total", "USD"]
+    assert isinstance(position_store(), RemoteStore)
+    result = CliRunner().invoke(
+        cli, ["position", "buy"], input="\n".join(["MSFT", "10", "150"])
+    )
+    assert result.exit_code == 0
+    assert "Position updated to 10.0 units" in result.output
+    assert daemon.store.load_position("MSFT").quantity == 10
+
+    result = CliRunner().invoke(cli, ["position", "details", "-s", "MSFT"])
+    assert result.exit_code == 0
+    assert "symbol: MSFT, quantity: 10.0, cost: 150.0" in result.output
+
+
+def test_remote_store(daemon):
+    store = position_store()
+    store.record_trade(
+        Trade(symbol="MSFT", side=Side.BUY, currency="USD", quantity=10, unit_price=15)
+    )
+    position, pnl = store.record_trade(
+        Trade(symbol="MSFT", side=Side.SELL, currency="USD", quantity=-4, unit_price=20)
+    )
+    assert (position.quantity, position.cost) == (6, 90)
+    assert pnl.absolute_gains == 20
+    assert store.load_positions() == [position]
+    assert [entry.sequence for entry in store.read_journal()] == [1, 2]
+    assert store.load_position("GOOGL") is None
+    assert store.load_aggregates() == daemon.store.load_aggregates()
+    assert store.load_aggregates().currencies["USD"].realized == 20
+
+    store.store_positions([])
+    assert store.load_positions() == []
+
+
+def test_remote_store_record_trades(daemon):
+    pnls = position_store().record_trades(
+        [
+            Trade(
+                symbol="MSFT", side=Side.BUY, currency="USD", quantity=10, unit_price=15
+            ),
+            Trade(
+                symbol="MSFT",
+                side=Side.SELL,
+                currency="USD",
+                quantity=-10,
+                unit_price=20,
+            ),
+        ]
+    )
+    assert pnls[0] is None
+    assert pnls[1].absolute_gains == 50
+    assert daemon.store.load_positions() == []
+    assert daemon.store.load_aggregates().currencies["USD"].realized == 50
+
+
+def test_invalid_trade_rejected_by_daemon(daemon):
+    with pytest.raises(ValueError):
+        connect(daemon.path).call("record_trade", trade={"symbol": "MSFT"})
+
+
+def test_unknown_method(daemon):
+    with pytest.raises(DaemonError):
+        connect(daemon.path).call("unknown")
+
+
+def test_single_daemon_per_socket(daemon):
+    with pytest.raises(DaemonError):
+        Daemon(daemon.path, Client(), JournalStore(os.path.dirname(daemon.path)))
+
+
+def test_stop_daemon(daemon):
+    result = CliRunner().invoke(cli, ["daemon", "--stop"])
+    assert result.exit_code == 0
+    assert "Daemon stopped" in result.output
+    daemon._thread.join(timeout=5)
+    assert not daemon._thread.is_alive()
+
+
+def test_fallback_without_daemon(config_dir):
+    assert not isinstance(get_provider(), RemoteClient)
+    assert not isinstance(position_store(), RemoteStore)
+    result = CliRunner().invoke(cli, ["daemon", "--stop"])
+    assert "No daemon is running" in result.output
+
+
+def test_fallback_on_stale_socket(config_dir):
+    (config_dir / DAEMON_SOCKET_FILE_NAME).touch()
+    assert not isinstance(get_provider(), RemoteClient)
+    result = CliRunner().invoke(cli, ["quote", "AAPL"])
+    assert result.exit_code == 0
+    assert "AAPL: " in result.output
+
+
+def test_history_served_by_daemon(daemon):
+    history = get_provider().get_history("AAPL", date(2024, 1, 1), date(2024, 1, 31))
+    expected = synthetic_history(SEED, "AAPL", "2024-01-01", "2024-01-31", "USD")
+    assert history.dates.tolist() == expected.dates.tolist()
+    assert history.closes.tolist() == expected.closes.tolist()
+    assert daemon.provider.calls == 1
@@ -1,11 +1,15 @@
 """Very basic tests for position command mainly asserting that the commands all return status_code=0
 """
+from datetime import date
 from unittest import mock
 
+from atcmoney_cli.config import position_store, position_store_file
 from atcmoney_cli.logging import logger
 from atcmoney_cli.main import cli
 from click.testing import CliRunner
 
+from libs.common.currency import Currency
+from libs.common.position import Position
 from libs.providers.exception import ProviderAPIError
 from libs.providers.mock.client import Client
 
@@ -79,3 +83,290 @@ def test_position_provider_api_error(mock_list_input):
     Client.set_exception(ProviderAPIError(message="Fake Provider error"))
     result = runner.invoke(cli, ["position", "details", "-s", "GOOGL"])
     assert result.exit_code == 0
+
+
+@mock.patch("inquirer.list_input")
+def test_position_buy_then_liquidate(mock_list_input):
+    mock_list_input.side_effect = ["Total", "USD", "Unit", "USD"]
+    runner = CliRunner()
+    result = runner.invoke(cli, ["position", "buy"], input="MSFT\n10\n150\n")
+    assert "Position updated to 10.0 units" in result.output
+
+    result = runner.invoke(cli, ["position", "sell"], input="MSFT\n10\n20\n")
+    assert result.exit_code == 0
+    assert "absolute gains: 50.0 " in result.output
+    assert "Position was liquidated" in result.output
+
+    result = runner.invoke(cli, ["position"])
+    assert "MSFT" not in result.output
+
+
+def test_position_value_no_positions():
+    runner = CliRunner()
+    result = runner.invoke(cli, ["position", "value"])
+    assert result.exit_code == 0
+    assert "No positions found" in result.output
+
+
+@mock.patch("inquirer.list_input")
+def test_position_value(mock_list_input):
+    mock_list_input.side_effect = ["Unit", "USD", "Unit", "USD"]
+    runner = CliRunner()
+    runner.invoke(cli, ["position", "buy"], input="MSFT\n10\n150\n")
+    runner.invoke(cli, ["position", "buy"], input="GOOGL\n2\n100\n")
+
+    Client.set_quote_value(200.0)
+    result = runner.invoke(cli, ["position", "value"])
+    assert result.exit_code == 0
+    assert "symbol: MSFT" in result.output
+    assert "symbol: GOOGL" in result.output
+    assert "total: USD, cost: 1700.0 USD" in result.output
+
+
+@mock.patch("inquirer.list_input")
+def test_position_value_provider_api_error(mock_list_input):
+    mock_list_input.side_effect = ["Unit", "USD"]
+    runner = CliRunner()
+    runner.invoke(cli, ["position", "buy"], input="MSFT\n10\n150\n")
+
+    Client.set_exception(ProviderAPIError(message="Fake Provider error"))
+    result = runner.invoke(cli, ["position", "value"])
+    assert result.exit_code == 0
+    assert "1 position(s) could not be priced" in result.output
+    assert "market value: 0.0 USD" in result.output
+
+
+def test_position_history_no_trades():
+    runner = CliRunner()
+    result = runner.invoke(cli, ["position", "history"])
+    assert result.exit_code == 0
+    assert "No trade history found" in result.output
+
+
+@mock.patch("inquirer.list_input")
+def test_position_history(mock_list_input):
+    mock_list_input.side_effect = ["Unit", "USD", "Unit", "USD"]
+    runner = CliRunner()
+    runner.invoke(cli, ["position", "buy"], input="MSFT\n10\n150\n")
+    runner.invoke(cli, ["position", "sell"], input="MSFT\n4\n200\n")
+
+    result = runner.invoke(
+        cli, ["position", "history", "--start", "2024-01-01", "--end", "2024-01-05"]
+    )
+    assert result.exit_code == 0
+    # the trades are recorded today, there is no position in the requested range
+    assert result.output.count("market value: 0.0 USD") == 5
+
+    with mock.patch("atcmoney_cli.position.date") as mock_date:
+        mock_date.today.return_value = date(2100, 1, 4)
+        result = runner.invoke(cli, ["position", "history", "-s", "MSFT"])
+    assert result.exit_code == 0
+    last = result.output.strip().splitlines()[-1]
+    assert "date: 2100-01-04" in last
+    assert "realized gains: 200.0 USD" in last
+
+
+@mock.patch("inquirer.list_input")
+def test_position_details_converts_quote_currency(mock_list_input):
+    mock_list_input.side_effect = ["Unit", "EUR"]
+    runner = CliRunner()
+    runner.invoke(cli, ["position", "buy"], input="SAP\n10\n100\n")
+
+    # the mock quotes are in USD, 216 USD is 200 EUR
+    Client.set_quote_value(216.0)
+    result = runner.invoke(cli, ["position", "details", "-s", "SAP"])
+    assert result.exit_code == 0
+    assert "absolute gains: 1000.0" in result.output
+    assert "relative gain: 100.0%" in result.output
+
+
+@mock.patch("inquirer.list_input")
+def test_position_value_reporting_currency(mock_list_input):
+    mock_list_input.side_effect = ["Unit", "EUR", "Unit", "USD"]
+    runner = CliRunner()
+    runner.invoke(cli, ["position", "buy"], input="SAP\n10\n100\n")
+    runner.invoke(cli, ["position", "buy"], input="MSFT\n1\n100\n")
+
+    with mock.patch.object(Client, "price", return_value=108.0):
+        result = runner.invoke(cli, ["position", "value", "--currency", "USD"])
+    assert result.exit_code == 0
+    assert "could not be priced" not in result.output
+    assert "total: EUR, cost: 1000.0 EUR, market value: 1000.0 EUR" in result.output
+    assert "total: USD, cost: 100.0 USD, market value: 108.0 USD" in result.output
+    assert (
+        "total: all positions in USD, cost: 1180.0 USD, market value: 1188.0 USD"
+        in result.output
+    )
+
+
+def test_position_summary_no_positions():
+    runner = CliRunner()
+    result = runner.invoke(cli, ["position", "summary"])
+    assert result.exit_code == 0
+    assert "No positions found" in result.output
+
+
+@mock.patch("inquirer.list_input")
+def test_position_summary(mock_list_input):
+    mock_list_input.side_effect = ["Unit", "USD", "Unit", "USD", "Unit", "EUR"]
+    runner = CliRunner()
+    runner.invoke(cli, ["position", "buy"], input="MSFT\n10\n150\n")
+    runner.invoke(cli, ["position", "sell"], input="MSFT\n4\n200\n")
+    runner.invoke(cli, ["position", "sell"], input="SAP\n2\n100\n")
+
+    result = runner.invoke(cli, ["position", "summary"])
+    assert result.exit_code == 0
+    assert "positions: 2" in result.output
+    assert (
+        "total: EUR, positions: 1, long cost: 0.0 EUR, short cost: 200.0 EUR,"
+        " gross exposure: 200.0 EUR, net exposure: -200.0 EUR" in result.output
+    )
+    assert (
+        "total: USD, positions: 1, long cost: 900.0 USD, short cost: 0.0 USD,"
+        " gross exposure: 900.0 USD, net exposure: 900.0 USD,"
+        " realized gains: 200.0 USD" in result.output
+    )
+
+
+def test_position_import_csv():
+    with open("trades.csv", "w") as f:
+        f.write("symbol,side,quantity,unit_price,currency\n")
+        f.write("MSFT,BUY,10,150,USD\n")
+        f.write("MSFT,SELL,4,200,USD\n")
+        f.write("GOOGL,buy,0,100,USD\n")
+        f.write("SAP,SELL,2,100,EUR\n")
+    runner = CliRunner()
+    result = runner.invoke(
+        cli, ["position", "import", "trades.csv", "--chunk-size", "2"]
+    )
+    assert result.exit_code == 0
+    assert "line 4: invalid trade, quantity must be greater than zero" in result.output
+    assert "line: 3, symbol: MSFT, absolute gains: 200.0 USD" in result.output
+    assert "Imported 3 trade(s), skipped 1" in result.output
+    assert "total: USD, realized gains: 200.0 USD" in result.output
+
+    result = runner.invoke(cli, ["position", "summary"])
+    assert "positions: 2" in result.output
+
+
+def test_position_import_json_lines_from_stdin():
+    trades = [
+        '{"symbol": "MSFT", "side": "BUY", "quantity": 10, "unit_price": 15, "currency": "USD"}',
+        "not json",
+        '{"symbol": "MSFT", "side": "SELL", "quantity": 10, "unit_price": 20, "currency": "USD"}',
+        '{"symbol": "MSFT", "side": "BUY", "quantity": 1, "unit_price": 0, "currency": "USD"}',
+    ]
+    runner = CliRunner()
+    result = runner.invoke(
+        cli, ["position", "import", "-", "--summary"], input="\n".join(trades)
+    )
+    assert result.exit_code == 0
+    assert "line 2: invalid trade, unreadable row" in result.output
+    assert (
+        "line 4: invalid trade, unit_price must be greater than zero" in result.output
+    )
+    assert "line: 3" not in result.output
+    assert "Imported 2 trade(s), skipped 2" in result.output
+    assert "total: USD, realized gains: 50.0 USD" in result.output
+
+
+def test_position_import_unknown_symbol():
+    Client.set_exception(ProviderAPIError(message="Fake Provider error"))
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        ["position", "import", "-"],
+        input="symbol,side,quantity,unit_price,currency\nXYZ,BUY,1,10,USD\n",
+    )
+    assert result.exit_code == 0
+    assert "Market Provider failed to find quote for XYZ" in result.output
+    assert "Imported 0 trade(s), skipped 1" in result.output
+    assert "No positions found" in runner.invoke(cli, ["position", "value"]).output
+
+
+def test_position_rebuild_no_trades():
+    runner = CliRunner()
+    result = runner.invoke(cli, ["position", "rebuild"])
+    assert result.exit_code == 0
+    assert "No trade history found" in result.output
+
+
+def test_position_rebuild():
+    runner = CliRunner()
+    runner.invoke(
+        cli,
+        ["position", "import", "-"],
+        input="symbol,side,quantity,unit_price,currency\n"
+        "MSFT,BUY,10,150,USD\nMSFT,SELL,4,200,USD\nSAP,SELL,2,100,EUR\n",
+    )
+    store = position_store()
+    store.store_positions(
+        [
+            Position(symbol="MSFT", quantity=1, cost=1, currency=Currency.USD),
+            Position(symbol="AAPL", quantity=1, cost=10, currency=Currency.USD),
+        ]
+    )
+    store.close()
+
+    result = runner.invoke(cli, ["position", "rebuild"])
+    assert result.exit_code == 0
+    assert "2 position(s) differ from the trade history: MSFT, SAP" in result.output
+    assert "Positions left unchanged" in result.output
+    result = runner.invoke(cli, ["position"])
+    assert "symbol: MSFT, quantity: 1.0, cost: 1.0" in result.output
+    assert "symbol: SAP" not in result.output
+
+    result = runner.invoke(cli, ["position", "rebuild", "-w", "2", "--force"])
+    assert result.exit_code == 0
+    assert "Rebuilt 2 position(s) from 3 trade(s), 2 differed" in result.output
+    assert "total: USD, realized gains: 200.0 USD" in result.output
+
+    result = runner.invoke(cli, ["position"])
+    assert "symbol: MSFT, quantity: 6.0, cost: 900.0" in result.output
+    assert "symbol: SAP" in result.output
+    assert "symbol: AAPL" in result.output
+
+
+def test_position_rebuild_keeps_legacy_positions():
+    store = position_store()
+    store.store_positions(
+        [Position(symbol="GOOGL", quantity=10, cost=1000, currency=Currency.USD)]
+    )
+    store.close()
+    runner = CliRunner()
+    runner.invoke(
+        cli,
+        ["position", "import", "-"],
+        input="symbol,side,quantity,unit_price,currency\nGOOGL,BUY,5,120,USD\n",
+    )
+
+    result = runner.invoke(cli, ["position", "rebuild"])
+    assert result.exit_code == 0
+    assert "1 position(s) differ from the trade history: GOOGL" in result.output
+    result = runner.invoke(cli, ["position"])
+    assert "symbol: GOOGL, quantity: 15.0, cost: 1600.0" in result.output
+
+
+def test_position_history_reports_positions_without_trades():
+    store = position_store()
+    store.store_positions(
+        [Position(symbol="AAPL", quantity=1, cost=10, currency=Currency.USD)]
+    )
+    store.close()
+
+    result = CliRunner().invoke(cli, ["position", "history"])
+    assert result.exit_code == 0
+    assert (
+        "1 position(s) not explained by the trade history are left out: AAPL"
+        in result.output
+    )
+    assert "No trade history found" in result.output
+
+
+def test_position_history_unreadable_store():
+    with open(position_store_file(), "w") as f:
+        f.write("not json")
+
+    result = CliRunner().invoke(cli, ["position", "history"])
+    assert result.exit_code == 0
+    assert "No trade history found" not in result.output
@@ -3,6 +3,7 @@
 from atcmoney_cli.main import cli
 from click.testing import CliRunner
 
+from libs.common.quote import Quote
 from libs.providers.exception import ProviderAPIError
 from libs.providers.mock.client import Client
 
@@ -30,3 +31,40 @@ def test_quote_provider_api_error():
     runner = CliRunner()
     result = runner.invoke(cli, ["quote", "MSFT", "GOOGL"])
     assert result.exit_code == 0
+
+
+def test_quote_many_symbols():
+    symbols = [f"SYM{i}" for i in range(20)]
+    runner = CliRunner()
+    result = runner.invoke(cli, ["quote", *symbols])
+    assert result.exit_code == 0
+    for symbol in symbols:
+        assert f"{symbol}: " in result.output
+
+
+def test_quote_cached(monkeypatch):
+    monkeypatch.setenv("ATCMONEY_QUOTE_CACHE_TTL", "60")
+    monkeypatch.setenv("ATCMONEY_QUOTE_CACHE_DISK", "true")
+    runner = CliRunner()
+    first = runner.invoke(cli, ["quote", "MSFT"])
+    second = runner.invoke(cli, ["quote", "MSFT"])
+    assert first.exit_code == 0
+    assert second.exit_code == 0
+    assert first.output == second.output
+
+
+def test_quote_watch(monkeypatch, caplog):
+    def stream_quotes(client, symbols, min_interval):
+        assert min_interval == 5
+        yield "MSFT", Quote(10.0, "USD")
+        yield "MSFT", ProviderAPIError(message="Fake Provider error")
+        yield "MSFT", Quote(11.0, "USD")
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr("atcmoney_cli.quote.stream_quotes", stream_quotes)
+    runner = CliRunner()
+    result = runner.invoke(cli, ["quote", "--watch", "--min-interval", "5", "MSFT"])
+    assert result.exit_code == 0
+    assert "MSFT: 10.0 USD\n" in result.output
+    assert "Fake Provider error" in caplog.text
+    assert "MSFT: 11.0 USD\n" in result.output
@@ -0,0 +1,64 @@
+"""Startup budget of the cli, run in fresh interpreters so imports are not shared"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+# generous enough for slow CI machines, the eager imports used to take ~750ms
+IMPORT_BUDGET = 0.5
+HEAVY_MODULES = ["aiohttp", "dotenv", "inquirer", "numpy", "pydantic", "requests"]
+
+
+@pytest.fixture(autouse=True)
+def mock_file_system():
+    """Override the fake file system, the subprocesses run on the real one."""
+    pass
+
+
+def run_python(code: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "ATCMONEY_PROVIDER": "MOCK"},
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_import_budget():
+    result = run_python(
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        "import atcmoney_cli.main\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(json.dumps({{'elapsed': elapsed, 'loaded': [m for m in {HEAVY_MODULES} "
+        "if m in sys.modules]}))"
+    )
+    assert result["loaded"] == []
+    assert result["elapsed"] < IMPORT_BUDGET
+
+
+def test_help_does_not_load_env_or_providers(tmp_path):
+    result = run_python(
+        "import json, sys\n"
+        "from atcmoney_cli.main import cli\n"
+        f"cli(['-c', {str(tmp_path)!r}, 'position', '--help'], standalone_mode=False)\n"
+        "print(json.dumps([m for m in ['dotenv', 'libs.providers.mock', 'libs.store.journal']"
+        " if m in sys.modules]))"
+    )
+    assert result == []
+    assert not os.path.exists(tmp_path / ".env")
+
+
+def test_quote_only_loads_selected_provider(tmp_path):
+    result = run_python(
+        "import json, sys\n"
+        "from atcmoney_cli.main import cli\n"
+        f"cli(['-c', {str(tmp_path)!r}, 'quote', 'AAPL'], standalone_mode=False)\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES + ['libs.providers.vantage']} "
+        "if m in sys.modules]))"
+    )
+    assert result == ["dotenv"]
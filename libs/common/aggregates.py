@@ -0,0 +1,136 @@
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, Optional, Union
+
+from libs.common.position import Position
+from libs.common.records import PnLRecord, PositionRecord
+from libs.common.trade import PnL
+
+AnyPosition = Union[Position, PositionRecord]
+AnyPnL = Union[PnL, PnLRecord]
+
+
+@dataclass
+class CurrencyAggregates:
+    """Running totals of the positions and trades of a currency.
+
+    Args:
+        positions: number of open positions
+        long_cost: total cost of the long positions
+        short_cost: total (absolute) cost of the short positions
+        realized: cumulative realized gains of the trades
+    """
+
+    positions: int = 0
+    long_cost: float = 0.0
+    short_cost: float = 0.0
+    realized: float = 0.0
+
+    @property
+    def gross_exposure(self) -> float:
+        """Long plus short exposure, at cost."""
+        return self.long_cost + self.short_cost
+
+    @property
+    def net_exposure(self) -> float:
+        """Long minus short exposure, at cost."""
+        return self.long_cost - self.short_cost
+
+    def _add(self, position: AnyPosition, sign: int):
+        self.positions += sign
+        if position.quantity >= 0:
+            self.long_cost += sign * position.cost
+        else:
+            self.short_cost += sign * abs(position.cost)
+
+
+class PortfolioAggregates:
+    """Portfolio totals per currency, updated in O(1) on every trade.
+
+    Stores keep the aggregates next to the positions and apply every recorded trade to
+    both, so that summary queries do not aggregate every position.
+
+    Args:
+        currencies: currency -> running totals
+    """
+
+    def __init__(self, currencies: Optional[Dict[str, CurrencyAggregates]] = None):
+        self.currencies: Dict[str, CurrencyAggregates] = dict(currencies or {})
+
+    @classmethod
+    def from_positions(
+        cls, positions: Iterable[AnyPosition], realized: Optional[Dict] = None
+    ) -> "PortfolioAggregates":
+        """Build the aggregates of positions.
+
+        Args:
+            positions: the open positions
+            realized: currency -> cumulative realized gains, none by default
+        """
+        aggregates = cls()
+        for position in positions:
+            aggregates._currency(position.currency)._add(position, 1)
+        for currency, gains in (realized or {}).items():
+            aggregates._currency(currency).realized += gains
+        return aggregates
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Dict]) -> "PortfolioAggregates":
+        return cls(
+            {
+                currency: CurrencyAggregates(**values)
+                for currency, values in data.items()
+            }
+        )
+
+    def to_dict(self) -> Dict[str, Dict]:
+        return {
+            currency: asdict(values) for currency, values in self.currencies.items()
+        }
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, PortfolioAggregates)
+            and self.currencies == other.currencies
+        )
+
+    def __repr__(self) -> str:
+        return f"PortfolioAggregates({self.currencies!r})"
+
+    @property
+    def positions(self) -> int:
+        return sum(values.positions for values in self.currencies.values())
+
+    @property
+    def realized(self) -> Dict[str, float]:
+        return {
+            currency: values.realized for currency, values in self.currencies.items()
+        }
+
+    def _currency(self, currency: str) -> CurrencyAggregates:
+        code = getattr(currency, "value", currency)
+        values = self.currencies.get(code)
+        if values is None:
+            values = self.currencies[code] = CurrencyAggregates()
+        return values
+
+    def update(
+        self,
+        before: Optional[AnyPosition],
+        after: Optional[AnyPosition],
+        pnl: Optional[AnyPnL] = None,
+        currency: Optional[str] = None,
+    ):
+        """Apply the outcome of a trade (see add_trade_to_position).
+
+        Args:
+            before: the position before the trade, None if there was none
+            after: the position after the trade, None if it was liquidated
+            pnl: the realized PnL of the trade, if any
+            currency: the currency of the realized PnL, the one of `before` by default
+        """
+        if before is not None:
+            self._currency(before.currency)._add(before, -1)
+        if after is not None:
+            self._currency(after.currency)._add(after, 1)
+        if pnl is not None:
+            self._currency(currency or before.currency).realized += pnl.absolute_gains
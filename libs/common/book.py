@@ -0,0 +1,266 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from libs.common.currency import Currency
+from libs.common.position import Position
+
+if TYPE_CHECKING:
+    from libs.common.fx import RateMatrix
+
+INITIAL_CAPACITY = 16
+
+
+@dataclass
+class BookTotals:
+    """Aggregated valuation of positions sharing a currency.
+
+    Args:
+        cost: total cost of the positions
+        market_value: total market value of the positions
+        absolute_gains: total unrealized gains
+        relative_gains: total unrealized gains relative to the total (absolute) cost
+    """
+
+    cost: float
+    market_value: float
+    absolute_gains: float
+    relative_gains: float
+
+
+class PortfolioBook:
+    """Columnar book of positions.
+
+    Positions are stored as parallel arrays (symbol, quantity, cost, currency) with a
+    symbol -> row index so that the whole book can be valued with a few array operations.
+    Rows are kept contiguous: removing a position moves the last row in its place.
+
+    Args:
+        positions: initial positions of the book
+    """
+
+    def __init__(self, positions: Iterable[Position] = ()):
+        self.index: Dict[str, int] = {}
+        self._size = 0
+        self._symbols = np.empty(INITIAL_CAPACITY, dtype=object)
+        self._quantities = np.empty(INITIAL_CAPACITY, dtype=np.float64)
+        self._costs = np.empty(INITIAL_CAPACITY, dtype=np.float64)
+        self._currencies = np.empty(INITIAL_CAPACITY, dtype=object)
+        for position in positions:
+            self.set(
+                position.symbol, position.quantity, position.cost, position.currency
+            )
+
+    @classmethod
+    def from_arrays(
+        cls,
+        symbols: Iterable[str],
+        quantities: Iterable[float],
+        costs: Iterable[float],
+        currencies: Iterable[str],
+    ) -> "PortfolioBook":
+        """Build a book from parallel arrays without going through Position models.
+
+        Raises:
+            ValueError: the arrays have different lengths or a symbol is duplicated
+        """
+        book = cls()
+        symbols = np.asarray(list(symbols), dtype=object)
+        quantities = np.asarray(quantities, dtype=np.float64)
+        costs = np.asarray(costs, dtype=np.float64)
+        currencies = np.asarray(
+            [getattr(c, "value", c) for c in currencies], dtype=object
+        )
+        for code in set(currencies):
+            Currency(code)
+        if not len(symbols) == len(quantities) == len(costs) == len(currencies):
+            raise ValueError("Book arrays must have the same length")
+        book.index = dict(zip(symbols, range(len(symbols))))
+        if len(book.index) != len(symbols):
+            raise ValueError("Book symbols must be unique")
+        book._size = len(symbols)
+        book._symbols = symbols
+        book._quantities = quantities
+        book._costs = costs
+        book._currencies = currencies
+        return book
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.index
+
+    @property
+    def symbols(self) -> np.ndarray:
+        return self._symbols[: self._size]
+
+    @property
+    def quantities(self) -> np.ndarray:
+        return self._quantities[: self._size]
+
+    @property
+    def costs(self) -> np.ndarray:
+        return self._costs[: self._size]
+
+    @property
+    def currencies(self) -> np.ndarray:
+        return self._currencies[: self._size]
+
+    def _grow(self):
+        capacity = max(INITIAL_CAPACITY, 2 * len(self._quantities))
+        for name in ("_symbols", "_quantities", "_costs", "_currencies"):
+            array = getattr(self, name)
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[: self._size] = array[: self._size]
+            setattr(self, name, grown)
+
+    def set(self, symbol: str, quantity: float, cost: float, currency: str):
+        """Create or overwrite the position for a symbol."""
+        row = self.index.get(symbol)
+        if row is None:
+            if self._size == len(self._quantities):
+                self._grow()
+            row = self._size
+            self._size += 1
+            self.index[symbol] = row
+            self._symbols[row] = symbol
+        self._quantities[row] = quantity
+        self._costs[row] = cost
+        self._currencies[row] = Currency(currency).value
+
+    def remove(self, symbol: str):
+        """Remove the position for a symbol.
+
+        Raises:
+            KeyError: there is no position for the symbol
+        """
+        row = self.index.pop(symbol)
+        last = self._size - 1
+        if row != last:
+            for array in (
+                self._symbols,
+                self._quantities,
+                self._costs,
+                self._currencies,
+            ):
+                array[row] = array[last]
+            self.index[self._symbols[row]] = row
+        self._symbols[last] = None
+        self._size = last
+
+    def position(self, symbol: str) -> Optional[Position]:
+        row = self.index.get(symbol)
+        if row is None:
+            return None
+        # the row was validated when it was set
+        return Position.construct(
+            symbol=symbol,
+            quantity=float(self._quantities[row]),
+            cost=float(self._costs[row]),
+            currency=Currency(self._currencies[row]),
+        )
+
+    def to_positions(self) -> List[Position]:
+        return [self.position(symbol) for symbol in self.symbols]
+
+    def prices(self, prices: Mapping[str, float]) -> np.ndarray:
+        """Align a symbol -> price mapping on the book rows, missing prices are NaN."""
+        return np.fromiter(
+            (prices.get(symbol, np.nan) for symbol in self.symbols),
+            dtype=np.float64,
+            count=self._size,
+        )
+
+    def market_values(self, prices: np.ndarray) -> np.ndarray:
+        return prices * self.quantities
+
+    def calculate_pnl(self, prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized Position.calculate_pnl of a full liquidation of every position.
+
+        Args:
+            prices: unit price per book row
+
+        Returns:
+            A tuple (absolute_gains, relative_gains) of arrays aligned on the book rows
+        """
+        quantities = np.abs(self.quantities)
+        signs = np.sign(self.quantities)
+        absolute_gains = quantities * (prices - (self.costs / quantities)) * signs
+        relative_gains = absolute_gains * quantities / (self.costs * quantities)
+        return absolute_gains, relative_gains
+
+    def _totals_arrays(
+        self, prices: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Per row cost, market value, gains and gains basis, unpriced rows only count cost."""
+        priced = ~np.isnan(prices)
+        absolute_gains, _ = self.calculate_pnl(prices)
+        market_values = np.where(priced, self.market_values(prices), 0.0)
+        gains = np.where(priced, absolute_gains, 0.0)
+        priced_costs = np.where(priced, np.abs(self.costs), 0.0)
+        return self.costs, market_values, gains, priced_costs
+
+    def totals(self, prices: np.ndarray) -> Dict[str, BookTotals]:
+        """Total cost, market value and unrealized gains per currency.
+
+        Rows without a price (NaN) are left out of the market value and gains but not of
+        the cost.
+
+        Args:
+            prices: unit price per book row
+
+        Returns:
+            A dictionary currency -> totals
+        """
+        codes, inverse = np.unique(self.currencies.astype(str), return_inverse=True)
+        costs, market_values, gains, priced_costs = self._totals_arrays(prices)
+
+        size = len(codes)
+        costs = np.bincount(inverse, weights=costs, minlength=size)
+        values = np.bincount(inverse, weights=market_values, minlength=size)
+        total_gains = np.bincount(inverse, weights=gains, minlength=size)
+        gains_basis = np.bincount(inverse, weights=priced_costs, minlength=size)
+        return {
+            code: BookTotals(
+                cost=float(costs[i]),
+                market_value=float(values[i]),
+                absolute_gains=float(total_gains[i]),
+                relative_gains=float(total_gains[i] / gains_basis[i])
+                if gains_basis[i]
+                else 0.0,
+            )
+            for i, code in enumerate(codes)
+        }
+
+    def converted_totals(
+        self, prices: np.ndarray, rates: "RateMatrix", currency: str
+    ) -> BookTotals:
+        """Total cost, market value and unrealized gains of the book in one currency.
+
+        Every row is converted with one vectorized lookup in the rate matrix, rows priced
+        in a currency missing from the matrix are left out of every total.
+
+        Args:
+            prices: unit price per book row, in the row currency
+            rates: the exchange rates of the book currencies
+            currency: the reporting currency
+
+        Returns:
+            The totals in the reporting currency
+        """
+        columns = self._totals_arrays(prices)
+        converted = [
+            rates.convert(values, self.currencies, currency) for values in columns
+        ]
+        convertible = ~np.isnan(converted[0])
+        cost, market_value, gains, gains_basis = (
+            float(values[convertible].sum()) for values in converted
+        )
+        return BookTotals(
+            cost=cost,
+            market_value=market_value,
+            absolute_gains=gains,
+            relative_gains=gains / gains_basis if gains_basis else 0.0,
+        )
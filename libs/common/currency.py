@@ -3,3 +3,9 @@ from enum import Enum
 
 class Currency(str, Enum):
     USD = "USD"
+    EUR = "EUR"
+    GBP = "GBP"
+    JPY = "JPY"
+    CHF = "CHF"
+    CAD = "CAD"
+    AUD = "AUD"
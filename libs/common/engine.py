@@ -0,0 +1,325 @@
+import copy
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from libs.common.book import PortfolioBook
+from libs.common.currency import Currency
+from libs.common.position import Position
+from libs.common.records import trade_arithmetic
+from libs.common.trade import Side, Trade
+
+# trades below which sharding a batch across processes costs more than it saves
+MIN_SHARD_TRADES = 50000
+
+
+@dataclass
+class TradeBatch:
+    """Columnar batch of trades.
+
+    Args:
+        symbols: trade symbols
+        sides: trade sides, True for a buy and False for a sell
+        currencies: trade currencies
+        quantities: trade quantities, negative for sells
+        unit_prices: trade unit prices
+    """
+
+    symbols: np.ndarray
+    sides: np.ndarray
+    currencies: np.ndarray
+    quantities: np.ndarray
+    unit_prices: np.ndarray
+
+    def __post_init__(self):
+        self.symbols = np.asarray(self.symbols, dtype=object)
+        self.sides = np.asarray(self.sides, dtype=bool)
+        self.currencies = np.asarray(
+            [Currency(c).value for c in self.currencies], dtype=object
+        )
+        self.quantities = np.asarray(self.quantities, dtype=np.float64)
+        self.unit_prices = np.asarray(self.unit_prices, dtype=np.float64)
+        if not (
+            len(self.symbols)
+            == len(self.sides)
+            == len(self.currencies)
+            == len(self.quantities)
+            == len(self.unit_prices)
+        ):
+            raise ValueError("Trade batch arrays must have the same length")
+        if np.any(self.unit_prices < 0):
+            raise ValueError("Trade unit prices must be greater than or equal to zero")
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @classmethod
+    def from_trades(cls, trades: Iterable[Trade]) -> "TradeBatch":
+        trades = list(trades)
+        return cls(
+            symbols=[trade.symbol for trade in trades],
+            sides=[trade.side == Side.BUY for trade in trades],
+            currencies=[trade.currency for trade in trades],
+            quantities=[trade.quantity for trade in trades],
+            unit_prices=[trade.unit_price for trade in trades],
+        )
+
+    def take(self, indices: np.ndarray) -> "TradeBatch":
+        """Return the batch of the trades at indices, without validating it again."""
+        batch = copy.copy(self)
+        for field in fields(self):
+            setattr(batch, field.name, getattr(self, field.name)[indices])
+        return batch
+
+
+@dataclass
+class BatchResult:
+    """Outcome of a batch of trades.
+
+    Args:
+        book: the final positions
+        realized: per trade flag, True when the trade realized a PnL
+        absolute_gains: per trade realized absolute gains, NaN when nothing was realized
+        relative_gains: per trade realized relative gains, NaN when nothing was realized
+        quantities: per trade quantity of the symbol position after the trade, 0 when the
+            trade liquidated it
+        costs: per trade cost of the symbol position after the trade, 0 when the trade
+            liquidated it
+    """
+
+    book: PortfolioBook
+    realized: np.ndarray
+    absolute_gains: np.ndarray
+    relative_gains: np.ndarray
+    quantities: np.ndarray
+    costs: np.ndarray
+
+
+def group_by_symbol(symbols: np.ndarray) -> List[np.ndarray]:
+    """Group trade indices by symbol keeping the trades order within a symbol.
+
+    Args:
+        symbols: trade symbols
+
+    Returns:
+        A list of index arrays, one per symbol
+    """
+    if len(symbols) == 0:
+        return []
+    _, codes = np.unique(symbols.astype(str), return_inverse=True)
+    order = np.argsort(codes, kind="stable")
+    boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+    return np.split(order, boundaries)
+
+
+def apply_trades(
+    trades: Union[TradeBatch, Iterable[Trade]],
+    positions: Union[PortfolioBook, Iterable[Position], None] = None,
+) -> BatchResult:
+    """Apply a batch of trades to positions.
+
+    Trades are grouped by symbol and applied in order with trade_arithmetic, the arithmetic
+    of `add_trade_to_position` (increase, partial reduction, liquidation and side flip), on
+    plain floats instead of pydantic models or records.
+
+    Args:
+        trades: the trades to apply, in order
+        positions: optional pre-existing positions
+
+    Returns:
+        The final positions and per trade realized PnL
+    """
+    if not isinstance(trades, TradeBatch):
+        trades = TradeBatch.from_trades(trades)
+    if not isinstance(positions, PortfolioBook):
+        positions = PortfolioBook(positions or ())
+
+    symbols = trades.symbols
+    sides = trades.sides.tolist()
+    currencies = trades.currencies.tolist()
+    quantities = trades.quantities.tolist()
+    unit_prices = trades.unit_prices.tolist()
+    realized = [False] * len(trades)
+    absolute_gains = [np.nan] * len(trades)
+    relative_gains = [np.nan] * len(trades)
+    position_quantities = [0.0] * len(trades)
+    position_costs = [0.0] * len(trades)
+
+    book = PortfolioBook.from_arrays(
+        positions.symbols, positions.quantities, positions.costs, positions.currencies
+    )
+    for indices in group_by_symbol(symbols):
+        symbol = symbols[indices[0]]
+        row = book.index.get(symbol)
+        quantity: Optional[float] = None
+        cost = 0.0
+        if row is not None:
+            quantity = float(book.quantities[row])
+            cost = float(book.costs[row])
+            currency = book.currencies[row]
+
+        for i in indices.tolist():
+            quantity, cost, gains, opened = trade_arithmetic(
+                quantity, cost, sides[i], quantities[i], unit_prices[i]
+            )
+            if opened:
+                currency = currencies[i]
+            if gains is not None:
+                realized[i] = True
+                absolute_gains[i], relative_gains[i] = gains
+            if quantity is not None:
+                position_quantities[i] = quantity
+                position_costs[i] = cost
+
+        if quantity is None:
+            if symbol in book:
+                book.remove(symbol)
+        else:
+            book.set(symbol, quantity, cost, currency)
+
+    return BatchResult(
+        book=book,
+        realized=np.array(realized, dtype=bool),
+        absolute_gains=np.array(absolute_gains, dtype=np.float64),
+        relative_gains=np.array(relative_gains, dtype=np.float64),
+        quantities=np.array(position_quantities, dtype=np.float64),
+        costs=np.array(position_costs, dtype=np.float64),
+    )
+
+
+def shard_by_symbol(symbols: np.ndarray, shards: int) -> List[np.ndarray]:
+    """Split trade indices in shards of whole symbols, balanced by trade count.
+
+    Symbols are assigned from the most traded one to the shard with the fewest trades.
+
+    Args:
+        symbols: trade symbols
+        shards: the maximum number of shards
+
+    Returns:
+        A list of at most `shards` non-empty index arrays, in trade order
+    """
+    groups = sorted(group_by_symbol(symbols), key=len, reverse=True)
+    loads = [(0, shard) for shard in range(min(shards, len(groups)))]
+    members: List[List[np.ndarray]] = [[] for _ in loads]
+    for group in groups:
+        load, shard = heapq.heappop(loads)
+        members[shard].append(group)
+        heapq.heappush(loads, (load + len(group), shard))
+    return [np.sort(np.concatenate(shard)) for shard in members]
+
+
+def _apply_shard(shard: Tuple[TradeBatch, PortfolioBook]) -> BatchResult:
+    return apply_trades(*shard)
+
+
+def apply_trades_sharded(
+    trades: Union[TradeBatch, Iterable[Trade]],
+    positions: Union[PortfolioBook, Iterable[Position], None] = None,
+    workers: Optional[int] = None,
+    min_shard_trades: int = MIN_SHARD_TRADES,
+) -> BatchResult:
+    """Apply a batch of trades to positions across worker processes.
+
+    Positions of different symbols are independent, so the trades are split in shards of
+    whole symbols (see shard_by_symbol) applied with apply_trades in a process pool and
+    the shard results are merged. The result is the one of apply_trades, except for the
+    order of the book rows.
+
+    Args:
+        trades: the trades to apply, in order
+        positions: optional pre-existing positions
+        workers: the maximum number of worker processes, the number of CPUs by default
+        min_shard_trades: the minimum number of trades of a shard, so that small batches
+            are not slowed down by the process pool. Trades are applied in the calling
+            process when there is a single shard.
+
+    Returns:
+        The final positions and per trade realized PnL
+    """
+    if not isinstance(trades, TradeBatch):
+        trades = TradeBatch.from_trades(trades)
+    if not isinstance(positions, PortfolioBook):
+        positions = PortfolioBook(positions or ())
+    workers = min(workers or os.cpu_count() or 1, len(trades) // min_shard_trades)
+    shards = shard_by_symbol(trades.symbols, max(workers, 1))
+    if len(shards) <= 1:
+        return apply_trades(trades, positions)
+
+    tasks = []
+    untraded = np.ones(len(positions), dtype=bool)
+    for indices in shards:
+        rows = [
+            positions.index[symbol]
+            for symbol in set(trades.symbols[indices].tolist())
+            if symbol in positions.index
+        ]
+        untraded[rows] = False
+        tasks.append(
+            (
+                trades.take(indices),
+                PortfolioBook.from_arrays(
+                    positions.symbols[rows],
+                    positions.quantities[rows],
+                    positions.costs[rows],
+                    positions.currencies[rows],
+                ),
+            )
+        )
+    with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+        results = list(executor.map(_apply_shard, tasks))
+
+    books = [result.book for result in results]
+    merged = BatchResult(
+        book=PortfolioBook.from_arrays(
+            np.concatenate(
+                [positions.symbols[untraded]] + [book.symbols for book in books]
+            ),
+            np.concatenate(
+                [positions.quantities[untraded]] + [book.quantities for book in books]
+            ),
+            np.concatenate(
+                [positions.costs[untraded]] + [book.costs for book in books]
+            ),
+            np.concatenate(
+                [positions.currencies[untraded]] + [book.currencies for book in books]
+            ),
+        ),
+        realized=np.zeros(len(trades), dtype=bool),
+        absolute_gains=np.empty(len(trades), dtype=np.float64),
+        relative_gains=np.empty(len(trades), dtype=np.float64),
+        quantities=np.empty(len(trades), dtype=np.float64),
+        costs=np.empty(len(trades), dtype=np.float64),
+    )
+    for indices, result in zip(shards, results):
+        for name in (
+            "realized",
+            "absolute_gains",
+            "relative_gains",
+            "quantities",
+            "costs",
+        ):
+            getattr(merged, name)[indices] = getattr(result, name)
+    return merged
+
+
+def realized_by_currency(trades: TradeBatch, result: BatchResult) -> Dict[str, float]:
+    """Sum the realized absolute gains of a batch of trades per trade currency.
+
+    Args:
+        trades: the applied trades
+        result: the outcome of the trades
+
+    Returns:
+        A currency -> realized gains dictionary of the currencies of realizing trades
+    """
+    currencies = trades.currencies[result.realized]
+    gains = result.absolute_gains[result.realized]
+    return {
+        currency: float(gains[currencies == currency].sum())
+        for currency in sorted(set(currencies.tolist()))
+    }
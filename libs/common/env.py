@@ -0,0 +1,6 @@
+import os
+
+
+def env_flag(key: str) -> bool:
+    """Return whether an environment variable is set to a true value (1, true or yes)."""
+    return os.environ.get(key, "").lower() in ("1", "true", "yes")
@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+from typing import Iterable, Mapping, Union
+
+import numpy as np
+
+
+@dataclass
+class RateMatrix:
+    """Data model for the exchange rates between a set of currencies.
+
+    Args:
+        currencies: the currency codes, sorted (str array)
+        rates: (currencies, currencies) matrix, rates[i, j] is the price of one unit of
+            currencies[i] in currencies[j], NaN when unknown
+    """
+
+    currencies: np.ndarray
+    rates: np.ndarray
+
+    @classmethod
+    def from_rates(cls, currency: str, rates: Mapping[str, float]) -> "RateMatrix":
+        """Build the matrix of every cross rate from rates to a single currency.
+
+        Args:
+            currency: the currency the rates are expressed in
+            rates: currency -> price of one unit of the currency in `currency`
+        """
+        values = {**rates, currency: 1.0}
+        currencies = np.array(sorted(values), dtype=str)
+        prices = np.array([values[code] for code in currencies], dtype=np.float64)
+        return cls(currencies, prices[:, None] / prices[None, :])
+
+    def _index(self, codes: np.ndarray) -> np.ndarray:
+        """Return the matrix index of currency codes, len(currencies) when unknown."""
+        index = np.searchsorted(self.currencies, codes)
+        index[index == len(self.currencies)] = 0
+        known = (
+            self.currencies[index] == codes
+            if len(self.currencies)
+            else np.zeros(len(codes), dtype=bool)
+        )
+        return np.where(known, index, len(self.currencies))
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        """Return the price of one unit of from_currency in to_currency, NaN if unknown."""
+        return float(self.convert(1.0, from_currency, to_currency)[0])
+
+    def convert(
+        self,
+        amounts: Union[float, Iterable[float]],
+        from_currencies: Union[str, Iterable[str]],
+        to_currencies: Union[str, Iterable[str]],
+    ) -> np.ndarray:
+        """Convert amounts between currencies with one lookup per amount.
+
+        Currencies are either a single code for every amount or one code per amount.
+        Amounts in a currency missing from the matrix convert to NaN, unless converted to
+        that same currency.
+
+        Returns:
+            The converted amounts (float64 array)
+        """
+        amounts = np.atleast_1d(np.asarray(amounts, dtype=np.float64))
+        from_codes = _codes(from_currencies, len(amounts))
+        to_codes = _codes(to_currencies, len(amounts))
+        size = len(self.currencies)
+        # pad the matrix with a NaN row and column for unknown currencies
+        rates = np.full((size + 1, size + 1), np.nan)
+        rates[:size, :size] = self.rates
+        factors = rates[self._index(from_codes), self._index(to_codes)]
+        return amounts * np.where(from_codes == to_codes, 1.0, factors)
+
+
+def _codes(currencies: Union[str, Iterable[str]], size: int) -> np.ndarray:
+    """Return an array of `size` currency codes from a code or one code per amount."""
+    if isinstance(currencies, str):
+        return np.full(size, getattr(currencies, "value", currencies), dtype=object)
+    return np.array([getattr(c, "value", c) for c in currencies], dtype=object)
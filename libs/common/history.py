@@ -0,0 +1,60 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Union
+
+import numpy as np
+
+DateLike = Union[date, str, np.datetime64]
+
+
+def to_day(value: DateLike) -> np.datetime64:
+    return np.datetime64(value, "D")
+
+
+@dataclass
+class PriceHistory:
+    """Data model for the daily close prices of a symbol.
+
+    Args:
+        dates: the trading days, sorted and unique (datetime64[D] array)
+        closes: the close price of every trading day (float64 array)
+        currency: close prices currency
+    """
+
+    dates: np.ndarray
+    closes: np.ndarray
+    currency: str
+
+    @classmethod
+    def empty(cls, currency: str) -> "PriceHistory":
+        return cls(
+            np.empty(0, dtype="datetime64[D]"), np.empty(0, dtype=np.float64), currency
+        )
+
+    @classmethod
+    def from_series(
+        cls, dates: np.ndarray, closes: np.ndarray, currency: str
+    ) -> "PriceHistory":
+        """Build a history from unsorted days, the last close of a duplicated day is kept."""
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        closes = np.asarray(closes, dtype=np.float64)
+        # np.unique keeps the first occurrence, look for the last one in the reversed series
+        unique, index = np.unique(dates[::-1], return_index=True)
+        return cls(unique, closes[::-1][index], currency)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def between(self, start: DateLike, end: DateLike) -> "PriceHistory":
+        """Return the days between start and end, both included."""
+        low = np.searchsorted(self.dates, to_day(start), side="left")
+        high = np.searchsorted(self.dates, to_day(end), side="right")
+        return PriceHistory(self.dates[low:high], self.closes[low:high], self.currency)
+
+    def merge(self, other: "PriceHistory") -> "PriceHistory":
+        """Return the union of both histories, the other close wins on common days."""
+        return PriceHistory.from_series(
+            np.concatenate([self.dates, other.dates]),
+            np.concatenate([self.closes, other.closes]),
+            other.currency,
+        )
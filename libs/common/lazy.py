@@ -0,0 +1,24 @@
+import importlib
+from typing import Callable
+
+
+def lazy(module: str, name: str) -> Callable:
+    """Reference a factory function without importing its module.
+
+    The module is only imported on the first call, so that using one implementation (i.e
+    a provider or a position store) does not pay the import cost of the others.
+
+    Args:
+        module: the module defining the function
+        name: the function name
+
+    Returns:
+        A function calling the referenced function with its arguments
+    """
+
+    def factory(*args, **kwargs):
+        return getattr(importlib.import_module(module), name)(*args, **kwargs)
+
+    factory.__name__ = name
+    factory.__qualname__ = name
+    return factory
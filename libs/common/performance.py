@@ -0,0 +1,173 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, Mapping, Union
+
+import numpy as np
+
+from libs.common.engine import TradeBatch, apply_trades, group_by_symbol
+from libs.common.history import PriceHistory
+from libs.common.trade import Trade
+
+
+@dataclass
+class PerformanceTotals:
+    """Daily aggregated curves of positions sharing a currency, see PerformanceCurves."""
+
+    market_values: np.ndarray
+    realized: np.ndarray
+    unrealized: np.ndarray
+
+    @property
+    def gains(self) -> np.ndarray:
+        return self.realized + self.unrealized
+
+
+@dataclass
+class PerformanceCurves:
+    """End of day mark-to-market and PnL of every symbol, arrays are (days, symbols).
+
+    Realized gains are cumulative since the first trade. A position is valued at the last
+    close known on a day, a day before the first known close has NaN market value and
+    unrealized gains.
+
+    Args:
+        dates: the days (datetime64[D])
+        symbols: the symbols
+        currencies: the currency of every symbol (of its last trade)
+        quantities: the position quantity at the end of every day
+        costs: the position cost at the end of every day
+        closes: the close used to value every position
+        realized: the cumulative realized gains
+    """
+
+    dates: np.ndarray
+    symbols: np.ndarray
+    currencies: np.ndarray
+    quantities: np.ndarray
+    costs: np.ndarray
+    closes: np.ndarray
+    realized: np.ndarray
+
+    @property
+    def market_values(self) -> np.ndarray:
+        # an empty position is worth nothing even without a close
+        return np.where(self.quantities == 0, 0.0, self.quantities * self.closes)
+
+    @property
+    def unrealized(self) -> np.ndarray:
+        return self.market_values - self.costs
+
+    @property
+    def gains(self) -> np.ndarray:
+        return self.realized + self.unrealized
+
+    def totals(self) -> Dict[str, PerformanceTotals]:
+        """Sum the curves of every symbol per currency.
+
+        Returns:
+            A dictionary currency -> daily totals
+        """
+        totals = {}
+        for code in np.unique(self.currencies.astype(str)):
+            columns = self.currencies == code
+            totals[code] = PerformanceTotals(
+                market_values=self.market_values[:, columns].sum(axis=1),
+                realized=self.realized[:, columns].sum(axis=1),
+                unrealized=self.unrealized[:, columns].sum(axis=1),
+            )
+        return totals
+
+
+def trade_days(timestamps: Iterable[float]) -> np.ndarray:
+    """Return the (UTC) day of epoch timestamps in seconds."""
+    seconds = np.asarray(timestamps, dtype=np.float64).astype(np.int64)
+    return seconds.astype("datetime64[s]").astype("datetime64[D]")
+
+
+def align_closes(
+    dates: np.ndarray, symbols: np.ndarray, histories: Mapping[str, PriceHistory]
+) -> np.ndarray:
+    """Return the (days, symbols) last known close on every day, NaN before the first."""
+    closes = np.full((len(dates), len(symbols)), np.nan)
+    for column, symbol in enumerate(symbols):
+        history = histories.get(symbol)
+        if history is None or len(history) == 0:
+            continue
+        rows = np.searchsorted(history.dates, dates, side="right") - 1
+        known = rows >= 0
+        closes[known, column] = history.closes[rows[known]]
+    return closes
+
+
+def performance_curves(
+    trades: Union[TradeBatch, Iterable[Trade]],
+    days: Iterable,
+    histories: Mapping[str, PriceHistory],
+    dates: np.ndarray,
+) -> PerformanceCurves:
+    """Compute the daily mark-to-market and PnL curves of a trade history.
+
+    Trades are replayed once (see apply_trades) to get the position of their symbol after
+    each of them. A trade counts from the end of its day, or of the next of `dates` when
+    its day is not one of them (i.e a weekend). The curves are then built with array
+    operations: every (day, symbol) cell takes the state after the last trade of the
+    symbol up to that day, so the cost does not depend on the number of days per trade.
+
+    Realized gains are the position cost minus the net amount paid for the symbol trades,
+    which is the realized PnL of average cost accounting for long and short positions.
+
+    Args:
+        trades: the trades, in order
+        days: the day of every trade (datetime64[D] or ISO strings)
+        histories: symbol -> daily closes
+        dates: the days of the curves, sorted
+
+    Returns:
+        The curves of every traded symbol
+    """
+    if not isinstance(trades, TradeBatch):
+        trades = TradeBatch.from_trades(trades)
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    days = np.asarray(days, dtype="datetime64[D]")
+    result = apply_trades(trades)
+
+    symbols, columns = np.unique(trades.symbols.astype(str), return_inverse=True)
+    currencies = np.empty(len(symbols), dtype=object)
+    # net amount paid for the symbol up to (and including) every trade
+    paid = trades.unit_prices * trades.quantities
+    # groups are in the sorted symbols order, like np.unique
+    for column, indices in enumerate(group_by_symbol(trades.symbols)):
+        paid[indices] = np.cumsum(paid[indices])
+        currencies[column] = trades.currencies[indices[-1]]
+
+    # index of the last trade of every (day, symbol), -1 before the first trade
+    rows = np.searchsorted(dates, days, side="left")
+    in_range = rows < len(dates)
+    last_trade = np.full((len(dates), len(symbols)), -1, dtype=np.int64)
+    np.maximum.at(
+        last_trade,
+        (rows[in_range], columns[in_range]),
+        np.flatnonzero(in_range),
+    )
+    last_trade = np.maximum.accumulate(last_trade, axis=0)
+    traded = last_trade >= 0
+    quantities = np.where(traded, result.quantities[last_trade], 0.0)
+    costs = np.where(traded, result.costs[last_trade], 0.0)
+    realized = np.where(traded, costs - paid[last_trade], 0.0)
+
+    return PerformanceCurves(
+        dates=dates,
+        symbols=symbols.astype(object),
+        currencies=currencies,
+        quantities=quantities,
+        costs=costs,
+        closes=align_closes(dates, symbols, histories),
+        realized=realized,
+    )
+
+
+def curve_dates(start, end) -> np.ndarray:
+    """Return the business days between start and end, both included."""
+    dates = np.arange(
+        np.datetime64(start, "D"), np.datetime64(end, "D") + 1, dtype="datetime64[D]"
+    )
+    return dates[np.is_busday(dates)]
@@ -2,6 +2,8 @@ from typing import Optional, Tuple
 
 from pydantic import BaseModel
 
+# records depend on Position, the modules import each other as modules
+from libs.common import records
 from libs.common.currency import Currency
 from libs.common.trade import PnL, Side, Trade
 
@@ -61,19 +63,11 @@ class Position(BaseModel):
         Raises:
             ValueError if the incoming quantity is greater than the trade quantity
         """
-        if quantity is None:
-            quantity = self.quantity
-        sign = int(self.quantity / abs(self.quantity))
-        quantity = abs(quantity)
-        if quantity > abs(self.quantity):
-            raise ValueError(
-                "Incoming quantity cannot be greater than position quantity"
-            )
-        absolute_gains = (
-            quantity * (unit_price - (self.cost / abs(self.quantity))) * sign
+        return (
+            records.PositionRecord.from_model(self)
+            .calculate_pnl(unit_price, quantity)
+            .to_model()
         )
-        relative_gains = absolute_gains * abs(self.quantity) / (self.cost * quantity)
-        return PnL(absolute_gains=absolute_gains, relative_gains=relative_gains)
 
 
 def add_trade_to_position(
@@ -92,43 +86,29 @@ def add_trade_to_position(
         None and the profit/loss from the trade if the trade is in the opposite direction of the
         position otherwise None.
     """
-    # new position
-    if position is None:
-        return (
-            Position(
-                quantity=trade.quantity,
-                cost=trade.total_cost,
-                symbol=trade.symbol,
-                currency=trade.currency,
-            ),
-            None,
-        )
-
-    # increase position
-    if trade.side == position.side:
-        position.quantity += trade.quantity
-        position.cost += trade.total_cost
-        return position, None
-
-    # position is switiching from buy to sell or sell to buy
-    if abs(trade.quantity) > abs(position.quantity):
-        pnl = position.calculate_pnl(trade.unit_price)
+    quantity, cost, gains, opened = records.trade_arithmetic(
+        position.quantity if position is not None else None,
+        position.cost if position is not None else 0.0,
+        trade.side == Side.BUY,
+        trade.quantity,
+        trade.unit_price,
+    )
+    pnl = None
+    if gains is not None:
+        pnl = PnL.construct(absolute_gains=gains[0], relative_gains=gains[1])
+    if quantity is None:
+        return None, pnl
+    if opened:
         return (
-            Position(
-                quantity=trade.quantity - position.quantity,
-                cost=trade.unit_price * (trade.quantity - position.quantity),
+            Position.construct(
+                quantity=quantity,
+                cost=cost,
                 symbol=trade.symbol,
                 currency=trade.currency,
             ),
             pnl,
         )
-
-    pnl = position.calculate_pnl(trade.unit_price, trade.quantity)
-    # position is liquidated
-    if abs(trade.quantity) == abs(position.quantity):
-        return None, pnl
-
-    # partial position exposure reduction
-    position.cost += trade.quantity * position.unit_price
-    position.quantity += trade.quantity
+    # the position is updated in place
+    position.quantity = quantity
+    position.cost = cost
     return position, pnl
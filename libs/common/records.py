@@ -0,0 +1,223 @@
+"""Lightweight, validation-free counterparts of the Position, Trade and PnL models.
+
+Records are meant for hot paths (stores, batch replays) where the pydantic models'
+construction and validation cost dominates. Values are trusted: they must come from a
+validated model (`from_model`) or from a store that only ever persisted validated data.
+`to_model` builds the pydantic model without validating it again.
+"""
+from typing import TYPE_CHECKING, Optional, Tuple
+
+# position depends on apply_trade, the modules import each other as modules
+from libs.common import position as position_model
+from libs.common.currency import Currency
+from libs.common.trade import PnL, Side, Trade
+
+if TYPE_CHECKING:
+    from libs.common.position import Position
+
+
+class TradeRecord:
+    """Trade without validation, see Trade."""
+
+    __slots__ = ("symbol", "side", "currency", "quantity", "unit_price")
+
+    def __init__(
+        self,
+        symbol: str,
+        side: Side,
+        currency: Currency,
+        quantity: float,
+        unit_price: float,
+    ):
+        self.symbol = symbol
+        self.side = side
+        self.currency = currency
+        self.quantity = quantity
+        self.unit_price = unit_price
+
+    @classmethod
+    def from_model(cls, trade: Trade) -> "TradeRecord":
+        return cls(
+            trade.symbol, trade.side, trade.currency, trade.quantity, trade.unit_price
+        )
+
+    def to_model(self) -> Trade:
+        return Trade.construct(
+            symbol=self.symbol,
+            side=self.side,
+            currency=self.currency,
+            quantity=self.quantity,
+            unit_price=self.unit_price,
+        )
+
+    @property
+    def total_cost(self) -> float:
+        return self.unit_price * self.quantity
+
+
+class PnLRecord:
+    """PnL without validation, see PnL."""
+
+    __slots__ = ("absolute_gains", "relative_gains")
+
+    def __init__(self, absolute_gains: float, relative_gains: float):
+        self.absolute_gains = absolute_gains
+        self.relative_gains = relative_gains
+
+    def to_model(self) -> PnL:
+        return PnL.construct(
+            absolute_gains=self.absolute_gains, relative_gains=self.relative_gains
+        )
+
+
+class PositionRecord:
+    """Position without validation, see Position."""
+
+    __slots__ = ("quantity", "cost", "symbol", "currency")
+
+    def __init__(self, quantity: float, cost: float, symbol: str, currency: Currency):
+        self.quantity = quantity
+        self.cost = cost
+        self.symbol = symbol
+        self.currency = currency
+
+    @classmethod
+    def from_model(cls, position: "Position") -> "PositionRecord":
+        return cls(position.quantity, position.cost, position.symbol, position.currency)
+
+    def to_model(self) -> "Position":
+        return position_model.Position.construct(
+            quantity=self.quantity,
+            cost=self.cost,
+            symbol=self.symbol,
+            currency=self.currency,
+        )
+
+    def copy(self) -> "PositionRecord":
+        return PositionRecord(self.quantity, self.cost, self.symbol, self.currency)
+
+    @property
+    def side(self) -> Side:
+        if self.quantity < 0:
+            return Side.SELL
+        return Side.BUY
+
+    @property
+    def unit_price(self) -> float:
+        return self.cost / self.quantity
+
+    def calculate_pnl(
+        self, unit_price: float, quantity: Optional[float] = None
+    ) -> PnLRecord:
+        """See Position.calculate_pnl.
+
+        Raises:
+            ValueError if the incoming quantity is greater than the trade quantity
+        """
+        if quantity is None:
+            quantity = self.quantity
+        quantity = abs(quantity)
+        if quantity > abs(self.quantity):
+            raise ValueError(
+                "Incoming quantity cannot be greater than position quantity"
+            )
+        return PnLRecord(*_gains(self.quantity, self.cost, unit_price, quantity))
+
+
+def _gains(
+    quantity: float, cost: float, unit_price: float, reduced_quantity: float
+) -> Tuple[float, float]:
+    """Return the (absolute, relative) gains of reducing a position at unit_price."""
+    position_quantity = abs(quantity)
+    sign = int(quantity / position_quantity)
+    absolute_gains = reduced_quantity * (unit_price - (cost / position_quantity)) * sign
+    relative_gains = absolute_gains * position_quantity / (cost * reduced_quantity)
+    return absolute_gains, relative_gains
+
+
+def trade_arithmetic(
+    quantity: Optional[float],
+    cost: float,
+    buy: bool,
+    trade_quantity: float,
+    unit_price: float,
+) -> Tuple[Optional[float], float, Optional[Tuple[float, float]], bool]:
+    """Apply a trade to a position given as plain floats.
+
+    This is the trade arithmetic behind apply_trade, add_trade_to_position and
+    apply_trades, the batch engine calls it directly to skip building records.
+
+    Args:
+        quantity: the position quantity, None if there is no position
+        cost: the position cost, ignored if there is no position
+        buy: whether the trade side is buy
+        trade_quantity: the trade quantity
+        unit_price: the trade unit price
+
+    Returns:
+        A tuple (quantity, cost, gains, opened) of the updated position (quantity is None
+        once liquidated), the realized (absolute, relative) gains or None and whether the
+        trade opened a new position (new or flipped side) which takes the trade currency
+    """
+    # new position
+    if quantity is None:
+        return trade_quantity, unit_price * trade_quantity, None, True
+
+    # increase position
+    if buy == (quantity >= 0):
+        return (
+            quantity + trade_quantity,
+            cost + unit_price * trade_quantity,
+            None,
+            False,
+        )
+
+    # position is switching from buy to sell or sell to buy
+    if abs(trade_quantity) > abs(quantity):
+        gains = _gains(quantity, cost, unit_price, abs(quantity))
+        quantity = trade_quantity - quantity
+        return quantity, unit_price * quantity, gains, True
+
+    gains = _gains(quantity, cost, unit_price, abs(trade_quantity))
+    # position is liquidated
+    if abs(trade_quantity) == abs(quantity):
+        return None, cost, gains, False
+
+    # partial position exposure reduction
+    return (
+        quantity + trade_quantity,
+        cost + trade_quantity * (cost / quantity),
+        gains,
+        False,
+    )
+
+
+def apply_trade(
+    trade: TradeRecord, position: Optional[PositionRecord] = None
+) -> Tuple[Optional[PositionRecord], Optional[PnLRecord]]:
+    """Create/Update a position record with a trade, see trade_arithmetic.
+
+    The given position is updated in place unless it is liquidated or flipped.
+
+    Args:
+        trade: incoming trade
+        position: potentially pre-existing position for symbol
+
+    Returns:
+        A tuple (position, pnl), see add_trade_to_position
+    """
+    quantity, cost, gains, opened = trade_arithmetic(
+        position.quantity if position is not None else None,
+        position.cost if position is not None else 0.0,
+        trade.side == Side.BUY,
+        trade.quantity,
+        trade.unit_price,
+    )
+    pnl = PnLRecord(*gains) if gains is not None else None
+    if quantity is None:
+        return None, pnl
+    if opened:
+        return PositionRecord(quantity, cost, trade.symbol, trade.currency), pnl
+    position.quantity = quantity
+    position.cost = cost
+    return position, pnl
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from libs.common.book import PortfolioBook
+from libs.common.currency import Currency
+from libs.common.fx import RateMatrix
+from libs.common.position import Position
+from libs.common.tests.factory import PositionFactory
+
+
+@pytest.fixture
+def positions():
+    return [
+        Position(symbol="GOOGL", quantity=10.0, cost=1000.0, currency=Currency.USD),
+        Position(symbol="MSFT", quantity=-5.0, cost=1500.0, currency=Currency.USD),
+        Position(symbol="AAPL", quantity=2.5, cost=400.0, currency=Currency.USD),
+    ]
+
+
+def test_book_round_trip(positions):
+    book = PortfolioBook(positions)
+    assert len(book) == 3
+    assert "MSFT" in book
+    assert book.to_positions() == positions
+    assert book.position("TSLA") is None
+
+
+def test_book_set_and_remove(positions):
+    book = PortfolioBook(positions)
+    book.set("GOOGL", 20.0, 2000.0, Currency.USD)
+    book.remove("GOOGL")
+    book.set("TSLA", 1.0, 200.0, Currency.USD)
+
+    assert list(book.symbols) == ["AAPL", "MSFT", "TSLA"]
+    assert book.position("AAPL") == positions[2]
+    assert book.position("TSLA").quantity == 1.0
+    with pytest.raises(KeyError):
+        book.remove("GOOGL")
+
+
+def test_book_grows_past_initial_capacity():
+    book = PortfolioBook()
+    for i in range(100):
+        book.set(f"SYM{i}", float(i + 1), 10.0 * (i + 1), Currency.USD)
+    assert len(book) == 100
+    assert book.position("SYM99").quantity == 100.0
+
+
+def test_vectorized_pnl_matches_scalar_pnl():
+    positions = [
+        PositionFactory.build(
+            symbol=f"SYM{i}",
+            quantity=float(np.random.uniform(-100, 100)) or 1.0,
+            cost=float(np.random.uniform(1, 10000)),
+        )
+        for i in range(200)
+    ]
+    prices = np.random.uniform(0, 500, size=200)
+    book = PortfolioBook(positions)
+    absolute_gains, relative_gains = book.calculate_pnl(prices)
+
+    for position, price, absolute, relative in zip(
+        positions, prices, absolute_gains, relative_gains
+    ):
+        pnl = position.calculate_pnl(float(price))
+        assert pnl.absolute_gains == absolute
+        assert pnl.relative_gains == relative
+
+
+def test_totals(positions):
+    book = PortfolioBook(positions)
+    prices = book.prices({"GOOGL": 110.0, "MSFT": 290.0})
+    assert np.isnan(prices[2])
+
+    totals = book.totals(prices)[Currency.USD]
+    assert totals.cost == 2900.0
+    assert totals.market_value == 110.0 * 10 - 290.0 * 5
+    assert totals.absolute_gains == 100.0 + 50.0
+    assert totals.relative_gains == 150.0 / 2500.0
+
+
+def test_from_arrays():
+    book = PortfolioBook.from_arrays(
+        ["GOOGL", "MSFT"], [1.0, 2.0], [10.0, 20.0], ["USD", "USD"]
+    )
+    assert book.position("MSFT").cost == 20.0
+    book.set("AAPL", 1.0, 1.0, Currency.USD)
+    assert len(book) == 3
+    with pytest.raises(ValueError):
+        PortfolioBook.from_arrays(["A", "A"], [1, 1], [1, 1], ["USD", "USD"])
+
+
+def test_converted_totals():
+    book = PortfolioBook(
+        [
+            Position(symbol="SAP", quantity=10.0, cost=1000.0, currency=Currency.EUR),
+            Position(symbol="SONY", quantity=1.0, cost=100.0, currency=Currency.JPY),
+            Position(symbol="AAPL", quantity=2.0, cost=300.0, currency=Currency.USD),
+        ]
+    )
+    rates = RateMatrix.from_rates("USD", {"EUR": 2.0})
+    totals = book.converted_totals(
+        book.prices({"SAP": 110.0, "SONY": 90.0}), rates, "USD"
+    )
+    # SONY has no JPY rate, AAPL has no price and only counts in the cost
+    assert totals.cost == 2000.0 + 300.0
+    assert totals.market_value == 2200.0
+    assert totals.absolute_gains == 200.0
+    assert totals.relative_gains == 0.1
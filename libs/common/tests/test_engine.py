@@ -0,0 +1,128 @@
+import random
+
+import numpy as np
+import pytest
+
+from libs.common.currency import Currency
+from libs.common.engine import (
+    TradeBatch,
+    apply_trades,
+    apply_trades_sharded,
+    realized_by_currency,
+    shard_by_symbol,
+)
+from libs.common.position import Position, add_trade_to_position
+from libs.common.trade import Side, Trade
+
+
+def random_trades(count: int, symbols: int, seed: int = 0):
+    rng = random.Random(seed)
+    trades = []
+    for _ in range(count):
+        side = rng.choice([Side.BUY, Side.SELL])
+        quantity = float(rng.randint(1, 20))
+        trades.append(
+            Trade(
+                symbol=f"SYM{rng.randrange(symbols)}",
+                side=side,
+                currency=Currency.USD,
+                quantity=quantity if side == Side.BUY else -quantity,
+                unit_price=rng.uniform(1, 500),
+            )
+        )
+    return trades
+
+
+def scalar_apply(trades, positions=None):
+    positions = {p.symbol: p.copy() for p in positions or []}
+    pnls = []
+    for trade in trades:
+        position, pnl = add_trade_to_position(trade, positions.get(trade.symbol))
+        pnls.append(pnl)
+        if position is None:
+            positions.pop(trade.symbol, None)
+        else:
+            positions[trade.symbol] = position
+    return positions, pnls
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_batch_matches_scalar_exactly(seed):
+    trades = random_trades(3000, 25, seed)
+    initial = [
+        Position(symbol="SYM0", quantity=5.0, cost=600.0, currency=Currency.USD),
+        Position(symbol="OTHER", quantity=-1.0, cost=10.0, currency=Currency.USD),
+    ]
+    expected_positions, expected_pnls = scalar_apply(trades, initial)
+    result = apply_trades(trades, initial)
+
+    assert {p.symbol: p for p in result.book.to_positions()} == expected_positions
+    for i, pnl in enumerate(expected_pnls):
+        if pnl is None:
+            assert not result.realized[i]
+            assert np.isnan(result.absolute_gains[i])
+        else:
+            assert result.realized[i]
+            assert result.absolute_gains[i] == pnl.absolute_gains
+            assert result.relative_gains[i] == pnl.relative_gains
+
+
+def test_liquidation_removes_position():
+    batch = TradeBatch(
+        symbols=["GOOGL", "GOOGL"],
+        sides=[True, False],
+        currencies=["USD", "USD"],
+        quantities=[10.0, -10.0],
+        unit_prices=[100.0, 110.0],
+    )
+    result = apply_trades(batch)
+    assert len(result.book) == 0
+    assert list(result.realized) == [False, True]
+    assert result.absolute_gains[1] == 100.0
+    assert result.relative_gains[1] == 0.1
+
+
+def test_empty_batch():
+    result = apply_trades([])
+    assert len(result.book) == 0
+    assert len(result.realized) == 0
+
+
+def test_batch_validation():
+    with pytest.raises(ValueError):
+        TradeBatch(["A"], [True], ["USD"], [1.0], [-1.0])
+    with pytest.raises(ValueError):
+        TradeBatch(["A", "B"], [True], ["USD"], [1.0], [1.0])
+
+
+def test_shards_hold_whole_symbols():
+    symbols = np.array(["A"] * 5 + ["B"] * 3 + ["C"] * 2 + ["A", "D"], dtype=object)
+    shards = shard_by_symbol(symbols, 2)
+    assert [shard.tolist() for shard in shards] == [
+        [0, 1, 2, 3, 4, 10],
+        [5, 6, 7, 8, 9, 11],
+    ]
+    assert len(shard_by_symbol(symbols, 8)) == 4
+    assert shard_by_symbol(np.array([], dtype=object), 2) == []
+
+
+def test_sharded_matches_batch():
+    trades = TradeBatch.from_trades(random_trades(3000, 25, seed=3))
+    initial = [
+        Position(symbol="SYM0", quantity=5.0, cost=600.0, currency=Currency.USD),
+        Position(symbol="OTHER", quantity=-1.0, cost=10.0, currency=Currency.USD),
+    ]
+    expected = apply_trades(trades, initial)
+    result = apply_trades_sharded(trades, initial, workers=3, min_shard_trades=500)
+
+    assert sorted(result.book.to_positions(), key=lambda p: p.symbol) == sorted(
+        expected.book.to_positions(), key=lambda p: p.symbol
+    )
+    for name in ("realized", "absolute_gains", "relative_gains", "quantities", "costs"):
+        np.testing.assert_array_equal(getattr(result, name), getattr(expected, name))
+    assert realized_by_currency(trades, result) == realized_by_currency(
+        trades, expected
+    )
+    assert realized_by_currency(trades, result)["USD"] == pytest.approx(
+        np.nansum(expected.absolute_gains)
+    )
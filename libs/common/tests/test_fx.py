@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from libs.common.currency import Currency
+from libs.common.fx import RateMatrix
+
+
+@pytest.fixture
+def rates():
+    return RateMatrix.from_rates("USD", {"EUR": 1.25, "JPY": 0.01})
+
+
+def test_cross_rates(rates):
+    assert rates.currencies.tolist() == ["EUR", "JPY", "USD"]
+    assert rates.rate("EUR", "JPY") == pytest.approx(125.0)
+    assert rates.rate("USD", "EUR") == pytest.approx(0.8)
+    assert rates.rate(Currency.EUR, Currency.EUR) == 1.0
+
+
+def test_convert_per_amount_currencies(rates):
+    converted = rates.convert(
+        [10.0, 100.0, 1.0, 5.0], ["EUR", "JPY", "USD", "GBP"], "USD"
+    )
+    assert converted[:3].tolist() == pytest.approx([12.5, 1.0, 1.0])
+    assert np.isnan(converted[3])
+
+    converted = rates.convert([10.0, 10.0], "EUR", ["USD", "JPY"])
+    assert converted.tolist() == pytest.approx([12.5, 1250.0])
+
+
+def test_unknown_currency_to_itself_is_kept(rates):
+    assert rates.convert([3.0], ["GBP"], ["GBP"]).tolist() == [3.0]
+    assert np.isnan(rates.rate("GBP", "CHF"))
+    assert RateMatrix.from_rates("USD", {}).convert([2.0], "USD", "USD").tolist() == [
+        2.0
+    ]
@@ -0,0 +1,37 @@
+import numpy as np
+
+from libs.common.history import PriceHistory
+
+
+def days(*values):
+    return np.array(values, dtype="datetime64[D]")
+
+
+def test_from_series_sorts_and_keeps_last_duplicate():
+    history = PriceHistory.from_series(
+        days("2024-01-03", "2024-01-02", "2024-01-03"), [3.0, 2.0, 4.0], "USD"
+    )
+    assert history.dates.tolist() == days("2024-01-02", "2024-01-03").tolist()
+    assert history.closes.tolist() == [2.0, 4.0]
+
+
+def test_between_includes_both_ends():
+    history = PriceHistory(
+        days("2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05"),
+        np.array([1.0, 2.0, 3.0, 4.0]),
+        "USD",
+    )
+    assert history.between("2024-01-03", "2024-01-04").closes.tolist() == [2.0, 3.0]
+    assert history.between("2023-12-01", "2024-01-02").closes.tolist() == [1.0]
+    assert len(history.between("2024-02-01", "2024-03-01")) == 0
+    assert len(PriceHistory.empty("USD").between("2024-01-01", "2024-01-31")) == 0
+
+
+def test_merge_prefers_other():
+    old = PriceHistory(days("2024-01-02", "2024-01-03"), np.array([1.0, 2.0]), "USD")
+    new = PriceHistory(days("2024-01-03", "2024-01-04"), np.array([5.0, 6.0]), "USD")
+    merged = old.merge(new)
+    assert (
+        merged.dates.tolist() == days("2024-01-02", "2024-01-03", "2024-01-04").tolist()
+    )
+    assert merged.closes.tolist() == [1.0, 5.0, 6.0]
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from libs.common.engine import TradeBatch
+from libs.common.history import PriceHistory
+from libs.common.performance import (
+    curve_dates,
+    performance_curves,
+    trade_days,
+)
+
+
+def days(*values):
+    return np.array(values, dtype="datetime64[D]")
+
+
+def batch(*trades):
+    symbols, quantities, prices = zip(*trades)
+    return TradeBatch(
+        symbols=list(symbols),
+        sides=[q > 0 for q in quantities],
+        currencies=["USD"] * len(trades),
+        quantities=list(quantities),
+        unit_prices=list(prices),
+    )
+
+
+DATES = curve_dates("2024-01-01", "2024-01-05")
+HISTORIES = {
+    "A": PriceHistory(DATES, np.array([10.0, 11.0, 12.0, 13.0, 14.0]), "USD"),
+    "B": PriceHistory(DATES[2:], np.array([50.0, 40.0, 30.0]), "USD"),
+}
+
+
+def test_long_position_curves():
+    trades = batch(("A", 10.0, 10.0), ("A", -4.0, 12.0), ("A", -6.0, 14.0))
+    curves = performance_curves(
+        trades, days("2024-01-01", "2024-01-03", "2024-01-05"), HISTORIES, DATES
+    )
+    assert curves.symbols.tolist() == ["A"]
+    assert curves.quantities[:, 0].tolist() == [10.0, 10.0, 6.0, 6.0, 0.0]
+    assert curves.market_values[:, 0].tolist() == [100.0, 110.0, 72.0, 78.0, 0.0]
+    assert curves.realized[:, 0].tolist() == [0.0, 0.0, 8.0, 8.0, 32.0]
+    assert curves.unrealized[:, 0].tolist() == [0.0, 10.0, 12.0, 18.0, 0.0]
+    assert curves.gains[:, 0].tolist() == [0.0, 10.0, 20.0, 26.0, 32.0]
+
+
+def test_short_position_realized_gains():
+    trades = batch(("B", -10.0, 50.0), ("B", 4.0, 40.0), ("B", 6.0, 30.0))
+    curves = performance_curves(
+        trades, days("2024-01-03", "2024-01-04", "2024-01-05"), HISTORIES, DATES
+    )
+    assert curves.realized[:, 0].tolist() == [0.0, 0.0, 0.0, 40.0, 160.0]
+    assert curves.unrealized[:, 0].tolist() == [0.0, 0.0, 0.0, 60.0, 0.0]
+
+
+def test_weekend_trade_counts_from_next_day_and_missing_closes_are_nan():
+    dates = curve_dates("2024-01-05", "2024-01-09")
+    trades = batch(("B", 1.0, 45.0))
+    curves = performance_curves(trades, days("2024-01-06"), {}, dates)
+    assert dates.tolist() == days("2024-01-05", "2024-01-08", "2024-01-09").tolist()
+    assert curves.quantities[:, 0].tolist() == [0.0, 1.0, 1.0]
+    assert curves.market_values[0, 0] == 0.0
+    assert np.isnan(curves.market_values[1:, 0]).all()
+
+
+def test_totals_sum_symbols():
+    trades = batch(("A", 1.0, 10.0), ("B", 2.0, 50.0))
+    curves = performance_curves(
+        trades, days("2024-01-01", "2024-01-03"), HISTORIES, DATES
+    )
+    totals = curves.totals()
+    assert set(totals) == {"USD"}
+    assert totals["USD"].market_values.tolist() == [10.0, 11.0, 112.0, 93.0, 74.0]
+    assert totals["USD"].gains.tolist() == [0.0, 1.0, 2.0, -17.0, -36.0]
+
+
+def test_matches_day_by_day_replay():
+    rng = np.random.default_rng(0)
+    dates = curve_dates("2024-01-01", "2024-03-31")
+    count = 400
+    symbols = rng.choice(["A", "B", "C"], count)
+    quantities = rng.integers(1, 10, count) * rng.choice([-1.0, 1.0], count)
+    # reduce position flips to a liquidation, flips are not exercised here
+    positions = {}
+    for i, symbol in enumerate(symbols):
+        position = positions.get(symbol, 0.0)
+        if position * (position + quantities[i]) < 0:
+            quantities[i] = -position
+        positions[symbol] = position + quantities[i]
+    prices = rng.uniform(10, 20, count).round(2)
+    trades = batch(*zip(symbols, quantities, prices))
+    trade_dates = np.sort(rng.choice(dates, count))
+    histories = {
+        s: PriceHistory(dates, rng.uniform(10, 20, len(dates)), "USD") for s in "ABC"
+    }
+    curves = performance_curves(trades, trade_dates, histories, dates)
+
+    # running cash flows of the trades done by the end of every day
+    for column, symbol in enumerate(curves.symbols):
+        selected = symbols == symbol
+        for row, day in enumerate(dates):
+            done = selected & (trade_dates <= day)
+            quantity = quantities[done].sum()
+            cash = -(quantities[done] * prices[done]).sum()
+            value = quantity * histories[symbol].closes[row]
+            assert curves.quantities[row, column] == pytest.approx(quantity)
+            assert curves.gains[row, column] == pytest.approx(cash + value)
+
+
+def test_trade_days_are_utc():
+    assert trade_days([1704153599.5, 1704153600]).tolist() == (
+        days("2024-01-01", "2024-01-02").tolist()
+    )
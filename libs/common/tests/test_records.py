@@ -0,0 +1,45 @@
+import pytest
+
+from libs.common.currency import Currency
+from libs.common.position import Position, add_trade_to_position
+from libs.common.records import PositionRecord, TradeRecord, apply_trade
+from libs.common.tests.test_engine import random_trades
+
+
+def test_apply_trade_matches_add_trade_to_position():
+    models = {}
+    records = {}
+    for trade in random_trades(2000, 10):
+        position, pnl = add_trade_to_position(trade, models.get(trade.symbol))
+        record, record_pnl = apply_trade(
+            TradeRecord.from_model(trade), records.get(trade.symbol)
+        )
+        if pnl is None:
+            assert record_pnl is None
+        else:
+            assert record_pnl.to_model() == pnl
+        if position is None:
+            assert record is None
+            del models[trade.symbol]
+            del records[trade.symbol]
+        else:
+            assert record.to_model() == position
+            models[trade.symbol] = position
+            records[trade.symbol] = record
+
+
+def test_calculate_pnl_matches_position():
+    position = Position(symbol="GOOGL", quantity=-10, cost=1000, currency=Currency.USD)
+    record = PositionRecord.from_model(position)
+    assert record.calculate_pnl(80, 4).to_model() == position.calculate_pnl(80, 4)
+    with pytest.raises(ValueError):
+        record.calculate_pnl(80, 11)
+
+
+def test_record_round_trip():
+    position = Position(symbol="GOOGL", quantity=1.5, cost=150, currency=Currency.USD)
+    record = PositionRecord.from_model(position)
+    copy = record.copy()
+    copy.quantity = 3
+    assert record.to_model() == position
+    assert not hasattr(record, "__dict__")
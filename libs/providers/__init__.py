@@ -1,11 +1,54 @@
+import os
 from enum import Enum
+from functools import wraps
+from threading import Lock
 from typing import Callable, Dict
 
+from libs.common.lazy import lazy
+from libs.providers.client import AsyncClient as BaseAsyncClient
 from libs.providers.client import Client as BaseClient
-from libs.providers.mock.client import get_mock_client  # noqa
-from libs.providers.vantage.client import get_vantage_client  # noqa
 
 ClientGenerator = Callable[[], BaseClient]
+AsyncClientGenerator = Callable[[], BaseAsyncClient]
+
+_shared_clients_lock = Lock()
+_shared_clients: Dict[ClientGenerator, BaseClient] = {}
+_shared_clients_pid = os.getpid()
+
+
+def shared(generator: ClientGenerator) -> ClientGenerator:
+    """Wrap a client generator so that a single client is reused per process.
+
+    The client (and its connection pool) is created lazily on first call and handed out
+    to every later caller. A forked child process gets its own fresh client.
+
+    Args:
+        generator: function building a new provider client
+
+    Returns:
+        A function returning the process wide shared client
+    """
+
+    @wraps(generator)
+    def get_shared_client() -> BaseClient:
+        global _shared_clients_pid
+        with _shared_clients_lock:
+            if _shared_clients_pid != os.getpid():
+                _shared_clients.clear()
+                _shared_clients_pid = os.getpid()
+            if generator not in _shared_clients:
+                _shared_clients[generator] = generator()
+            return _shared_clients[generator]
+
+    return get_shared_client
+
+
+def close_shared_clients():
+    """Close and forget all shared clients, the next factory call builds new ones."""
+    with _shared_clients_lock:
+        for client in _shared_clients.values():
+            client.close()
+        _shared_clients.clear()
 
 
 class ClientType(str, Enum):
@@ -14,6 +57,16 @@ class ClientType(str, Enum):
 
 
 ClientFactory: Dict[ClientType, ClientGenerator] = {
-    ClientType.VANTAGE: get_vantage_client,
-    ClientType.MOCK: get_mock_client,
+    ClientType.VANTAGE: shared(
+        lazy("libs.providers.vantage.client", "get_vantage_client")
+    ),
+    ClientType.MOCK: shared(lazy("libs.providers.mock.client", "get_mock_client")),
+}
+
+# Async clients own an event loop bound connection pool so they are never shared
+AsyncClientFactory: Dict[ClientType, AsyncClientGenerator] = {
+    ClientType.VANTAGE: lazy(
+        "libs.providers.vantage.async_client", "get_async_vantage_client"
+    ),
+    ClientType.MOCK: lazy("libs.providers.mock.async_client", "get_async_mock_client"),
 }
@@ -0,0 +1,203 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from logging import getLogger
+from os import PathLike
+from threading import Lock
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from libs.common.quote import Quote
+from libs.providers.client import Client as BaseClient
+from libs.providers.client import QuoteResult
+
+if TYPE_CHECKING:
+    from libs.common.history import PriceHistory
+
+logger = getLogger(__name__)
+
+DEFAULT_TTL = 60.0
+DEFAULT_MAX_SIZE = 1024
+CACHE_FILE_NAME = ".quote_cache.json"
+
+CacheEntry = Tuple[float, Quote]
+
+
+@dataclass
+class CacheStats:
+    """Quote cache counters.
+
+    Args:
+        hits: number of quotes served from the cache
+        misses: number of quotes fetched from the wrapped provider client
+        evictions: number of quotes evicted because the cache was full
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class CachingClient(BaseClient):
+    def __init__(
+        self,
+        client: BaseClient,
+        ttl: float = DEFAULT_TTL,
+        max_size: int = DEFAULT_MAX_SIZE,
+        cache_dir: Optional[PathLike] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """Provider client decorator caching quotes for `ttl` seconds.
+
+        Quotes are kept in memory in a LRU of at most `max_size` symbols. When `cache_dir` is
+        set, the cache is also persisted to a json file in that directory so that quotes
+        survive across processes (i.e CLI invocations). Provider errors are never cached.
+
+        Args:
+            client: the provider client to wrap
+            ttl: the number of seconds a quote is considered fresh
+            max_size: the maximum number of symbols kept in the cache
+            cache_dir: optional directory for the on-disk cache tier
+            clock: function returning the current time in seconds since epoch
+        """
+        self.client = client
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self.stats = CacheStats()
+        self.cache_path = (
+            os.path.join(cache_dir, CACHE_FILE_NAME) if cache_dir is not None else None
+        )
+        self._lock = Lock()
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._load()
+
+    @property
+    def max_workers(self) -> int:
+        return self.client.max_workers
+
+    @property
+    def requests_per_minute(self) -> Optional[float]:
+        return self.client.requests_per_minute
+
+    def _load(self):
+        if self.cache_path is None or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path) as f:
+                data = json.load(f)
+            for symbol, (fetched_at, price, currency) in data.items():
+                self._put(symbol, float(fetched_at), Quote(float(price), currency))
+        except (ValueError, TypeError) as ex:
+            logger.warning(f"Ignoring unreadable quote cache {self.cache_path}: {ex}")
+
+    def _flush(self):
+        if self.cache_path is None:
+            return
+        data = {
+            symbol: [fetched_at, quote.price, quote.currency]
+            for symbol, (fetched_at, quote) in self._entries.items()
+        }
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def _put(self, symbol: str, fetched_at: float, quote: Quote):
+        self._entries[symbol] = (fetched_at, quote)
+        self._entries.move_to_end(symbol)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _get(self, symbol: str) -> Optional[Quote]:
+        entry = self._entries.get(symbol)
+        if entry is None:
+            return None
+        fetched_at, quote = entry
+        if self.clock() - fetched_at >= self.ttl:
+            del self._entries[symbol]
+            return None
+        self._entries.move_to_end(symbol)
+        return quote
+
+    def clear(self):
+        """Drop every cached quote."""
+        with self._lock:
+            self._entries.clear()
+            self._flush()
+
+    def close(self):
+        self.client.close()
+
+    def get_history(self, symbol: str, start: date, end: date) -> "PriceHistory":
+        return self.client.get_history(symbol, start, end)
+
+    def get_fx_rate(self, from_currency: str, to_currency: str) -> float:
+        return self.client.get_fx_rate(from_currency, to_currency)
+
+    def get_quote(self, symbol: str) -> Quote:
+        with self._lock:
+            quote = self._get(symbol)
+            if quote is not None:
+                self.stats.hits += 1
+                return quote
+            self.stats.misses += 1
+
+        quote = self.client.get_quote(symbol)
+        with self._lock:
+            self._put(symbol, self.clock(), quote)
+            self._flush()
+        return quote
+
+    def get_quotes(self, symbols: Iterable[str]) -> Dict[str, QuoteResult]:
+        results: Dict[str, Optional[QuoteResult]] = {}
+        with self._lock:
+            for symbol in symbols:
+                if symbol in results:
+                    continue
+                results[symbol] = self._get(symbol)
+            missing = [symbol for symbol, quote in results.items() if quote is None]
+            self.stats.hits += len(results) - len(missing)
+            self.stats.misses += len(missing)
+
+        if not missing:
+            return results
+
+        fetched = self.client.get_quotes(missing)
+        now = self.clock()
+        with self._lock:
+            for symbol, result in fetched.items():
+                if isinstance(result, Quote):
+                    self._put(symbol, now, result)
+            self._flush()
+        results.update(fetched)
+        return results
+
+    def iter_quotes(self, symbols: Iterable[str]) -> Iterator[Tuple[str, QuoteResult]]:
+        cached: Dict[str, Optional[Quote]] = {}
+        with self._lock:
+            for symbol in symbols:
+                if symbol not in cached:
+                    cached[symbol] = self._get(symbol)
+            missing = [symbol for symbol, quote in cached.items() if quote is None]
+            self.stats.hits += len(cached) - len(missing)
+            self.stats.misses += len(missing)
+
+        for symbol, quote in cached.items():
+            if quote is not None:
+                yield symbol, quote
+        if not missing:
+            return
+
+        try:
+            for symbol, result in self.client.iter_quotes(missing):
+                if isinstance(result, Quote):
+                    with self._lock:
+                        self._put(symbol, self.clock(), result)
+                yield symbol, result
+        finally:
+            with self._lock:
+                self._flush()
@@ -1,7 +1,45 @@
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextvars import copy_context
+from datetime import date
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, Optional, Tuple, Union
+
 from libs.common.quote import Quote
+from libs.providers.exception import ProviderAPIError
+
+if TYPE_CHECKING:
+    from libs.common.history import PriceHistory
+
+# batch calls spend their time waiting on the network, the pool only grows up to the
+# batch size so small batches do not pay for idle threads
+DEFAULT_MAX_WORKERS = 64
+DEFAULT_MAX_CONCURRENCY = 64
+
+QuoteResult = Union[Quote, ProviderAPIError]
+HistoryResult = Union["PriceHistory", ProviderAPIError]
+FxResult = Union[float, ProviderAPIError]
+
+
+def _per_symbol_error(ex: Exception) -> ProviderAPIError:
+    """Converts an error documented by a single symbol call to its batch result."""
+    if isinstance(ex, ProviderAPIError):
+        return ex
+    error = ProviderAPIError(message=str(ex))
+    error.__cause__ = ex
+    return error
+
+
+def _batch_result(future: Future):
+    try:
+        return future.result()
+    except (ProviderAPIError, ValueError) as ex:
+        return _per_symbol_error(ex)
 
 
 class Client:
+    max_workers: int = DEFAULT_MAX_WORKERS
+    # sustained number of requests per minute the provider allows, None if unlimited
+    requests_per_minute: Optional[float] = None
+
     def get_quote(self, symbol: str) -> Quote:
         """Fetches current quote for symbol from the data provider.
 
@@ -16,3 +54,213 @@ class Client:
             ProviderAPIError: An error occured while fetching the live quote from the provider.
         """
         pass
+
+    def get_history(self, symbol: str, start: date, end: date) -> "PriceHistory":
+        """Fetches the daily close prices of symbol from the data provider.
+
+        Args:
+            symbol: Symbol/Ticker for the security.
+            start: first day of the history
+            end: last day of the history, included
+
+        Returns:
+            The closes of the trading days between start and end
+
+        Raises:
+            ProviderAPIError: An error occured while fetching the history from the provider.
+        """
+        pass
+
+    def get_fx_rate(self, from_currency: str, to_currency: str) -> float:
+        """Fetches the current exchange rate between two currencies from the data provider.
+
+        Args:
+            from_currency: the currency to convert from
+            to_currency: the currency to convert to
+
+        Returns:
+            The price of one unit of from_currency in to_currency
+
+        Raises:
+            ProviderAPIError: An error occured while fetching the rate from the provider.
+        """
+        pass
+
+    def close(self):
+        """Release resources (i.e pooled connections) held by the client."""
+        pass
+
+    def get_quotes(self, symbols: Iterable[str]) -> Dict[str, QuoteResult]:
+        """Fetches current quotes for many symbols from the data provider.
+
+        Symbols are fetched concurrently on a thread pool bounded by `max_workers`
+        so that pricing N symbols takes roughly the wall time of one provider round trip
+        (as long as N <= max_workers). Duplicated symbols are only fetched once. Each call
+        runs in a copy of the caller context so context variables (i.e request priority)
+        apply to the fanned out calls.
+
+        Args:
+            symbols: Symbols/Tickers for the securities.
+
+        Returns:
+            A dictionary mapping every requested symbol (in request order) to either its live
+            quote or the ProviderAPIError raised while fetching it, a ValueError raised while
+            reading a single symbol is reported as a ProviderAPIError with its message.
+        """
+        unique_symbols = list(dict.fromkeys(symbols))
+        results = dict(self.iter_quotes(unique_symbols))
+        return {symbol: results[symbol] for symbol in unique_symbols}
+
+    def get_histories(
+        self, symbols: Iterable[str], start: date, end: date
+    ) -> Dict[str, HistoryResult]:
+        """Fetches the daily close prices of many symbols concurrently, see get_quotes.
+
+        Args:
+            symbols: Symbols/Tickers for the securities.
+            start: first day of the histories
+            end: last day of the histories, included
+
+        Returns:
+            A dictionary mapping every requested symbol (in request order) to either its
+            history or the ProviderAPIError raised while fetching it.
+        """
+        unique_symbols = list(dict.fromkeys(symbols))
+        if not unique_symbols:
+            return {}
+
+        results: Dict[str, HistoryResult] = {}
+        workers = max(1, min(self.max_workers, len(unique_symbols)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                symbol: executor.submit(
+                    copy_context().run, self.get_history, symbol, start, end
+                )
+                for symbol in unique_symbols
+            }
+            for symbol, future in futures.items():
+                results[symbol] = _batch_result(future)
+        return results
+
+    def get_fx_rates(
+        self, currencies: Iterable[str], to_currency: str
+    ) -> Dict[str, FxResult]:
+        """Fetches the exchange rates of many currencies concurrently, see get_quotes.
+
+        The rate of to_currency itself is 1 and not fetched.
+
+        Args:
+            currencies: the currencies to convert from
+            to_currency: the currency to convert to
+
+        Returns:
+            A dictionary mapping every requested currency (in request order) to either its
+            rate to to_currency or the ProviderAPIError raised while fetching it.
+        """
+        unique_currencies = list(dict.fromkeys(currencies))
+        results: Dict[str, FxResult] = {
+            currency: 1.0 for currency in unique_currencies if currency == to_currency
+        }
+        missing = [
+            currency for currency in unique_currencies if currency not in results
+        ]
+        if missing:
+            workers = max(1, min(self.max_workers, len(missing)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    currency: executor.submit(
+                        copy_context().run, self.get_fx_rate, currency, to_currency
+                    )
+                    for currency in missing
+                }
+                for currency, future in futures.items():
+                    results[currency] = _batch_result(future)
+        return {currency: results[currency] for currency in unique_currencies}
+
+    def iter_quotes(self, symbols: Iterable[str]) -> Iterator[Tuple[str, QuoteResult]]:
+        """Fetches current quotes for many symbols, yielding them as they arrive.
+
+        Symbols are fetched concurrently like in `get_quotes`, but each (symbol, result)
+        pair is yielded as soon as its call completes so callers can stream results.
+
+        Args:
+            symbols: Symbols/Tickers for the securities.
+
+        Returns:
+            An iterator of (symbol, quote or ProviderAPIError) pairs in completion order,
+            duplicated symbols are only fetched and yielded once.
+        """
+        unique_symbols = list(dict.fromkeys(symbols))
+        if not unique_symbols:
+            return
+
+        workers = max(1, min(self.max_workers, len(unique_symbols)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(copy_context().run, self.get_quote, symbol): symbol
+                for symbol in unique_symbols
+            }
+            for future in as_completed(futures):
+                yield futures[future], _batch_result(future)
+
+
+class AsyncClient:
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+
+    async def get_quote(self, symbol: str) -> Quote:
+        """Fetches current quote for symbol from the data provider without blocking the loop.
+
+        Args:
+            symbol: Symbol/Ticker for the security.
+
+        Returns:
+            A live quote for the symbol
+
+        Raises:
+            ValueError: An error occurred while reading the response from the provider.
+            ProviderAPIError: An error occured while fetching the live quote from the provider.
+        """
+        pass
+
+    async def close(self):
+        """Release resources (i.e pooled connections) held by the client."""
+        pass
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, *_):
+        await self.close()
+
+    async def get_quotes(self, symbols: Iterable[str]) -> Dict[str, QuoteResult]:
+        """Fetches current quotes for many symbols from the data provider.
+
+        Every symbol is fetched concurrently on the running event loop, implementations bound
+        the number of requests actually in flight to `max_concurrency`. Duplicated symbols
+        are only fetched once.
+
+        Args:
+            symbols: Symbols/Tickers for the securities.
+
+        Returns:
+            A dictionary mapping every requested symbol (in request order) to either its live
+            quote or the ProviderAPIError raised while fetching it, a ValueError raised while
+            reading a single symbol is reported as a ProviderAPIError with its message.
+        """
+        unique_symbols = list(dict.fromkeys(symbols))
+        # imported here so that sync only users (i.e the cli) do not load asyncio
+        import asyncio
+
+        quotes = await asyncio.gather(
+            *(self.get_quote(symbol) for symbol in unique_symbols),
+            return_exceptions=True,
+        )
+
+        results: Dict[str, QuoteResult] = {}
+        for symbol, quote in zip(unique_symbols, quotes):
+            if isinstance(quote, (ProviderAPIError, ValueError)):
+                quote = _per_symbol_error(quote)
+            elif isinstance(quote, BaseException):
+                raise quote
+            results[symbol] = quote
+        return results
@@ -1,15 +1,22 @@
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-from requests import Response
+if TYPE_CHECKING:
+    from requests import Response
 
 
 class ProviderAPIError(Exception):
     def __init__(
-        self, response: Optional[Response] = None, message: Optional[str] = None
+        self, response: Optional["Response"] = None, message: Optional[str] = None
     ):
         self.response = response
         self.message = message
 
 
+class ProviderThrottleError(ProviderAPIError):
+    """The provider refused the call because the request quota was exceeded."""
+
+    pass
+
+
 class ConfigException(Exception):
     pass
@@ -0,0 +1,115 @@
+import time
+from datetime import date
+from threading import Lock
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from libs.common.quote import Quote
+from libs.providers.cache import CacheStats
+from libs.providers.client import Client as BaseClient
+from libs.providers.client import QuoteResult
+from libs.providers.exception import ProviderAPIError
+
+if TYPE_CHECKING:
+    from libs.common.fx import RateMatrix
+    from libs.common.history import PriceHistory
+
+DEFAULT_FX_TTL = 3600.0
+
+
+def _code(currency: str) -> str:
+    """Return the code of a currency given as a code or a Currency."""
+    return getattr(currency, "value", currency)
+
+
+class FxCachingClient(BaseClient):
+    def __init__(
+        self,
+        client: BaseClient,
+        ttl: float = DEFAULT_FX_TTL,
+        clock: Callable[[], float] = time.time,
+    ):
+        """Provider client decorator caching exchange rates for `ttl` seconds.
+
+        A fetched rate also caches the rate of the inverse pair. Provider errors are never
+        cached and every other call goes straight to the wrapped client.
+
+        Args:
+            client: the provider client to wrap
+            ttl: the number of seconds a rate is considered fresh
+            clock: function returning the current time in seconds since epoch
+        """
+        self.client = client
+        self.ttl = ttl
+        self.clock = clock
+        self.stats = CacheStats()
+        self._lock = Lock()
+        self._rates: Dict[Tuple[str, str], Tuple[float, float]] = {}
+
+    @property
+    def max_workers(self) -> int:
+        return self.client.max_workers
+
+    @property
+    def requests_per_minute(self) -> Optional[float]:
+        return self.client.requests_per_minute
+
+    def close(self):
+        self.client.close()
+
+    def get_quote(self, symbol: str) -> Quote:
+        return self.client.get_quote(symbol)
+
+    def iter_quotes(self, symbols: Iterable[str]) -> Iterator[Tuple[str, QuoteResult]]:
+        return self.client.iter_quotes(symbols)
+
+    def get_history(self, symbol: str, start: date, end: date) -> "PriceHistory":
+        return self.client.get_history(symbol, start, end)
+
+    def get_fx_rate(self, from_currency: str, to_currency: str) -> float:
+        pair = (_code(from_currency), _code(to_currency))
+        if pair[0] == pair[1]:
+            return 1.0
+        with self._lock:
+            entry = self._rates.get(pair)
+            if entry is not None and self.clock() - entry[0] < self.ttl:
+                self.stats.hits += 1
+                return entry[1]
+            self.stats.misses += 1
+
+        rate = self.client.get_fx_rate(*pair)
+        now = self.clock()
+        with self._lock:
+            self._rates[pair] = (now, rate)
+            if rate:
+                self._rates[(pair[1], pair[0])] = (now, 1 / rate)
+        return rate
+
+
+def fetch_rate_matrix(
+    client: BaseClient, currencies: Iterable[str], currency: str
+) -> Tuple["RateMatrix", Dict[str, ProviderAPIError]]:
+    """Fetch in one batch the rates needed to convert between currencies.
+
+    Every currency is fetched against `currency` (see Client.get_fx_rates), the other
+    cross rates are derived from them.
+
+    Args:
+        client: the provider client
+        currencies: the currencies to convert between
+        currency: the pivot currency, i.e the reporting currency
+
+    Returns:
+        A tuple (rates, errors) of the rate matrix of the currencies that could be fetched
+        and the currency -> ProviderAPIError of the others
+    """
+    from libs.common.fx import RateMatrix
+
+    currency = _code(currency)
+    rates, errors = {}, {}
+    results = client.get_fx_rates([_code(code) for code in currencies], currency)
+    for code, result in results.items():
+        if isinstance(result, ProviderAPIError):
+            errors[code] = result
+        else:
+            rates[code] = result
+    return RateMatrix.from_rates(currency, rates), errors
@@ -0,0 +1,147 @@
+import os
+from collections import defaultdict
+from datetime import date, timedelta
+from logging import getLogger
+from os import PathLike
+from threading import Lock
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote as quote_path
+
+import numpy as np
+
+from libs.common.history import PriceHistory, to_day
+from libs.common.quote import Quote
+from libs.providers.client import Client as BaseClient
+from libs.providers.client import QuoteResult
+
+logger = getLogger(__name__)
+
+HISTORY_DIR_NAME = ".history"
+
+Coverage = Tuple[np.datetime64, np.datetime64]
+
+
+def missing_ranges(
+    start: np.datetime64, end: np.datetime64, covered: Optional[Coverage]
+) -> List[Coverage]:
+    """Return the day ranges to fetch to cover start to end next to the covered range.
+
+    Ranges are extended to touch the covered range, so that the covered days stay
+    contiguous.
+    """
+    if covered is None:
+        return [(start, end)]
+    ranges = []
+    if start < covered[0]:
+        ranges.append((start, covered[0] - 1))
+    if end > covered[1]:
+        ranges.append((covered[1] + 1, end))
+    return ranges
+
+
+class HistoryCachingClient(BaseClient):
+    def __init__(
+        self,
+        client: BaseClient,
+        cache_dir: PathLike,
+        today: Callable[[], date] = date.today,
+    ):
+        """Provider client decorator caching daily histories on disk.
+
+        Every symbol has a columnar npz file (days, closes and the range of days covered
+        by previous fetches) in the `.history` folder of `cache_dir`. A history call only
+        fetches the days missing before and after the covered range, i.e one provider call
+        for the days elapsed since the last call. Today is never marked as covered, its
+        close is fetched again until the day is over.
+
+        Args:
+            client: the provider client to wrap
+            cache_dir: directory holding the history folder
+            today: function returning the current day
+        """
+        self.client = client
+        self.directory = os.path.join(cache_dir, HISTORY_DIR_NAME)
+        self.today = today
+        self.fetches = 0
+        self._lock = Lock()
+        self._symbol_locks: Dict[str, Lock] = defaultdict(Lock)
+
+    @property
+    def max_workers(self) -> int:
+        return self.client.max_workers
+
+    @property
+    def requests_per_minute(self) -> Optional[float]:
+        return self.client.requests_per_minute
+
+    def close(self):
+        self.client.close()
+
+    def get_quote(self, symbol: str) -> Quote:
+        return self.client.get_quote(symbol)
+
+    def iter_quotes(self, symbols: Iterable[str]) -> Iterator[Tuple[str, QuoteResult]]:
+        return self.client.iter_quotes(symbols)
+
+    def get_fx_rate(self, from_currency: str, to_currency: str) -> float:
+        return self.client.get_fx_rate(from_currency, to_currency)
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.directory, f"{quote_path(symbol, safe='')}.npz")
+
+    def _read(self, symbol: str) -> Tuple[Optional[PriceHistory], Optional[Coverage]]:
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return None, None
+        try:
+            with np.load(path) as data:
+                history = PriceHistory(
+                    data["dates"].astype("datetime64[D]"),
+                    data["closes"],
+                    str(data["currency"]),
+                )
+                covered = data["covered"].astype("datetime64[D]")
+        except (OSError, KeyError, ValueError) as ex:
+            logger.warning(f"Ignoring unreadable history cache {path}: {ex}")
+            return None, None
+        return history, (covered[0], covered[1])
+
+    def _write(self, symbol: str, history: PriceHistory, covered: Coverage):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(symbol)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            dates=history.dates.astype(np.int64),
+            closes=history.closes,
+            currency=np.array(history.currency),
+            covered=np.array(covered).astype(np.int64),
+        )
+        os.replace(tmp_path, path)
+
+    def get_history(self, symbol: str, start: date, end: date) -> PriceHistory:
+        start, end = to_day(start), to_day(end)
+        if end < start:
+            raise ValueError(f"History start {start} is after its end {end}")
+        last_complete_day = to_day(self.today() - timedelta(days=1))
+        with self._lock:
+            symbol_lock = self._symbol_locks[symbol]
+
+        with symbol_lock:
+            history, covered = self._read(symbol)
+            ranges = missing_ranges(start, end, covered)
+            for range_start, range_end in ranges:
+                fetched = self.client.get_history(
+                    symbol, range_start.item(), range_end.item()
+                )
+                with self._lock:
+                    self.fetches += 1
+                history = fetched if history is None else history.merge(fetched)
+
+            if ranges:
+                first, last = start, min(end, last_complete_day)
+                if covered is not None:
+                    first, last = min(first, covered[0]), max(last, covered[1])
+                if first <= last:
+                    self._write(symbol, history, (first, last))
+            return history.between(start, end)
@@ -0,0 +1,51 @@
+import asyncio
+from typing import Optional
+
+from libs.common.quote import Quote
+from libs.providers.client import DEFAULT_MAX_CONCURRENCY
+from libs.providers.client import AsyncClient as BaseAsyncClient
+from libs.providers.mock.client import Client, LatencyModel, mock_simulation_config
+
+
+class AsyncClient(BaseAsyncClient):
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        seed: Optional[int] = None,
+        latency: Optional[LatencyModel] = None,
+        error_rate: float = 0.0,
+        requests_per_minute: Optional[float] = None,
+    ):
+        """Async mock client, shares the quote/exception overrides of the sync mock client.
+
+        The simulated latency is awaited instead of blocking the event loop and at most
+        max_concurrency calls are in flight, see the sync mock client for the simulation
+        arguments.
+
+        Args:
+            max_concurrency: maximum number of calls in flight
+        """
+        self.max_concurrency = max_concurrency
+        self._client = Client(
+            seed=seed,
+            latency=latency,
+            error_rate=error_rate,
+            requests_per_minute=requests_per_minute,
+        )
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def close(self):
+        # the semaphore is bound to the event loop it is first awaited on
+        self._semaphore = None
+
+    async def get_quote(self, symbol: str) -> Quote:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            latency, outcome = self._client._simulate(symbol)
+            await asyncio.sleep(latency)
+            return outcome()
+
+
+def get_async_mock_client() -> BaseAsyncClient:
+    return AsyncClient(**mock_simulation_config())
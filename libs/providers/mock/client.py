@@ -1,42 +1,284 @@
+import math
+import os
+import time
+from datetime import date
 from logging import getLogger
-from random import randint
-from typing import Optional
+from random import Random, randint
+from threading import Lock
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
 
 from libs.common.currency import Currency
 from libs.common.quote import Quote
+from libs.providers.client import DEFAULT_MAX_WORKERS
 from libs.providers.client import Client as BaseClient
+from libs.providers.exception import ProviderAPIError, ProviderThrottleError
+from libs.providers.rate_limit import SECONDS_PER_MINUTE, TokenBucket
+
+if TYPE_CHECKING:
+    from libs.common.history import PriceHistory
 
 logger = getLogger(__name__)
 
+MOCK_PROVIDER_SEED = "MOCK_PROVIDER_SEED"
+MOCK_PROVIDER_LATENCY = "MOCK_PROVIDER_LATENCY"
+MOCK_PROVIDER_ERROR_RATE = "MOCK_PROVIDER_ERROR_RATE"
+MOCK_PROVIDER_REQUESTS_PER_MINUTE = "MOCK_PROVIDER_REQUESTS_PER_MINUTE"
+
+MIN_PRICE = 1.0
+MAX_PRICE = 1000.0
+
+# simulated price of one unit of every currency in USD
+USD_RATES: Dict[str, float] = {
+    Currency.USD.value: 1.0,
+    Currency.EUR.value: 1.08,
+    Currency.GBP.value: 1.27,
+    Currency.JPY.value: 0.0067,
+    Currency.CHF.value: 1.12,
+    Currency.CAD.value: 0.73,
+    Currency.AUD.value: 0.66,
+}
+
+LatencyModel = Callable[[Random], float]
+
+
+def fixed_latency(seconds: float) -> LatencyModel:
+    return lambda _: seconds
+
+
+def normal_latency(mean: float, stddev: float) -> LatencyModel:
+    return lambda rng: max(0.0, rng.gauss(mean, stddev))
+
+
+def long_tail_latency(median: float, sigma: float = 1.0) -> LatencyModel:
+    """Log-normal latency, most calls are close to the median but a few are much slower."""
+    return lambda rng: rng.lognormvariate(math.log(median), sigma)
+
+
+LATENCY_MODELS: Dict[str, Callable[..., LatencyModel]] = {
+    "fixed": fixed_latency,
+    "normal": normal_latency,
+    "long_tail": long_tail_latency,
+}
+
+
+def parse_latency(spec: str) -> LatencyModel:
+    """Build a latency model from a `name:arg,...` spec i.e `normal:0.05,0.01`.
+
+    Raises:
+        ValueError: unknown latency model or invalid arguments
+    """
+    name, _, args = spec.partition(":")
+    if name not in LATENCY_MODELS:
+        raise ValueError(
+            f"Unknown latency model {name!r}, expected one of {list(LATENCY_MODELS)}"
+        )
+    return LATENCY_MODELS[name](*[float(arg) for arg in args.split(",") if arg])
+
+
+def seeded_price(seed: int, symbol: str) -> float:
+    """Return the deterministic simulated price of a symbol for a seed."""
+    return round(Random(f"{seed}:{symbol}").uniform(MIN_PRICE, MAX_PRICE), 2)
+
 
 class Client(BaseClient):
     quote_value: Optional[float] = None
     exception: Optional[Exception] = None
+    history_exception: Optional[Exception] = None
+    fx_exception: Optional[Exception] = None
+    _override_lock = Lock()
 
     @classmethod
     def set_quote_value(cls, value: Optional[float] = None):
-        cls.quote_value = value
+        """Return `value` on the next quote call of any mock client."""
+        with cls._override_lock:
+            cls.quote_value = value
 
     @classmethod
     def set_exception(cls, exc: Optional[Exception] = None):
-        cls.exception = exc
+        """Raise `exc` on the next quote call of any mock client."""
+        with cls._override_lock:
+            cls.exception = exc
+
+    @classmethod
+    def set_history_exception(cls, exc: Optional[Exception] = None):
+        """Raise `exc` on the next history call of any mock client."""
+        with cls._override_lock:
+            cls.history_exception = exc
+
+    @classmethod
+    def set_fx_exception(cls, exc: Optional[Exception] = None):
+        """Raise `exc` on the next exchange rate call of any mock client."""
+        with cls._override_lock:
+            cls.fx_exception = exc
+
+    @classmethod
+    def _take_exception(cls, name: str) -> Optional[Exception]:
+        """Consume the pending exception override `name`, only one caller gets it."""
+        with cls._override_lock:
+            exception = getattr(cls, name)
+            setattr(cls, name, None)
+            return exception
+
+    @classmethod
+    def _take_override(cls) -> Tuple[Optional[Exception], Optional[float]]:
+        """Consume the pending overrides, only one caller gets each of them."""
+        with cls._override_lock:
+            if cls.exception is not None:
+                exception, cls.exception = cls.exception, None
+                return exception, None
+            value, cls.quote_value = cls.quote_value, None
+            return None, value
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        seed: Optional[int] = None,
+        latency: Optional[LatencyModel] = None,
+        error_rate: float = 0.0,
+        requests_per_minute: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """Mock provider client simulating a real provider for tests and load tests.
+
+        Without a seed, prices are random on every call. With a seed, every symbol has a
+        fixed price derived from the seed and the symbol, and latencies and errors are
+        drawn from a generator seeded with it.
+
+        Args:
+            max_workers: maximum number of concurrent quote calls in get_quotes
+            seed: seed of the simulated prices, latencies and errors
+            latency: latency model of a quote call, no latency if None
+            error_rate: probability of a quote call failing with ProviderAPIError
+            requests_per_minute: calls over this rate fail with ProviderThrottleError
+            clock: monotonic clock used by the throttle simulation
+            sleep: function used to wait for the simulated latency
+        """
+        self.max_workers = max_workers
+        self.seed = seed
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests_per_minute = requests_per_minute
+        self.clock = clock
+        self.sleep = sleep
+        self.calls = 0
+        self._lock = Lock()
+        self._rng = Random(seed)
+        self._bucket = (
+            TokenBucket(requests_per_minute, SECONDS_PER_MINUTE, clock())
+            if requests_per_minute
+            else None
+        )
+
+    def price(self, symbol: str) -> float:
+        """Return the simulated price of a symbol."""
+        if self.seed is None:
+            return float(randint(0, 1000))
+        return seeded_price(self.seed, symbol)
+
+    def _simulate(self, symbol: str) -> Tuple[float, Callable[[], Quote]]:
+        """Draw the outcome of a quote call, the quote overrides take precedence.
+
+        Returns:
+            A tuple (latency, outcome) where outcome returns the quote or raises the
+            simulated error, to be called once the latency has elapsed
+        """
+        exception, value = self._take_override()
+        if exception is not None:
+            return 0.0, _raise(exception)
+        if value is not None:
+            return 0.0, lambda: Quote(float(value), Currency.USD)
+        return self._draw(symbol)
+
+    def _draw(self, symbol: str) -> Tuple[float, Callable[[], Quote]]:
+        """Draw the simulated latency, throttling and error of a call, see _simulate."""
+        with self._lock:
+            self.calls += 1
+            latency = self.latency(self._rng) if self.latency is not None else 0.0
+            if self._bucket is not None:
+                if self._bucket.delay(self.clock()) > 0:
+                    return latency, _raise(
+                        ProviderThrottleError(
+                            message="Simulated throttle: request quota exceeded"
+                        )
+                    )
+                self._bucket.take()
+            if self.error_rate and self._rng.random() < self.error_rate:
+                return latency, _raise(
+                    ProviderAPIError(message=f"Simulated provider error for {symbol}")
+                )
+        return latency, lambda: Quote(self.price(symbol), Currency.USD)
+
+    def _simulate_call(
+        self, override: str, symbol: str
+    ) -> Tuple[float, Callable[[], Quote]]:
+        """Draw the outcome of a non quote call, the `override` exception takes precedence."""
+        exception = self._take_exception(override)
+        if exception is not None:
+            return 0.0, _raise(exception)
+        return self._draw(symbol)
+
+    def get_quote(self, symbol: str) -> Quote:
+        latency, outcome = self._simulate(symbol)
+        if latency > 0:
+            self.sleep(latency)
+        return outcome()
+
+    def get_history(self, symbol: str, start: date, end: date) -> "PriceHistory":
+        """Return the synthetic history of the symbol, see synthetic_history.
+
+        A history call is simulated (latency, errors, throttling) like a quote call but
+        only consumes the history override, see set_history_exception.
+        """
+        # imported here so that quote only users (i.e the cli) do not load numpy
+        from libs.providers.mock.history import synthetic_history
+
+        latency, outcome = self._simulate_call("history_exception", symbol)
+        if latency > 0:
+            self.sleep(latency)
+        outcome()
+        return synthetic_history(self.seed or 0, symbol, start, end, Currency.USD.value)
+
+    def get_fx_rate(self, from_currency: str, to_currency: str) -> float:
+        """Return the simulated rate from the USD_RATES table.
+
+        A rate call is simulated (latency, errors, throttling) like a quote call but
+        only consumes the rate override, see set_fx_exception.
+        """
+        latency, outcome = self._simulate_call(
+            "fx_exception", f"{from_currency}/{to_currency}"
+        )
+        if latency > 0:
+            self.sleep(latency)
+        outcome()
+        try:
+            return USD_RATES[from_currency] / USD_RATES[to_currency]
+        except KeyError as ex:
+            raise ProviderAPIError(message=f"Simulated unknown currency {ex}")
+
 
-    def __init__(self):
-        pass
+def _raise(exception: Exception) -> Callable[[], Quote]:
+    def outcome() -> Quote:
+        raise exception
 
-    def get_quote(self, _: str) -> Quote:
-        if self.exception is not None:
-            exception = self.exception
-            self.set_exception(None)
-            raise exception
+    return outcome
 
-        if self.quote_value is not None:
-            value = self.quote_value
-            self.set_quote_value(None)
-            return Quote(float(value), Currency.USD)
 
-        return Quote(float(randint(0, 1000)), Currency.USD)
+def mock_simulation_config() -> Dict:
+    """Read the mock client simulation settings from the environment."""
+    config = {}
+    if MOCK_PROVIDER_SEED in os.environ:
+        config["seed"] = int(os.environ[MOCK_PROVIDER_SEED])
+    if MOCK_PROVIDER_LATENCY in os.environ:
+        config["latency"] = parse_latency(os.environ[MOCK_PROVIDER_LATENCY])
+    if MOCK_PROVIDER_ERROR_RATE in os.environ:
+        config["error_rate"] = float(os.environ[MOCK_PROVIDER_ERROR_RATE])
+    if MOCK_PROVIDER_REQUESTS_PER_MINUTE in os.environ:
+        config["requests_per_minute"] = float(
+            os.environ[MOCK_PROVIDER_REQUESTS_PER_MINUTE]
+        )
+    return config
 
 
 def get_mock_client() -> BaseClient:
-    return Client()
+    return Client(**mock_simulation_config())
@@ -0,0 +1,49 @@
+import zlib
+
+import numpy as np
+
+from libs.common.history import DateLike, PriceHistory, to_day
+from libs.providers.mock.client import MAX_PRICE, MIN_PRICE
+
+DAILY_VOLATILITY = 0.02
+# the synthetic random walk starts at the price drawn for the seed on this day
+ANCHOR_DAY = np.datetime64("2000-01-03", "D")
+
+
+def _daily_noise(seed: int, symbol: str, days: np.ndarray) -> np.ndarray:
+    """Deterministic standard normal draws, one per (seed, symbol, day)."""
+    key = np.uint64(zlib.crc32(f"{seed}:{symbol}".encode()))
+    x = days.astype(np.int64).astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15) + key
+    # splitmix64 finalizer, then two uniforms mapped to a normal (box-muller)
+    with np.errstate(over="ignore"):
+        x ^= x >> np.uint64(30)
+        x *= np.uint64(0xBF58476D1CE4E5B9)
+        x ^= x >> np.uint64(27)
+        x *= np.uint64(0x94D049BB133111EB)
+        x ^= x >> np.uint64(31)
+    u1 = ((x >> np.uint64(32)).astype(np.float64) + 1) / 2.0**32
+    u2 = (x & np.uint64(0xFFFFFFFF)).astype(np.float64) / 2.0**32
+    return np.sqrt(-2 * np.log(u1)) * np.cos(2 * np.pi * u2)
+
+
+def synthetic_history(
+    seed: int, symbol: str, start: DateLike, end: DateLike, currency: str
+) -> PriceHistory:
+    """Return the deterministic synthetic daily closes of a symbol for a seed.
+
+    Closes follow a log-normal random walk over business days from ANCHOR_DAY, the close
+    of a day only depends on the seed, the symbol and the day so any range of the series
+    is consistent with any other.
+    """
+    start, end = max(to_day(start), ANCHOR_DAY), to_day(end)
+    if end < start:
+        return PriceHistory.empty(currency)
+    days = np.arange(ANCHOR_DAY, end + 1, dtype="datetime64[D]")
+    days = days[np.is_busday(days)]
+    returns = DAILY_VOLATILITY * _daily_noise(seed, symbol, days)
+    initial = MIN_PRICE + (MAX_PRICE - MIN_PRICE) * (
+        (zlib.crc32(f"{seed}:{symbol}:initial".encode()) % 10_000) / 10_000
+    )
+    closes = np.round(initial * np.exp(np.cumsum(returns)), 2)
+    selected = days >= start
+    return PriceHistory(days[selected], closes[selected], currency)
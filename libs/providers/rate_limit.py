@@ -0,0 +1,174 @@
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from threading import Condition
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from libs.providers.exception import ProviderThrottleError
+
+SECONDS_PER_MINUTE = 60.0
+SECONDS_PER_DAY = 86400.0
+
+
+class Priority(IntEnum):
+    """Provider request priority, lower values are served first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+_request_priority: ContextVar[Priority] = ContextVar(
+    "provider_request_priority", default=Priority.INTERACTIVE
+)
+
+
+@contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    """Run provider calls made in this context with a specific priority.
+
+    i.e background refreshes should run under `request_priority(Priority.BACKGROUND)` so that
+    interactive requests queued at the same time are sent first.
+
+    Args:
+        priority: the priority of provider calls made in the context
+    """
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, period: float, now: float):
+        """Token bucket allowing `capacity` requests per `period` seconds.
+
+        Args:
+            capacity: the maximum number of tokens, i.e the allowed burst
+            period: the number of seconds needed to refill an empty bucket
+            now: the current time in seconds
+        """
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Return the number of seconds until a token is available."""
+        self.refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class RequestScheduler:
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        requests_per_day: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Thread safe token bucket scheduler for outgoing provider requests.
+
+        Callers queue in `acquire` until both the per minute and per day budgets allow a
+        request. Queued interactive requests are always released before background ones,
+        requests with the same priority are released in arrival order.
+
+        Args:
+            requests_per_minute: sustained (and burst) number of requests per minute
+            requests_per_day: number of requests per day
+            clock: monotonic clock in seconds
+        """
+        self.clock = clock
+        now = clock()
+        self.minute_bucket = (
+            TokenBucket(requests_per_minute, SECONDS_PER_MINUTE, now)
+            if requests_per_minute
+            else None
+        )
+        self.day_bucket = (
+            TokenBucket(requests_per_day, SECONDS_PER_DAY, now)
+            if requests_per_day
+            else None
+        )
+        self.blocked_until = now
+        self._condition = Condition()
+        self._waiters: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+
+    @property
+    def requests_per_minute(self) -> Optional[float]:
+        """The sustained number of requests per minute both budgets allow."""
+        rates = [
+            bucket.rate * SECONDS_PER_MINUTE
+            for bucket in (self.minute_bucket, self.day_bucket)
+            if bucket is not None
+        ]
+        return min(rates) if rates else None
+
+    def _delay(self, now: float) -> float:
+        if self.day_bucket is not None and self.day_bucket.delay(now) > 0:
+            raise ProviderThrottleError(
+                message="Market Provider daily request quota exhausted"
+            )
+        delay = self.blocked_until - now
+        if self.minute_bucket is not None:
+            delay = max(delay, self.minute_bucket.delay(now))
+        return delay
+
+    def acquire(self, priority: Optional[Priority] = None):
+        """Block until a request can be sent.
+
+        Args:
+            priority: request priority, defaults to the priority of the current context
+
+        Raises:
+            ProviderThrottleError: the daily quota is exhausted
+        """
+        if priority is None:
+            priority = _request_priority.get()
+        ticket = (int(priority), next(self._sequence))
+        with self._condition:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    if self._waiters[0] != ticket:
+                        self._condition.wait()
+                        continue
+                    delay = self._delay(self.clock())
+                    if delay <= 0:
+                        break
+                    self._condition.wait(delay)
+
+                if self.minute_bucket is not None:
+                    self.minute_bucket.take()
+                if self.day_bucket is not None:
+                    self.day_bucket.take()
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+
+    def backoff(self, seconds: float):
+        """Hold every queued request for `seconds`, i.e after the provider throttled a call.
+
+        Args:
+            seconds: the number of seconds to wait before sending the next request
+        """
+        with self._condition:
+            now = self.clock()
+            self.blocked_until = max(self.blocked_until, now + seconds)
+            if self.minute_bucket is not None:
+                self.minute_bucket.refill(now)
+                self.minute_bucket.tokens = min(self.minute_bucket.tokens, 0)
+            self._condition.notify_all()
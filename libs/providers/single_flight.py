@@ -0,0 +1,77 @@
+from datetime import date
+from threading import Event, Lock
+from typing import TYPE_CHECKING, Dict, Optional
+
+from libs.common.quote import Quote
+from libs.providers.client import Client as BaseClient
+
+if TYPE_CHECKING:
+    from libs.common.history import PriceHistory
+
+
+class _Call:
+    """An in-flight upstream quote call shared by every concurrent caller."""
+
+    def __init__(self):
+        self.done = Event()
+        self.result: Optional[Quote] = None
+        self.exception: Optional[Exception] = None
+
+
+class SingleFlightClient(BaseClient):
+    def __init__(self, client: BaseClient):
+        """Provider client decorator coalescing concurrent quote calls per symbol.
+
+        While a quote call for a symbol is in flight, other callers asking for the same symbol
+        wait for it and share its quote or exception instead of issuing their own call.
+
+        Args:
+            client: the provider client to wrap
+        """
+        self.client = client
+        self.coalesced = 0
+        self._lock = Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    @property
+    def max_workers(self) -> int:
+        return self.client.max_workers
+
+    @property
+    def requests_per_minute(self) -> Optional[float]:
+        return self.client.requests_per_minute
+
+    def close(self):
+        self.client.close()
+
+    def get_history(self, symbol: str, start: date, end: date) -> "PriceHistory":
+        return self.client.get_history(symbol, start, end)
+
+    def get_fx_rate(self, from_currency: str, to_currency: str) -> float:
+        return self.client.get_fx_rate(from_currency, to_currency)
+
+    def get_quote(self, symbol: str) -> Quote:
+        with self._lock:
+            call = self._calls.get(symbol)
+            leader = call is None
+            if leader:
+                call = self._calls[symbol] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.result
+
+        try:
+            call.result = self.client.get_quote(symbol)
+        except Exception as ex:
+            call.exception = ex
+            raise
+        finally:
+            with self._lock:
+                del self._calls[symbol]
+            call.done.set()
+        return call.result
@@ -0,0 +1,158 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+from libs.common.currency import Currency
+from libs.common.quote import Quote
+from libs.providers import AsyncClientFactory, ClientType
+from libs.providers.exception import ProviderAPIError, ProviderThrottleError
+from libs.providers.mock.async_client import AsyncClient as MockAsyncClient
+from libs.providers.mock.client import Client as MockClient
+from libs.providers.mock.client import parse_latency
+from libs.providers.vantage.async_client import AsyncClient as VantageAsyncClient
+
+
+def test_mock_factory_instance():
+    assert isinstance(AsyncClientFactory[ClientType.MOCK](), MockAsyncClient)
+
+
+def test_mock_get_quotes():
+    """
+    Test getting quotes for many symbols from the async mock client
+    """
+
+    async def run():
+        async with AsyncClientFactory[ClientType.MOCK]() as client:
+            MockClient.set_exception(ProviderAPIError(message="Fake Provider error"))
+            return await client.get_quotes(["GOOGL", "MSFT", "GOOGL"])
+
+    quotes = asyncio.run(run())
+    assert list(quotes.keys()) == ["GOOGL", "MSFT"]
+    assert isinstance(quotes["GOOGL"], ProviderAPIError)
+    assert isinstance(quotes["MSFT"], Quote)
+    assert quotes["MSFT"].currency == Currency.USD
+
+
+def test_mock_get_quotes_value_error_is_returned_per_symbol():
+    """
+    Test a symbol whose response cannot be read does not abort the rest of the batch
+    """
+
+    class Unreadable(MockAsyncClient):
+        async def get_quote(self, symbol: str) -> Quote:
+            if symbol == "BAD":
+                raise ValueError("Unreadable quote")
+            return await super().get_quote(symbol)
+
+    quotes = asyncio.run(Unreadable(seed=1).get_quotes(["BAD", "MSFT"]))
+    assert isinstance(quotes["BAD"], ProviderAPIError)
+    assert quotes["BAD"].message == "Unreadable quote"
+    assert isinstance(quotes["MSFT"], Quote)
+
+
+async def run_against_stub(handler, coroutine):
+    app = web.Application()
+    app.router.add_get("/query", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        return await coroutine(f"http://127.0.0.1:{port}")
+    finally:
+        await runner.cleanup()
+
+
+def test_vantage_get_quotes_bounded_concurrency():
+    """
+    Test the async vantage client prices many symbols with bounded concurrency
+    """
+    in_flight = {"current": 0, "max": 0}
+
+    async def handler(request):
+        in_flight["current"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["current"])
+        await asyncio.sleep(0.01)
+        in_flight["current"] -= 1
+        if request.query["symbol"] == "BAD":
+            return web.json_response({})
+        return web.json_response({"Global Quote": {"05. price": "12.5"}})
+
+    async def run(base_url):
+        async with VantageAsyncClient("key", base_url, max_concurrency=5) as client:
+            return await client.get_quotes([f"SYM{i}" for i in range(50)] + ["BAD"])
+
+    quotes = asyncio.run(run_against_stub(handler, run))
+    assert len(quotes) == 51
+    assert isinstance(quotes["BAD"], ProviderAPIError)
+    assert all(quotes[f"SYM{i}"].price == 12.5 for i in range(50))
+    assert in_flight["max"] == 5
+
+
+def test_vantage_retries_transient_errors():
+    """
+    Test the async vantage client retries transient 5xx responses
+    """
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            return web.Response(status=503)
+        return web.json_response({"Global Quote": {"05. price": "1.5"}})
+
+    async def run(base_url):
+        async with VantageAsyncClient("key", base_url, backoff_factor=0) as client:
+            return await client.get_quote("GOOGL")
+
+    assert asyncio.run(run_against_stub(handler, run)).price == 1.5
+    assert len(calls) == 2
+
+
+def test_vantage_throttle_note():
+    async def handler(_):
+        return web.json_response(
+            {"Note": "Our standard API call frequency is 5 calls per minute"}
+        )
+
+    async def run(base_url):
+        async with VantageAsyncClient("key", base_url) as client:
+            return await client.get_quote("GOOGL")
+
+    with pytest.raises(ProviderThrottleError):
+        asyncio.run(run_against_stub(handler, run))
+
+
+def test_mock_latency_is_awaited():
+    """
+    Test the async mock client awaits the simulated latency of concurrent calls
+    """
+
+    async def run():
+        client = MockAsyncClient(seed=1, latency=parse_latency("fixed:0.05"))
+        start = time.perf_counter()
+        quotes = await client.get_quotes([f"SYM{i}" for i in range(20)])
+        return quotes, time.perf_counter() - start
+
+    quotes, elapsed = asyncio.run(run())
+    assert len(quotes) == 20
+    assert elapsed < 0.5
+
+
+def test_mock_get_quotes_bounded_concurrency():
+    """
+    Test the async mock client keeps at most max_concurrency calls in flight
+    """
+
+    async def run():
+        async with MockAsyncClient(
+            max_concurrency=2, seed=1, latency=parse_latency("fixed:0.05")
+        ) as client:
+            start = time.perf_counter()
+            await client.get_quotes([f"SYM{i}" for i in range(6)])
+            return time.perf_counter() - start
+
+    assert asyncio.run(run()) >= 0.15
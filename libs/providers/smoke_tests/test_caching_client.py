@@ -0,0 +1,110 @@
+import pytest
+
+from libs.common.quote import Quote
+from libs.providers.cache import CachingClient
+from libs.providers.exception import ProviderAPIError
+from libs.providers.mock.client import Client
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_quote_is_cached_until_ttl_expires(clock):
+    """
+    Test a cached quote is served until its ttl expires
+    """
+    client = CachingClient(Client(), ttl=10, clock=clock)
+    Client.set_quote_value(10.0)
+    assert client.get_quote("GOOGL").price == 10.0
+
+    Client.set_quote_value(20.0)
+    assert client.get_quote("GOOGL").price == 10.0
+    assert client.stats.hits == 1
+    assert client.stats.misses == 1
+
+    clock.now += 10
+    assert client.get_quote("GOOGL").price == 20.0
+    assert client.stats.misses == 2
+
+
+def test_errors_are_not_cached(clock):
+    """
+    Test a provider error is raised and not cached
+    """
+    client = CachingClient(Client(), ttl=10, clock=clock)
+    Client.set_exception(ProviderAPIError(message="Fake Provider error"))
+    with pytest.raises(ProviderAPIError):
+        client.get_quote("GOOGL")
+    assert isinstance(client.get_quote("GOOGL"), Quote)
+    assert client.stats.misses == 2
+
+
+def test_lru_eviction(clock):
+    """
+    Test the least recently used symbol is evicted when the cache is full
+    """
+    client = CachingClient(Client(), ttl=10, max_size=2, clock=clock)
+    client.get_quote("GOOGL")
+    client.get_quote("MSFT")
+    client.get_quote("GOOGL")
+    client.get_quote("AAPL")
+    assert client.stats.evictions == 1
+
+    client.get_quote("GOOGL")
+    assert client.stats.hits == 2
+    client.get_quote("MSFT")
+    assert client.stats.misses == 4
+
+
+def test_get_quotes_only_fetches_missing_symbols(clock):
+    """
+    Test batch quotes are served from the cache and only misses are fetched
+    """
+    client = CachingClient(Client(), ttl=10, clock=clock)
+    first = client.get_quote("GOOGL")
+    quotes = client.get_quotes(["GOOGL", "MSFT", "GOOGL"])
+    assert list(quotes.keys()) == ["GOOGL", "MSFT"]
+    assert quotes["GOOGL"] == first
+    assert client.stats.hits == 1
+    assert client.stats.misses == 2
+
+
+def test_disk_cache_survives_new_client(clock, tmp_path):
+    """
+    Test quotes are persisted on disk and reloaded by a new client
+    """
+    client = CachingClient(Client(), ttl=10, cache_dir=tmp_path, clock=clock)
+    Client.set_quote_value(42.0)
+    client.get_quote("GOOGL")
+
+    client = CachingClient(Client(), ttl=10, cache_dir=tmp_path, clock=clock)
+    assert client.get_quote("GOOGL").price == 42.0
+    assert client.stats.hits == 1
+
+    clock.now += 10
+    client = CachingClient(Client(), ttl=10, cache_dir=tmp_path, clock=clock)
+    client.get_quote("GOOGL")
+    assert client.stats.misses == 1
+
+
+def test_iter_quotes_serves_hits_first():
+    """
+    Test streamed quotes yield cache hits before fetching the missing symbols
+    """
+    client = CachingClient(Client(seed=1), ttl=60)
+    client.get_quote("GOOGL")
+    results = list(client.iter_quotes(["MSFT", "GOOGL", "MSFT"]))
+    assert [symbol for symbol, _ in results] == ["GOOGL", "MSFT"]
+    assert client.stats.hits == 1
+    assert client.stats.misses == 2
+    assert client.get_quote("MSFT") == results[1][1]
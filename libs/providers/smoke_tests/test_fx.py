@@ -0,0 +1,57 @@
+import math
+
+import pytest
+
+from libs.providers.exception import ProviderAPIError
+from libs.providers.fx import FxCachingClient, fetch_rate_matrix
+from libs.providers.mock.client import Client
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_rate_and_inverse_are_cached_until_ttl_expires():
+    """
+    Test a fetched rate and its inverse are served from the cache until the ttl expires
+    """
+    clock = FakeClock()
+    mock = Client(seed=1)
+    client = FxCachingClient(mock, ttl=10, clock=clock)
+    assert client.get_fx_rate("EUR", "USD") == pytest.approx(1.08)
+    assert client.get_fx_rate("USD", "EUR") == pytest.approx(1 / 1.08)
+    assert client.get_fx_rate("USD", "USD") == 1.0
+    assert mock.calls == 1
+    assert client.stats.hits == 1
+
+    clock.now += 10
+    client.get_fx_rate("USD", "EUR")
+    assert mock.calls == 2
+
+
+def test_errors_are_not_cached():
+    """
+    Test a provider error is raised and the rate fetched again on the next call
+    """
+    client = FxCachingClient(Client(seed=1))
+    Client.set_fx_exception(ProviderAPIError(message="Fake Provider error"))
+    with pytest.raises(ProviderAPIError):
+        client.get_fx_rate("EUR", "USD")
+    assert client.get_fx_rate("EUR", "USD") == pytest.approx(1.08)
+
+
+def test_fetch_rate_matrix_derives_cross_rates():
+    """
+    Test one batch of rates to the pivot currency gives every cross rate
+    """
+    mock = Client(seed=1)
+    rates, errors = fetch_rate_matrix(mock, ["EUR", "GBP", "JPY", "XXX"], "USD")
+    assert mock.calls == 4
+    assert list(errors) == ["XXX"]
+    assert rates.rate("EUR", "GBP") == pytest.approx(1.08 / 1.27)
+    assert rates.rate("GBP", "JPY") == pytest.approx(1.27 / 0.0067)
+    assert math.isnan(rates.rate("XXX", "USD"))
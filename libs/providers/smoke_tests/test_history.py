@@ -0,0 +1,142 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from libs.common.history import PriceHistory
+from libs.providers.exception import ProviderAPIError
+from libs.providers.history import (
+    HISTORY_DIR_NAME,
+    HistoryCachingClient,
+    missing_ranges,
+)
+from libs.providers.mock.client import Client
+from libs.providers.mock.history import synthetic_history
+from libs.providers.vantage.client import Client as VantageClient
+from libs.providers.vantage.stub import StubServer
+
+
+class RecordingClient(Client):
+    """Mock client recording the requested history ranges."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.ranges = []
+
+    def get_history(self, symbol, start, end):
+        self.ranges.append((symbol, start, end))
+        return super().get_history(symbol, start, end)
+
+
+def day(value: str) -> np.datetime64:
+    return np.datetime64(value, "D")
+
+
+def test_missing_ranges():
+    start, end = day("2024-01-10"), day("2024-01-20")
+    assert missing_ranges(start, end, None) == [(start, end)]
+    assert missing_ranges(start, end, (day("2024-01-01"), day("2024-01-31"))) == []
+    assert missing_ranges(start, end, (day("2024-01-12"), day("2024-01-15"))) == [
+        (start, day("2024-01-11")),
+        (day("2024-01-16"), end),
+    ]
+    # the gap after a covered range older than the request is fetched as well
+    assert missing_ranges(start, end, (day("2024-01-01"), day("2024-01-05"))) == [
+        (day("2024-01-06"), end)
+    ]
+
+
+def test_synthetic_history_is_consistent_across_ranges():
+    full = synthetic_history(1, "AAPL", "2023-01-01", "2023-12-31", "USD")
+    part = synthetic_history(1, "AAPL", "2023-06-01", "2023-06-30", "USD")
+    assert len(full) == 260
+    assert not np.is_busday(np.datetime64("2023-06-03")) and len(part) == 22
+    assert np.array_equal(full.between("2023-06-01", "2023-06-30").closes, part.closes)
+    assert np.all(full.closes > 0)
+    other = synthetic_history(2, "AAPL", "2023-06-01", "2023-06-30", "USD")
+    assert not np.array_equal(part.closes, other.closes)
+    assert len(synthetic_history(1, "AAPL", "2023-06-30", "2023-06-01", "USD")) == 0
+
+
+def test_history_cache_only_fetches_missing_days(tmp_path):
+    client = RecordingClient(seed=1)
+    cache = HistoryCachingClient(client, tmp_path, today=lambda: date(2024, 3, 1))
+
+    history = cache.get_history("AAPL", date(2023, 1, 1), date(2023, 12, 31))
+    expected = synthetic_history(1, "AAPL", "2023-01-01", "2023-12-31", "USD")
+    assert np.array_equal(history.dates, expected.dates)
+    assert np.array_equal(history.closes, expected.closes)
+
+    cache.get_history("AAPL", date(2023, 3, 1), date(2023, 3, 31))
+    cache.get_history("AAPL", date(2023, 6, 1), date(2024, 1, 5))
+    assert client.ranges == [
+        ("AAPL", date(2023, 1, 1), date(2023, 12, 31)),
+        ("AAPL", date(2024, 1, 1), date(2024, 1, 5)),
+    ]
+    assert cache.fetches == 2
+
+    # a new cache (i.e another process) reads the covered range from disk
+    cache = HistoryCachingClient(client, tmp_path, today=lambda: date(2024, 3, 1))
+    history = cache.get_history("AAPL", date(2022, 12, 1), date(2024, 1, 5))
+    assert client.ranges[-1] == ("AAPL", date(2022, 12, 1), date(2022, 12, 31))
+    assert history.dates[0] == day("2022-12-01")
+    assert history.dates[-1] == day("2024-01-05")
+
+
+def test_history_cache_refetches_today(tmp_path):
+    client = RecordingClient(seed=1)
+    cache = HistoryCachingClient(client, tmp_path, today=lambda: date(2024, 3, 1))
+    cache.get_history("AAPL", date(2024, 2, 1), date(2024, 3, 1))
+    cache.get_history("AAPL", date(2024, 2, 1), date(2024, 3, 1))
+    cache.get_history("AAPL", date(2024, 3, 1), date(2024, 3, 1))
+    assert client.ranges[1:] == [
+        ("AAPL", date(2024, 3, 1), date(2024, 3, 1)),
+        ("AAPL", date(2024, 3, 1), date(2024, 3, 1)),
+    ]
+
+
+def test_history_cache_ignores_unreadable_file(tmp_path):
+    client = RecordingClient(seed=1)
+    cache = HistoryCachingClient(client, tmp_path, today=lambda: date(2024, 3, 1))
+    (tmp_path / HISTORY_DIR_NAME).mkdir()
+    (tmp_path / HISTORY_DIR_NAME / "AAPL.npz").write_bytes(b"not a npz file")
+    history = cache.get_history("AAPL", date(2024, 1, 1), date(2024, 1, 31))
+    assert len(history) == 23
+    assert len(client.ranges) == 1
+
+
+def test_history_cache_errors(tmp_path):
+    cache = HistoryCachingClient(Client(seed=1), tmp_path)
+    with pytest.raises(ValueError):
+        cache.get_history("AAPL", date(2024, 2, 1), date(2024, 1, 1))
+    Client.set_history_exception(ProviderAPIError(message="Fake Provider error"))
+    with pytest.raises(ProviderAPIError):
+        cache.get_history("AAPL", date(2024, 1, 1), date(2024, 1, 31))
+    assert not (tmp_path / HISTORY_DIR_NAME).exists()
+
+
+def test_get_histories():
+    Client.set_history_exception(ProviderAPIError(message="Fake Provider error"))
+    results = Client(seed=1, max_workers=1).get_histories(
+        ["AAPL", "MSFT", "AAPL"], date(2024, 1, 1), date(2024, 1, 31)
+    )
+    assert list(results) == ["AAPL", "MSFT"]
+    assert isinstance(results["AAPL"], ProviderAPIError)
+    assert isinstance(results["MSFT"], PriceHistory)
+
+
+def test_vantage_daily_series():
+    with StubServer(seed=3) as stub:
+        client = VantageClient("key", stub.url)
+        today = date.today()
+        recent = client.get_history(
+            "GOOGL", date.fromordinal(today.toordinal() - 30), today
+        )
+        old = client.get_history("GOOGL", date(2020, 1, 1), date(2020, 1, 31))
+        expected = synthetic_history(3, "GOOGL", "2020-01-01", "2020-01-31", "USD")
+        assert np.array_equal(old.dates, expected.dates)
+        assert np.allclose(old.closes, expected.closes)
+        assert 0 < len(recent) <= 23
+        with pytest.raises(ProviderAPIError):
+            client.get_history("BAD_SYMBOL", date(2020, 1, 1), date(2020, 1, 31))
+        client.close()
@@ -1,10 +1,14 @@
+import time
+from datetime import date
+from random import Random
+
 import pytest
 
 from libs.common.currency import Currency
 from libs.common.quote import Quote
 from libs.providers import ClientFactory, ClientType
-from libs.providers.exception import ProviderAPIError
-from libs.providers.mock.client import Client
+from libs.providers.exception import ProviderAPIError, ProviderThrottleError
+from libs.providers.mock.client import Client, normal_latency, parse_latency
 
 client_generator = ClientFactory[ClientType.MOCK]
 
@@ -46,3 +50,166 @@ def test_get_quote_specific_value():
     assert quote.currency == Currency.USD
     assert isinstance(quote.price, float)
     assert quote.price == 10.0
+
+
+def test_get_quotes():
+    """
+    Test getting quotes for many symbols from mock client, duplicates are fetched once
+    """
+    client = client_generator()
+    quotes = client.get_quotes(["GOOGL", "MSFT", "GOOGL", "AAPL"])
+    assert list(quotes.keys()) == ["GOOGL", "MSFT", "AAPL"]
+    for quote in quotes.values():
+        assert isinstance(quote, Quote)
+        assert quote.currency == Currency.USD
+
+
+def test_get_quotes_empty():
+    """
+    Test getting quotes for no symbols from mock client
+    """
+    client = client_generator()
+    assert client.get_quotes([]) == {}
+
+
+def test_get_quotes_error_is_returned_per_symbol():
+    """
+    Test getting quotes from mock client returns provider errors instead of raising them
+    """
+    client = Client(max_workers=1)
+    Client.set_exception(ProviderAPIError(message="Fake Provider error"))
+    quotes = client.get_quotes(["GOOGL", "MSFT"])
+    assert isinstance(quotes["GOOGL"], ProviderAPIError)
+    assert isinstance(quotes["MSFT"], Quote)
+
+
+def test_get_quotes_value_error_is_returned_per_symbol():
+    """
+    Test a symbol whose response cannot be read does not abort the rest of the batch
+    """
+
+    class Unreadable(Client):
+        def get_quote(self, symbol: str) -> Quote:
+            if symbol == "BAD":
+                raise ValueError("Unreadable quote")
+            return super().get_quote(symbol)
+
+    client = Unreadable(seed=1)
+    quotes = client.get_quotes(["BAD", "MSFT"])
+    assert isinstance(quotes["BAD"], ProviderAPIError)
+    assert quotes["BAD"].message == "Unreadable quote"
+    assert isinstance(quotes["MSFT"], Quote)
+    assert isinstance(dict(client.iter_quotes(["BAD"]))["BAD"], ProviderAPIError)
+
+
+def test_quote_overrides_are_not_consumed_by_history_and_fx():
+    """
+    Test history and rate calls leave the quote overrides to the next quote call
+    """
+    client = Client(seed=1)
+    Client.set_exception(ProviderAPIError(message="Fake Provider error"))
+    client.get_history("GOOGL", date(2024, 1, 1), date(2024, 1, 31))
+    assert client.get_fx_rate("USD", "USD") == 1.0
+    with pytest.raises(ProviderAPIError):
+        client.get_quote("GOOGL")
+
+    Client.set_history_exception(ProviderAPIError(message="Fake Provider error"))
+    Client.set_fx_exception(ProviderAPIError(message="Fake Provider error"))
+    assert isinstance(client.get_quote("GOOGL"), Quote)
+    with pytest.raises(ProviderAPIError):
+        client.get_history("GOOGL", date(2024, 1, 1), date(2024, 1, 31))
+    with pytest.raises(ProviderAPIError):
+        client.get_fx_rate("USD", "USD")
+
+
+def test_client_is_shared_per_process():
+    """
+    Test the factory hands out the same client instance on every call
+    """
+    assert client_generator() is client_generator()
+
+
+def test_seeded_prices_are_deterministic():
+    """
+    Test seeded mock clients return the same price for a symbol on every call
+    """
+    client = Client(seed=7)
+    price = client.get_quote("GOOGL").price
+    assert Client(seed=7).get_quote("GOOGL").price == price
+    assert client.get_quote("GOOGL").price == price
+    assert client.get_quote("MSFT").price != price
+
+
+def test_latency_models():
+    """
+    Test the simulated latency is waited for on every call
+    """
+    waits = []
+    client = Client(seed=1, latency=parse_latency("fixed:0.25"), sleep=waits.append)
+    client.get_quotes(["GOOGL", "MSFT"])
+    assert waits == [0.25, 0.25]
+
+    rng = Random(0)
+    assert all(normal_latency(0.01, 0.1)(rng) >= 0 for _ in range(100))
+    tail = sorted(parse_latency("long_tail:0.05,1")(rng) for _ in range(1000))
+    assert tail[500] < 0.1 < tail[990]
+    with pytest.raises(ValueError):
+        parse_latency("uniform:1")
+
+
+def test_error_rate():
+    """
+    Test simulated provider errors
+    """
+    client = Client(seed=1, error_rate=1.0)
+    with pytest.raises(ProviderAPIError):
+        client.get_quote("GOOGL")
+
+    client = Client(seed=1, error_rate=0.5)
+    quotes = client.get_quotes([f"SYM{i}" for i in range(200)])
+    errors = sum(isinstance(quote, ProviderAPIError) for quote in quotes.values())
+    assert 50 < errors < 150
+
+
+def test_throttle_simulation():
+    """
+    Test calls over the simulated request quota fail with ProviderThrottleError
+    """
+    now = [0.0]
+    client = Client(requests_per_minute=2, clock=lambda: now[0])
+    client.get_quote("GOOGL")
+    client.get_quote("GOOGL")
+    with pytest.raises(ProviderThrottleError):
+        client.get_quote("GOOGL")
+    now[0] += 30
+    client.get_quote("GOOGL")
+
+
+def test_overrides_are_consumed_once_under_concurrency():
+    """
+    Test a quote value override is returned to exactly one of many concurrent callers
+    """
+    client = Client(seed=3, max_workers=16)
+    Client.set_quote_value(-1.0)
+    quotes = client.get_quotes([f"SYM{i}" for i in range(64)])
+    assert [quote.price for quote in quotes.values()].count(-1.0) == 1
+    assert client.calls == 63
+
+
+def test_iter_quotes_streams_in_completion_order():
+    """
+    Test quotes are yielded as they arrive rather than in request order
+    """
+    delays = {"SLOW": 0.2, "FAST": 0.0}
+
+    class Delayed(Client):
+        def get_quote(self, symbol: str) -> Quote:
+            time.sleep(delays[symbol])
+            return super().get_quote(symbol)
+
+    client = Delayed(seed=1)
+    assert [symbol for symbol, _ in client.iter_quotes(["SLOW", "FAST", "SLOW"])] == [
+        "FAST",
+        "SLOW",
+    ]
+    assert list(client.get_quotes(["SLOW", "FAST"])) == ["SLOW", "FAST"]
@@ -0,0 +1,109 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from libs.providers.exception import ProviderThrottleError
+from libs.providers.rate_limit import Priority, RequestScheduler, request_priority
+from libs.providers.vantage.client import Client, throttle_note
+
+THROTTLE_PAYLOAD = {
+    "Note": "Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute."
+}
+QUOTE_PAYLOAD = {"Global Quote": {"05. price": "10.5"}}
+
+
+def test_burst_then_wait_for_refill():
+    """
+    Test the scheduler allows a full bucket burst then waits for a token refill
+    """
+    scheduler = RequestScheduler(requests_per_minute=600)
+    for _ in range(600):
+        scheduler.acquire()
+    start = time.monotonic()
+    scheduler.acquire()
+    assert time.monotonic() - start >= 0.05
+
+
+def test_interactive_requests_are_served_first():
+    """
+    Test a queued interactive request is released before an earlier background one
+    """
+    scheduler = RequestScheduler(requests_per_minute=600)
+    for _ in range(600):
+        scheduler.acquire()
+
+    order = []
+
+    def request(priority: Priority):
+        with request_priority(priority):
+            scheduler.acquire()
+        order.append(priority)
+
+    background = threading.Thread(target=request, args=(Priority.BACKGROUND,))
+    interactive = threading.Thread(target=request, args=(Priority.INTERACTIVE,))
+    background.start()
+    time.sleep(0.01)
+    interactive.start()
+    background.join()
+    interactive.join()
+    assert order == [Priority.INTERACTIVE, Priority.BACKGROUND]
+
+
+def test_backoff_holds_requests():
+    """
+    Test requests wait for the backoff period
+    """
+    scheduler = RequestScheduler(requests_per_minute=6000)
+    scheduler.backoff(0.05)
+    start = time.monotonic()
+    scheduler.acquire()
+    assert time.monotonic() - start >= 0.05
+
+
+def test_daily_quota_exhausted_raises():
+    """
+    Test the scheduler raises instead of waiting hours for the daily quota
+    """
+    scheduler = RequestScheduler(requests_per_day=2)
+    scheduler.acquire()
+    scheduler.acquire()
+    with pytest.raises(ProviderThrottleError):
+        scheduler.acquire()
+
+
+def test_throttle_note():
+    assert throttle_note(THROTTLE_PAYLOAD) is not None
+    assert throttle_note(QUOTE_PAYLOAD) is None
+    assert throttle_note({"Information": "Invalid API call."}) is None
+
+
+def fake_response(payload):
+    response = mock.Mock(status_code=200, text=str(payload))
+    response.json.return_value = payload
+    return response
+
+
+def test_vantage_client_backs_off_and_retries_throttled_call():
+    """
+    Test the vantage client backs off on a throttle note and retries the call
+    """
+    scheduler = RequestScheduler(requests_per_minute=6000)
+    client = Client("key", "http://localhost", scheduler=scheduler, throttle_backoff=0)
+    with mock.patch.object(
+        client.session,
+        "get",
+        side_effect=[fake_response(THROTTLE_PAYLOAD), fake_response(QUOTE_PAYLOAD)],
+    ) as mocked:
+        assert client.get_quote("GOOGL").price == 10.5
+    assert mocked.call_count == 2
+
+
+def test_vantage_client_without_scheduler_raises_throttle_error():
+    client = Client("key", "http://localhost")
+    with mock.patch.object(
+        client.session, "get", return_value=fake_response(THROTTLE_PAYLOAD)
+    ):
+        with pytest.raises(ProviderThrottleError):
+            client.get_quote("GOOGL")
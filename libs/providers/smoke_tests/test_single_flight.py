@@ -0,0 +1,89 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from libs.common.currency import Currency
+from libs.common.quote import Quote
+from libs.providers.client import Client as BaseClient
+from libs.providers.exception import ProviderAPIError
+from libs.providers.single_flight import SingleFlightClient
+
+
+class BlockingClient(BaseClient):
+    """Client blocking every call until released, counting upstream calls."""
+
+    def __init__(self, exception=None):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.exception = exception
+
+    def get_quote(self, symbol: str) -> Quote:
+        self.calls += 1
+        self.started.set()
+        self.release.wait()
+        if self.exception is not None:
+            raise self.exception
+        return Quote(10.0, Currency.USD)
+
+
+def run_concurrently(client: SingleFlightClient, upstream: BlockingClient, count: int):
+    def get_quote():
+        try:
+            return client.get_quote("GOOGL")
+        except ProviderAPIError as ex:
+            return ex
+
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        futures = [executor.submit(get_quote) for _ in range(count)]
+        upstream.started.wait()
+        while client.coalesced < count - 1:
+            time.sleep(0.001)
+        upstream.release.set()
+    return [future.result() for future in futures]
+
+
+def test_concurrent_calls_share_one_upstream_call():
+    """
+    Test concurrent calls for one symbol share one upstream call and its result
+    """
+    upstream = BlockingClient()
+    client = SingleFlightClient(upstream)
+    results = run_concurrently(client, upstream, 8)
+    assert upstream.calls == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_concurrent_calls_share_exception():
+    """
+    Test concurrent calls for one symbol share the upstream exception
+    """
+    upstream = BlockingClient(exception=ProviderAPIError(message="Fake error"))
+    client = SingleFlightClient(upstream)
+    results = run_concurrently(client, upstream, 4)
+    assert upstream.calls == 1
+    assert all(result is upstream.exception for result in results)
+
+
+def test_sequential_calls_are_not_coalesced():
+    """
+    Test a call issued after the previous one completed goes upstream
+    """
+    upstream = BlockingClient()
+    upstream.release.set()
+    client = SingleFlightClient(upstream)
+    client.get_quote("GOOGL")
+    client.get_quote("GOOGL")
+    assert upstream.calls == 2
+
+
+def test_get_quotes_goes_through_single_flight():
+    upstream = BlockingClient(exception=ProviderAPIError(message="Fake error"))
+    upstream.release.set()
+    client = SingleFlightClient(upstream)
+    quotes = client.get_quotes(["GOOGL", "MSFT"])
+    assert isinstance(quotes["GOOGL"], ProviderAPIError)
+    with pytest.raises(ProviderAPIError):
+        client.get_quote("GOOGL")
@@ -0,0 +1,138 @@
+from itertools import islice
+
+import pytest
+
+from libs.common.currency import Currency
+from libs.common.quote import Quote
+from libs.providers.cache import CachingClient
+from libs.providers.client import Client as BaseClient
+from libs.providers.exception import ProviderAPIError, ProviderThrottleError
+from libs.providers.mock.client import Client, seeded_price
+from libs.providers.rate_limit import Priority, RequestScheduler, _request_priority
+from libs.providers.single_flight import SingleFlightClient
+from libs.providers.stream import poll_interval, stream_quotes
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class ScriptedClient(BaseClient):
+    """Client answering every round with the next scripted {symbol: price or error}."""
+
+    def __init__(self, rounds, requests_per_minute=None):
+        self.rounds = iter(rounds)
+        self.requests_per_minute = requests_per_minute
+        self.priorities = []
+
+    def get_quotes(self, symbols):
+        self.priorities.append(_request_priority.get())
+        results = next(self.rounds)
+        return {
+            symbol: results[symbol]
+            if isinstance(results[symbol], Exception)
+            else Quote(results[symbol], Currency.USD)
+            for symbol in symbols
+        }
+
+
+def test_poll_interval():
+    assert poll_interval(10) == 1.0
+    assert poll_interval(10, min_interval=5) == 5
+    # 10 symbols with 80% of 5 requests per minute
+    assert poll_interval(10, requests_per_minute=5) == 150
+    assert poll_interval(1, requests_per_minute=6000) == 1.0
+
+
+def test_budget_is_forwarded_by_wrappers():
+    client = CachingClient(SingleFlightClient(Client(requests_per_minute=30)))
+    assert client.requests_per_minute == 30
+    assert Client().requests_per_minute is None
+
+
+def test_scheduler_sustained_budget():
+    assert RequestScheduler().requests_per_minute is None
+    assert RequestScheduler(requests_per_minute=5).requests_per_minute == 5
+    scheduler = RequestScheduler(requests_per_minute=5, requests_per_day=1440)
+    assert scheduler.requests_per_minute == pytest.approx(1)
+
+
+def test_stream_yields_first_quotes_then_changes():
+    client = Client(seed=1)
+    clock = FakeClock()
+    updates = list(
+        islice(
+            stream_quotes(
+                client, ["AAPL", "MSFT", "AAPL"], clock=clock, sleep=clock.sleep
+            ),
+            2,
+        )
+    )
+    assert sorted(updates) == [
+        ("AAPL", Quote(seeded_price(1, "AAPL"), Currency.USD)),
+        ("MSFT", Quote(seeded_price(1, "MSFT"), Currency.USD)),
+    ]
+
+    client = ScriptedClient([{"A": 1.0}, {"A": 1.0}, {"A": 1.0}, {"A": 2.0}])
+    clock = FakeClock()
+    stream = stream_quotes(client, ["A"], clock=clock, sleep=clock.sleep)
+    assert next(stream) == ("A", Quote(1.0, Currency.USD))
+    assert next(stream) == ("A", Quote(2.0, Currency.USD))
+    assert clock.sleeps == [1.0, 1.0, 1.0]
+    assert client.priorities == [Priority.BACKGROUND] * 4
+    assert _request_priority.get() == Priority.INTERACTIVE
+
+
+def test_stream_yields_errors_once():
+    error = ProviderAPIError(message="Unknown symbol")
+    client = ScriptedClient([{"A": error}, {"A": error}, {"A": 1.0}, {"A": error}])
+    clock = FakeClock()
+    stream = stream_quotes(client, ["A"], clock=clock, sleep=clock.sleep)
+    assert next(stream) == ("A", error)
+    assert next(stream) == ("A", Quote(1.0, Currency.USD))
+    assert next(stream) == ("A", error)
+
+
+def test_stream_interval_follows_budget_and_throttling():
+    throttle = ProviderThrottleError(message="Throttled")
+    rounds = [{"A": 1.0}, {"A": throttle}, {"A": throttle}, {"A": 1.0}, {"A": 1.0}]
+    client = ScriptedClient(rounds + [{"A": 2.0}], requests_per_minute=6)
+    clock = FakeClock()
+    stream = stream_quotes(
+        client, ["A"], clock=clock, sleep=clock.sleep, max_interval=30
+    )
+    assert next(stream) == ("A", Quote(1.0, Currency.USD))
+    assert next(stream) == ("A", Quote(2.0, Currency.USD))
+    # 12.5s for 1 symbol at 80% of 6 requests per minute, doubled while throttled
+    assert clock.sleeps == pytest.approx([12.5, 25, 30, 15, 12.5])
+
+
+def test_stream_sleep_accounts_for_round_duration():
+    clock = FakeClock()
+
+    class SlowClient(ScriptedClient):
+        def get_quotes(self, symbols):
+            clock.now += 0.25
+            return super().get_quotes(symbols)
+
+    stream = stream_quotes(
+        SlowClient([{"A": 1.0}, {"A": 2.0}]), ["A"], clock=clock, sleep=clock.sleep
+    )
+    assert [price for _, price in islice(stream, 2)] == [
+        Quote(1.0, Currency.USD),
+        Quote(2.0, Currency.USD),
+    ]
+    assert clock.sleeps == [0.75]
+
+
+def test_stream_without_symbols():
+    assert list(stream_quotes(Client(), [])) == []
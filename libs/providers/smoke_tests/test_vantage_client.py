@@ -4,6 +4,7 @@ from providers import ClientFactory, ClientType
 from libs.common.currency import Currency
 from libs.common.quote import Quote
 from libs.providers.exception import ProviderAPIError
+from libs.providers.vantage.client import Client
 
 client_generator = ClientFactory[ClientType.VANTAGE]
 
@@ -26,3 +27,15 @@ def test_get_quote_fake_symbol_raises_error():
     client = client_generator()
     with pytest.raises(ProviderAPIError):
         client.get_quote("BAD_SYMBOL_INVALID")
+
+
+def test_session_is_pooled_with_retries():
+    """
+    Test the vantage client owns a pooled session retrying transient errors
+    """
+    client = Client("key", "http://localhost", max_workers=4, max_retries=2)
+    adapter = client.session.get_adapter("https://localhost")
+    assert adapter._pool_maxsize == 4
+    assert adapter.max_retries.total == 2
+    assert 503 in adapter.max_retries.status_forcelist
+    client.close()
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from libs.providers.exception import ProviderAPIError, ProviderThrottleError
+from libs.providers.mock.client import parse_latency, seeded_price
+from libs.providers.rate_limit import RequestScheduler
+from libs.providers.vantage.async_client import AsyncClient
+from libs.providers.vantage.client import Client
+from libs.providers.vantage.stub import StubServer
+
+
+@pytest.fixture
+def stub():
+    with StubServer(seed=3) as stub:
+        yield stub
+
+
+def test_get_quote(stub):
+    """
+    Test getting a quote from the local Alpha Vantage stand-in
+    """
+    client = Client("key", stub.url)
+    assert client.get_quote("GOOGL").price == seeded_price(3, "GOOGL")
+    with pytest.raises(ProviderAPIError):
+        client.get_quote("BAD_SYMBOL_INVALID")
+    client.close()
+
+
+def test_get_quotes_reuses_connections(stub):
+    """
+    Test concurrent quotes are served over the pooled keep-alive connections
+    """
+    client = Client("key", stub.url, max_workers=4)
+    quotes = client.get_quotes([f"SYM{i}" for i in range(40)])
+    assert all(
+        quote.price == seeded_price(3, symbol) for symbol, quote in quotes.items()
+    )
+    assert stub.counts["requests"] == 40
+    client.close()
+
+
+def test_get_fx_rates(stub):
+    """
+    Test getting exchange rates from the local Alpha Vantage stand-in
+    """
+    client = Client("key", stub.url)
+    rates = client.get_fx_rates(["EUR", "USD", "XXX"], "USD")
+    assert rates["EUR"] == pytest.approx(1.08)
+    assert rates["USD"] == 1.0
+    assert isinstance(rates["XXX"], ProviderAPIError)
+    assert stub.counts["requests"] == 2
+    client.close()
+
+
+def test_throttle_note():
+    """
+    Test the stand-in throttles requests over its rate like the real api
+    """
+    with StubServer(requests_per_minute=2) as stub:
+        client = Client("key", stub.url)
+        client.get_quote("GOOGL")
+        client.get_quote("GOOGL")
+        with pytest.raises(ProviderThrottleError):
+            client.get_quote("GOOGL")
+        assert stub.counts["throttled"] == 1
+
+        scheduled = Client(
+            "key",
+            stub.url,
+            scheduler=RequestScheduler(requests_per_minute=6000),
+            throttle_backoff=0,
+            max_throttle_retries=1,
+        )
+        with pytest.raises(ProviderThrottleError):
+            scheduled.get_quote("GOOGL")
+        assert stub.counts["throttled"] == 3
+
+
+def test_error_payloads():
+    """
+    Test error payloads and transient server errors of the stand-in
+    """
+    with StubServer(error_rate=1.0) as stub:
+        with pytest.raises(ProviderAPIError):
+            Client("key", stub.url).get_quote("GOOGL")
+
+    with StubServer(server_error_rate=1.0) as stub:
+        client = Client("key", stub.url, max_retries=2, backoff_factor=0)
+        with pytest.raises(ProviderAPIError):
+            client.get_quote("GOOGL")
+        assert stub.counts["server_errors"] == 3
+
+
+def test_async_client_with_latency():
+    """
+    Test the async vantage client against the stand-in with latency
+    """
+    with StubServer(seed=3, latency=parse_latency("fixed:0.05")) as stub:
+
+        async def run():
+            async with AsyncClient("key", stub.url, max_concurrency=20) as client:
+                return await client.get_quotes([f"SYM{i}" for i in range(20)])
+
+        quotes = asyncio.run(run())
+    assert quotes["SYM1"].price == seeded_price(3, "SYM1")
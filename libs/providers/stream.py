@@ -0,0 +1,108 @@
+import time
+from logging import getLogger
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from libs.providers.client import Client, QuoteResult
+from libs.providers.exception import ProviderAPIError, ProviderThrottleError
+from libs.providers.rate_limit import SECONDS_PER_MINUTE, Priority, request_priority
+
+logger = getLogger(__name__)
+
+DEFAULT_MIN_INTERVAL = 1.0
+DEFAULT_MAX_INTERVAL = 300.0
+# share of the provider budget used by polling, the rest is left to interactive calls
+DEFAULT_BUDGET_SHARE = 0.8
+
+
+def poll_interval(
+    symbols: int,
+    requests_per_minute: Optional[float] = None,
+    min_interval: float = DEFAULT_MIN_INTERVAL,
+    budget_share: float = DEFAULT_BUDGET_SHARE,
+) -> float:
+    """Return the shortest interval between two refreshes of every symbol within budget.
+
+    Args:
+        symbols: the number of symbols refreshed every round
+        requests_per_minute: the provider budget, None if unlimited
+        min_interval: the minimum number of seconds between two rounds
+        budget_share: the share of the provider budget used by the refreshes
+
+    Returns:
+        The number of seconds between the start of two rounds
+    """
+    if not requests_per_minute:
+        return min_interval
+    return max(
+        min_interval,
+        symbols * SECONDS_PER_MINUTE / (requests_per_minute * budget_share),
+    )
+
+
+def _changed(previous: Optional[QuoteResult], result: QuoteResult) -> bool:
+    if isinstance(result, ProviderAPIError):
+        return not isinstance(previous, ProviderAPIError)
+    if isinstance(previous, ProviderAPIError) or previous is None:
+        return True
+    return (previous.price, previous.currency) != (result.price, result.currency)
+
+
+def stream_quotes(
+    client: Client,
+    symbols: Iterable[str],
+    min_interval: float = DEFAULT_MIN_INTERVAL,
+    max_interval: float = DEFAULT_MAX_INTERVAL,
+    budget_share: float = DEFAULT_BUDGET_SHARE,
+    clock: Callable[[], float] = time.monotonic,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Iterator[Tuple[str, QuoteResult]]:
+    """Poll the quotes of symbols forever, yielding them when they change.
+
+    Every round fetches all the symbols concurrently (see Client.get_quotes) at background
+    priority, so that interactive calls sharing the provider budget are sent first. Rounds
+    are spaced by the poll_interval of the client budget. When the provider throttles a
+    round the interval doubles (up to max_interval), then halves back towards the budget
+    interval after every round that was not throttled.
+
+    Args:
+        client: the provider client
+        symbols: the symbols to poll
+        min_interval: the minimum number of seconds between the start of two rounds
+        max_interval: the maximum number of seconds between the start of two rounds
+        budget_share: the share of the provider budget used by the polling
+        clock: monotonic clock in seconds
+        sleep: function used to wait for the next round
+
+    Returns:
+        An infinite iterator of (symbol, quote or ProviderAPIError) pairs. A quote is
+        yielded on its first fetch and when its price or currency changes, an error when
+        a symbol starts failing. Throttling errors are not yielded.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return
+    base_interval = poll_interval(
+        len(symbols), client.requests_per_minute, min_interval, budget_share
+    )
+    interval = base_interval
+    last: Dict[str, QuoteResult] = {}
+    while True:
+        started = clock()
+        with request_priority(Priority.BACKGROUND):
+            results = client.get_quotes(symbols)
+
+        throttled = False
+        for symbol, result in results.items():
+            if isinstance(result, ProviderThrottleError):
+                throttled = True
+                continue
+            if _changed(last.get(symbol), result):
+                last[symbol] = result
+                yield symbol, result
+
+        if throttled:
+            interval = min(max_interval, 2 * interval)
+            logger.info(f"Provider throttled quote polling, next in {interval:.1f}s")
+        else:
+            interval = max(base_interval, interval / 2)
+        sleep(max(0.0, started + interval - clock()))
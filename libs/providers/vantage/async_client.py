@@ -0,0 +1,165 @@
+import asyncio
+import json
+import os
+from logging import getLogger
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+
+from libs.common.currency import Currency
+from libs.common.quote import Quote
+from libs.providers.client import DEFAULT_MAX_CONCURRENCY
+from libs.providers.client import AsyncClient as BaseAsyncClient
+from libs.providers.exception import ProviderAPIError, ProviderThrottleError
+from libs.providers.vantage.client import (
+    DEFAULT_BACKOFF_FACTOR,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_READ_TIMEOUT,
+    RETRY_STATUS_CODES,
+    throttle_note,
+    vantage_credentials,
+)
+
+logger = getLogger(__name__)
+
+
+class AsyncClient(BaseAsyncClient):
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        pool_size: Optional[int] = None,
+        timeout: Tuple[float, float] = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+    ):
+        """Non blocking Alpha Vantage provider client.
+
+        The aiohttp session (and its connection pool) is created lazily on the event loop of
+        the first call, use the client as an async context manager or call `close`.
+
+        Args:
+            api_key: Alpha Vantage api key
+            base_url: Alpha Vantage api url
+            max_concurrency: maximum number of requests in flight
+            pool_size: number of pooled keep-alive connections, defaults to max_concurrency
+            timeout: (connect, read) timeouts in seconds
+            max_retries: number of retries on connection errors and transient 5xx responses
+            backoff_factor: exponential backoff factor in seconds between retries
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.pool_size = pool_size if pool_size is not None else max_concurrency
+        self.timeout = aiohttp.ClientTimeout(connect=timeout[0], sock_read=timeout[1])
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=self.timeout,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _query(self, params: Dict) -> Dict:
+        """Call the query endpoint and parse its json payload.
+
+        Connection errors and transient 5xx responses are retried with exponential backoff.
+
+        Args:
+            params: the query parameters, i.e the function and symbol
+
+        Returns:
+            The parsed response payload
+
+        Raises:
+            ProviderThrottleError: The provider throttled the call.
+            ProviderAPIError: An error occured while calling the provider.
+        """
+        session = self._get_session()
+        params = {**params, "apikey": self.api_key}
+        url = self.base_url + "/query"
+        for attempt in range(self.max_retries + 1):
+            status = None
+            try:
+                async with self._semaphore:
+                    async with session.get(url, params=params) as response:
+                        status = response.status
+                        text = await response.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+                if attempt == self.max_retries:
+                    logger.warning(f"Unexpected vantage Provider API call failure {ex}")
+                    raise ProviderAPIError(message="Market Provider call failure")
+
+            if status is not None and (
+                status not in RETRY_STATUS_CODES or attempt == self.max_retries
+            ):
+                break
+            await asyncio.sleep(self.backoff_factor * (2**attempt))
+
+        if status > 299:
+            raise ProviderAPIError(
+                message=f"Market Provider call failure {status=}, {text=}",
+            )
+        try:
+            response_data = json.loads(text)
+        except ValueError:
+            raise ProviderAPIError(
+                message=f"Market Provider call failure, response data is not json serializable {text=}",
+            )
+
+        note = throttle_note(response_data)
+        if note is not None:
+            raise ProviderThrottleError(
+                message=f"Market Provider throttled the call {note=}"
+            )
+        return response_data
+
+    async def get_quote(self, symbol: str) -> Quote:
+        response_data = await self._query(
+            {"function": "GLOBAL_QUOTE", "symbol": symbol}
+        )
+        value = response_data.get("Global Quote", {}).get("05. price", None)
+        if value is None:
+            raise ProviderAPIError(
+                message=f"Market Provider call failure, response data does not contain price data {response_data=}",
+            )
+
+        return Quote(float(value), Currency.USD)
+
+
+def get_async_vantage_client() -> BaseAsyncClient:
+    api_key, base_url = vantage_credentials()
+    pool_size = os.environ.get("ALPHA_VANTAGE_POOL_SIZE")
+    return AsyncClient(
+        api_key,
+        base_url,
+        max_concurrency=int(
+            os.environ.get("ALPHA_VANTAGE_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)
+        ),
+        pool_size=int(pool_size) if pool_size is not None else None,
+        timeout=(
+            float(
+                os.environ.get("ALPHA_VANTAGE_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)
+            ),
+            float(os.environ.get("ALPHA_VANTAGE_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)),
+        ),
+        max_retries=int(
+            os.environ.get("ALPHA_VANTAGE_MAX_RETRIES", DEFAULT_MAX_RETRIES)
+        ),
+        backoff_factor=float(
+            os.environ.get("ALPHA_VANTAGE_BACKOFF_FACTOR", DEFAULT_BACKOFF_FACTOR)
+        ),
+    )
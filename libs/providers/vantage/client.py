@@ -1,60 +1,282 @@
 import os
+from datetime import date, timedelta
 from logging import getLogger
-from typing import Dict
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
 
 import requests
 from requests import Response
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from libs.common.currency import Currency
 from libs.common.quote import Quote
+from libs.providers.client import DEFAULT_MAX_WORKERS
 from libs.providers.client import Client as BaseClient
-from libs.providers.exception import ConfigException, ProviderAPIError
+from libs.providers.exception import (
+    ConfigException,
+    ProviderAPIError,
+    ProviderThrottleError,
+)
+from libs.providers.rate_limit import RequestScheduler
+
+if TYPE_CHECKING:
+    from libs.common.history import PriceHistory
 
 logger = getLogger(__name__)
 
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+DEFAULT_THROTTLE_BACKOFF = 60.0
+DEFAULT_MAX_THROTTLE_RETRIES = 2
+THROTTLE_NOTE_KEYS = ("Note", "Information")
+THROTTLE_NOTE_MARKERS = ("call frequency", "rate limit", "requests per day")
+DAILY_SERIES_KEY = "Time Series (Daily)"
+DAILY_CLOSE_KEY = "4. close"
+# the compact daily series holds the latest 100 trading days, about 140 calendar days
+COMPACT_SERIES_DAYS = 140
+EXCHANGE_RATE_KEY = "Realtime Currency Exchange Rate"
+EXCHANGE_RATE_VALUE_KEY = "5. Exchange Rate"
+
+
+def throttle_note(response_data: Dict) -> Optional[str]:
+    """Return the provider throttle note from a response payload if any.
+
+    Alpha Vantage answers throttled calls with a 200 status code and a payload such as
+    {"Note": "Thank you for using Alpha Vantage! Our standard API call frequency is ..."}.
+
+    Args:
+        response_data: the parsed json payload
+
+    Returns:
+        The throttle note or None if the call was not throttled
+    """
+    for key in THROTTLE_NOTE_KEYS:
+        note = response_data.get(key)
+        if isinstance(note, str) and any(
+            marker in note.lower() for marker in THROTTLE_NOTE_MARKERS
+        ):
+            return note
+    return None
+
+
+def build_session(
+    pool_size: int, max_retries: int, backoff_factor: float
+) -> requests.Session:
+    """Build a keep-alive http session with a connection pool and a retry policy.
+
+    Args:
+        pool_size: the maximum number of connections kept alive per host
+        max_retries: the number of retries on connection errors and transient 5xx responses
+        backoff_factor: exponential backoff factor in seconds between retries
+
+    Returns:
+        A requests session
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
 
 class Client(BaseClient):
-    def __init__(self, api_key: str, base_url: str):
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        pool_size: Optional[int] = None,
+        timeout: Tuple[float, float] = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        scheduler: Optional[RequestScheduler] = None,
+        throttle_backoff: float = DEFAULT_THROTTLE_BACKOFF,
+        max_throttle_retries: int = DEFAULT_MAX_THROTTLE_RETRIES,
+    ):
+        """Alpha Vantage provider client.
+
+        Args:
+            api_key: Alpha Vantage api key
+            base_url: Alpha Vantage api url
+            max_workers: maximum number of concurrent requests for batch calls
+            pool_size: number of pooled keep-alive connections, defaults to max_workers
+            timeout: (connect, read) timeouts in seconds
+            max_retries: number of retries on connection errors and transient 5xx responses
+            backoff_factor: exponential backoff factor in seconds between retries
+            scheduler: optional rate limiting scheduler queuing every request
+            throttle_backoff: seconds to hold requests after the provider throttled a call
+            max_throttle_retries: number of retries of a throttled call
+        """
         self.api_key = api_key
         self.base_url = base_url
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.scheduler = scheduler
+        self.throttle_backoff = throttle_backoff
+        self.max_throttle_retries = max_throttle_retries
+        self.session = build_session(
+            pool_size if pool_size is not None else max_workers,
+            max_retries,
+            backoff_factor,
+        )
+
+    @property
+    def requests_per_minute(self) -> Optional[float]:
+        return self.scheduler.requests_per_minute if self.scheduler else None
+
+    def close(self):
+        self.session.close()
 
     def _get(self, endpoint, params: Dict) -> Response:
         params = {**params, "apikey": self.api_key}
         url = self.base_url + endpoint
         try:
-            response = requests.get(url, params)
+            response = self.session.get(url, params=params, timeout=self.timeout)
         except Exception as ex:
             logger.warning(f"Unexpected vantage Provider API call failure {ex}")
             raise ProviderAPIError(message="Market Provider call failure")
 
         return response
 
+    def _query(self, params: Dict) -> Tuple[Response, Dict]:
+        """Call the query endpoint and parse its json payload.
+
+        Calls are queued on the client request scheduler (if any). When the provider answers
+        with a throttle note, the scheduler backs off and the call is retried.
+
+        Args:
+            params: the query parameters, i.e the function and symbol
+
+        Returns:
+            A tuple (response, response_data) with the raw response and its parsed payload
+
+        Raises:
+            ProviderThrottleError: The provider kept throttling the call.
+            ProviderAPIError: An error occured while calling the provider.
+        """
+        attempt = 0
+        while True:
+            if self.scheduler is not None:
+                self.scheduler.acquire()
+            response = self._get("/query", params)
+            if response.status_code > 299:
+                raise ProviderAPIError(
+                    response=response,
+                    message=f"Market Provider call failure {response.status_code=}, {response.text=}",
+                )
+            try:
+                response_data = response.json()
+            except ValueError:
+                raise ProviderAPIError(
+                    response=response,
+                    message=f"Market Provider call failure, response data is not json serializable {response.text=}",
+                )
+
+            note = throttle_note(response_data)
+            if note is None:
+                return response, response_data
+
+            if self.scheduler is None or attempt >= self.max_throttle_retries:
+                raise ProviderThrottleError(
+                    response=response,
+                    message=f"Market Provider throttled the call {note=}",
+                )
+            logger.warning(
+                f"Vantage Provider throttled the call, backing off {self.throttle_backoff}s"
+            )
+            self.scheduler.backoff(self.throttle_backoff)
+            attempt += 1
+
     def get_quote(self, symbol: str) -> Quote:
-        response = self._get("/query", {"function": "GLOBAL_QUOTE", "symbol": symbol})
-        if response.status_code > 299:
+        response, response_data = self._query(
+            {"function": "GLOBAL_QUOTE", "symbol": symbol}
+        )
+        value = response_data.get("Global Quote", {}).get("05. price", None)
+        if value is None:
+            raise ProviderAPIError(
+                response=response,
+                message=f"Market Provider call failure, response data does not contain price data {response_data=}",
+            )
+
+        return Quote(float(value), Currency.USD)
+
+    def get_history(self, symbol: str, start: date, end: date) -> "PriceHistory":
+        """Fetch the daily series of the symbol, the full one only if start is too old."""
+        import numpy as np
+
+        from libs.common.history import PriceHistory
+
+        outputsize = (
+            "compact"
+            if start >= date.today() - timedelta(days=COMPACT_SERIES_DAYS)
+            else "full"
+        )
+        response, response_data = self._query(
+            {
+                "function": "TIME_SERIES_DAILY",
+                "symbol": symbol,
+                "outputsize": outputsize,
+            }
+        )
+        series = response_data.get(DAILY_SERIES_KEY)
+        if not isinstance(series, dict):
             raise ProviderAPIError(
                 response=response,
-                message=f"Market Provider call failure {response.status_code=}, {response.text=}",
+                message=f"Market Provider call failure, response data does not contain a daily series {response_data=}",
             )
         try:
-            response_data = response.json()
-        except ValueError:
+            history = PriceHistory.from_series(
+                np.array(list(series.keys()), dtype="datetime64[D]"),
+                np.array(
+                    [day[DAILY_CLOSE_KEY] for day in series.values()], dtype=float
+                ),
+                Currency.USD.value,
+            )
+        except (KeyError, TypeError, ValueError):
             raise ProviderAPIError(
                 response=response,
-                message=f"Market Provider call failure, response data is not json serializable {response.text=}",
+                message=f"Market Provider call failure, unreadable daily series for {symbol=}",
             )
+        return history.between(start, end)
 
-        value = response_data.get("Global Quote", {}).get("05. price", None)
+    def get_fx_rate(self, from_currency: str, to_currency: str) -> float:
+        response, response_data = self._query(
+            {
+                "function": "CURRENCY_EXCHANGE_RATE",
+                "from_currency": getattr(from_currency, "value", from_currency),
+                "to_currency": getattr(to_currency, "value", to_currency),
+            }
+        )
+        value = response_data.get(EXCHANGE_RATE_KEY, {}).get(EXCHANGE_RATE_VALUE_KEY)
         if value is None:
             raise ProviderAPIError(
                 response=response,
-                message=f"Market Provider call failure, response data does not contain price data {response_data=}",
+                message=f"Market Provider call failure, response data does not contain rate data {response_data=}",
             )
+        return float(value)
 
-        return Quote(float(value), Currency.USD)
 
+def vantage_credentials() -> Tuple[str, str]:
+    """Read vantage api key and url from the environment.
 
-def get_vantage_client() -> BaseClient:
+    Returns:
+        A tuple (api_key, base_url)
+
+    Raises:
+        ConfigException: the api key or url is not configured
+    """
     api_key = os.environ.get("ALPHA_VANTAGE_API_KEY")
     base_url = os.environ.get("ALPHA_VANTAGE_URL")
     if api_key is None or base_url is None:
@@ -62,5 +284,45 @@ def get_vantage_client() -> BaseClient:
             f"Incomplete vantage configuration api_key: {'*****' if api_key else 'MISSING'}"
             + f" base_url: {base_url if base_url else 'MISSING'}"
         )
+    return api_key, base_url
+
 
-    return Client(api_key, base_url)
+def get_vantage_client() -> BaseClient:
+    api_key, base_url = vantage_credentials()
+
+    max_workers = int(os.environ.get("ALPHA_VANTAGE_MAX_WORKERS", DEFAULT_MAX_WORKERS))
+    pool_size = os.environ.get("ALPHA_VANTAGE_POOL_SIZE")
+    requests_per_minute = os.environ.get("ALPHA_VANTAGE_REQUESTS_PER_MINUTE")
+    requests_per_day = os.environ.get("ALPHA_VANTAGE_REQUESTS_PER_DAY")
+    scheduler = None
+    if requests_per_minute is not None or requests_per_day is not None:
+        scheduler = RequestScheduler(
+            requests_per_minute=float(requests_per_minute)
+            if requests_per_minute is not None
+            else None,
+            requests_per_day=float(requests_per_day)
+            if requests_per_day is not None
+            else None,
+        )
+    return Client(
+        api_key,
+        base_url,
+        max_workers=max_workers,
+        pool_size=int(pool_size) if pool_size is not None else None,
+        timeout=(
+            float(
+                os.environ.get("ALPHA_VANTAGE_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)
+            ),
+            float(os.environ.get("ALPHA_VANTAGE_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)),
+        ),
+        max_retries=int(
+            os.environ.get("ALPHA_VANTAGE_MAX_RETRIES", DEFAULT_MAX_RETRIES)
+        ),
+        backoff_factor=float(
+            os.environ.get("ALPHA_VANTAGE_BACKOFF_FACTOR", DEFAULT_BACKOFF_FACTOR)
+        ),
+        scheduler=scheduler,
+        throttle_backoff=float(
+            os.environ.get("ALPHA_VANTAGE_THROTTLE_BACKOFF", DEFAULT_THROTTLE_BACKOFF)
+        ),
+    )
@@ -0,0 +1,286 @@
+"""Local stand-in for the Alpha Vantage api, to exercise the vantage clients offline.
+
+Run `python -m libs.providers.vantage.stub --port 8080` and point ALPHA_VANTAGE_URL to
+http://127.0.0.1:8080 (any ALPHA_VANTAGE_API_KEY is accepted).
+"""
+import argparse
+import json
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from random import Random
+from threading import Lock, Thread
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from libs.common.history import PriceHistory
+from libs.providers.mock.client import (
+    USD_RATES,
+    LatencyModel,
+    parse_latency,
+    seeded_price,
+)
+from libs.providers.mock.history import synthetic_history
+from libs.providers.rate_limit import SECONDS_PER_MINUTE, TokenBucket
+
+THROTTLE_NOTE = (
+    "Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per"
+    " minute and 500 calls per day."
+)
+INVALID_CALL_MESSAGE = "Invalid API call. Please retry or visit the documentation."
+UNKNOWN_SYMBOL_PREFIX = "BAD_"
+COMPACT_SERIES_SIZE = 100
+
+Payload = Tuple[int, Dict]
+
+
+def global_quote(symbol: str, price: float) -> Dict:
+    return {
+        "Global Quote": {
+            "01. symbol": symbol,
+            "02. open": f"{price:.4f}",
+            "03. high": f"{price:.4f}",
+            "04. low": f"{price:.4f}",
+            "05. price": f"{price:.4f}",
+            "06. volume": "1000",
+            "07. latest trading day": time.strftime("%Y-%m-%d"),
+            "08. previous close": f"{price:.4f}",
+            "09. change": "0.0000",
+            "10. change percent": "0.0000%",
+        }
+    }
+
+
+def daily_series(symbol: str, dates: np.ndarray, closes: np.ndarray) -> Dict:
+    return {
+        "Meta Data": {"2. Symbol": symbol},
+        "Time Series (Daily)": {
+            str(day): {
+                "1. open": f"{close:.4f}",
+                "2. high": f"{close:.4f}",
+                "3. low": f"{close:.4f}",
+                "4. close": f"{close:.4f}",
+                "5. volume": "1000",
+            }
+            # latest day first like the real api
+            for day, close in zip(dates[::-1], closes[::-1])
+        },
+    }
+
+
+def exchange_rate(from_currency: str, to_currency: str, rate: float) -> Dict:
+    return {
+        "Realtime Currency Exchange Rate": {
+            "1. From_Currency Code": from_currency,
+            "3. To_Currency Code": to_currency,
+            "5. Exchange Rate": f"{rate:.8f}",
+            "6. Last Refreshed": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "7. Time Zone": "UTC",
+        }
+    }
+
+
+class StubServer:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int = 0,
+        latency: Optional[LatencyModel] = None,
+        requests_per_minute: Optional[float] = None,
+        error_rate: float = 0.0,
+        server_error_rate: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Threaded http server answering the Alpha Vantage `/query` endpoint.
+
+        Symbols have a fixed price and daily series derived from the seed (see the mock
+        client), symbols starting with BAD_ are unknown and answered with an empty quote or
+        an error message like the real api. Exchange rates come from the mock client table.
+        Responses can be delayed (latency), throttled with the api throttle note (over
+        requests_per_minute), replaced with an error payload (error_rate) or with a 503
+        status code (server_error_rate).
+
+        Args:
+            host: interface to listen on
+            port: port to listen on, 0 picks a free port
+            seed: seed of the prices, latencies and errors
+            latency: latency model of a response, no latency if None
+            requests_per_minute: requests over this rate get the throttle note
+            error_rate: probability of answering with an error payload
+            server_error_rate: probability of answering with a 503 status code
+            clock: monotonic clock used by the throttle simulation
+        """
+        self.seed = seed
+        self.latency = latency
+        self.error_rate = error_rate
+        self.server_error_rate = server_error_rate
+        self.clock = clock
+        self.counts: Dict[str, int] = {
+            "requests": 0,
+            "throttled": 0,
+            "errors": 0,
+            "server_errors": 0,
+        }
+        self._lock = Lock()
+        self._rng = Random(seed)
+        self._bucket = (
+            TokenBucket(requests_per_minute, SECONDS_PER_MINUTE, clock())
+            if requests_per_minute
+            else None
+        )
+        self._functions: Dict[str, Callable[[Dict[str, str]], Payload]] = {
+            "GLOBAL_QUOTE": self.global_quote,
+            "TIME_SERIES_DAILY": self.time_series_daily,
+            "CURRENCY_EXCHANGE_RATE": self.currency_exchange_rate,
+        }
+        self._server = ThreadingHTTPServer((host, port), _handler(self))
+        self._server.daemon_threads = True
+        self._thread: Optional[Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self, poll_interval: float = 0.5):
+        self._server.serve_forever(poll_interval)
+
+    def start(self) -> "StubServer":
+        """Serve in a background thread."""
+        self._thread = Thread(target=self.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *_):
+        self.stop()
+
+    def global_quote(self, params: Dict[str, str]) -> Payload:
+        symbol = params.get("symbol")
+        if not symbol:
+            return HTTPStatus.OK, {"Error Message": INVALID_CALL_MESSAGE}
+        if symbol.startswith(UNKNOWN_SYMBOL_PREFIX):
+            return HTTPStatus.OK, {"Global Quote": {}}
+        return HTTPStatus.OK, global_quote(symbol, seeded_price(self.seed, symbol))
+
+    def time_series_daily(self, params: Dict[str, str]) -> Payload:
+        symbol = params.get("symbol")
+        if not symbol or symbol.startswith(UNKNOWN_SYMBOL_PREFIX):
+            return HTTPStatus.OK, {"Error Message": INVALID_CALL_MESSAGE}
+        today = np.datetime64(time.strftime("%Y-%m-%d"), "D")
+        history = synthetic_history(self.seed, symbol, "2000-01-01", today, "USD")
+        if params.get("outputsize", "compact") == "compact":
+            history = PriceHistory(
+                history.dates[-COMPACT_SERIES_SIZE:],
+                history.closes[-COMPACT_SERIES_SIZE:],
+                history.currency,
+            )
+        return HTTPStatus.OK, daily_series(symbol, history.dates, history.closes)
+
+    def currency_exchange_rate(self, params: Dict[str, str]) -> Payload:
+        from_currency = params.get("from_currency", "")
+        to_currency = params.get("to_currency", "")
+        if from_currency not in USD_RATES or to_currency not in USD_RATES:
+            return HTTPStatus.OK, {"Error Message": INVALID_CALL_MESSAGE}
+        rate = USD_RATES[from_currency] / USD_RATES[to_currency]
+        return HTTPStatus.OK, exchange_rate(from_currency, to_currency, rate)
+
+    def respond(self, params: Dict[str, str]) -> Tuple[float, Payload]:
+        """Draw the latency and build the response of a query.
+
+        Returns:
+            A tuple (latency, (status, payload))
+        """
+        with self._lock:
+            self.counts["requests"] += 1
+            latency = self.latency(self._rng) if self.latency is not None else 0.0
+            if self._bucket is not None:
+                if self._bucket.delay(self.clock()) > 0:
+                    self.counts["throttled"] += 1
+                    return latency, (HTTPStatus.OK, {"Note": THROTTLE_NOTE})
+                self._bucket.take()
+            if self.server_error_rate and self._rng.random() < self.server_error_rate:
+                self.counts["server_errors"] += 1
+                return latency, (HTTPStatus.SERVICE_UNAVAILABLE, {})
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.counts["errors"] += 1
+                return latency, (HTTPStatus.OK, {"Error Message": INVALID_CALL_MESSAGE})
+
+        function = self._functions.get(params.get("function", ""))
+        if function is None or not params.get("apikey"):
+            return latency, (HTTPStatus.OK, {"Error Message": INVALID_CALL_MESSAGE})
+        return latency, function(params)
+
+
+def _handler(stub: StubServer):
+    class Handler(BaseHTTPRequestHandler):
+        # keep-alive, so that client connection pooling can be measured, without Nagle
+        # delaying the body sent after the headers on a reused connection
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/query":
+                self.send_error(HTTPStatus.NOT_FOUND)
+                return
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            latency, (status, payload) = stub.respond(params)
+            if latency > 0:
+                time.sleep(latency)
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", help="i.e fixed:0.05, normal:0.05,0.01")
+    parser.add_argument("--requests-per-minute", type=float)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--server-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    stub = StubServer(
+        args.host,
+        args.port,
+        seed=args.seed,
+        latency=parse_latency(args.latency) if args.latency else None,
+        requests_per_minute=args.requests_per_minute,
+        error_rate=args.error_rate,
+        server_error_rate=args.server_error_rate,
+    )
+    print(f"Serving Alpha Vantage stand-in on {stub.url}")
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
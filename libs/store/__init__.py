@@ -0,0 +1,23 @@
+from enum import Enum
+from os import PathLike
+from typing import TYPE_CHECKING, Callable, Dict
+
+from libs.common.lazy import lazy
+
+if TYPE_CHECKING:
+    from libs.store.store import PositionStore
+
+StoreGenerator = Callable[[PathLike], "PositionStore"]
+
+
+class StoreType(str, Enum):
+    JOURNAL = "JOURNAL"
+    SQLITE = "SQLITE"
+    BINARY = "BINARY"
+
+
+StoreFactory: Dict[StoreType, StoreGenerator] = {
+    StoreType.JOURNAL: lazy("libs.store.journal", "get_journal_store"),
+    StoreType.SQLITE: lazy("libs.store.sqlite", "get_sqlite_store"),
+    StoreType.BINARY: lazy("libs.store.binary", "get_binary_store"),
+}
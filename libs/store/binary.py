@@ -0,0 +1,535 @@
+import mmap
+import os
+from logging import getLogger
+from os import PathLike
+from threading import Lock
+from typing import IO, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from libs.common.aggregates import CurrencyAggregates, PortfolioAggregates
+from libs.common.book import PortfolioBook
+from libs.common.currency import Currency
+from libs.common.env import env_flag
+from libs.common.position import Position
+from libs.common.records import PnLRecord, PositionRecord, TradeRecord, apply_trade
+from libs.common.trade import PnL, Trade
+from libs.store.journal import JournalStore, has_json_store
+from libs.store.store import PositionStore
+
+logger = getLogger(__name__)
+
+BINARY_FILE_NAME = ".positions.bin"
+AGGREGATES_FILE_NAME = ".positions.aggregates.bin"
+ATCMONEY_BINARY_FSYNC = "ATCMONEY_BINARY_FSYNC"
+MAGIC = b"ATCMPOS\x00"
+VERSION = 1
+INITIAL_CAPACITY = 1024
+
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S8"),
+        ("version", "<u4"),
+        ("record_size", "<u4"),
+        ("count", "<u8"),
+        ("capacity", "<u8"),
+        ("symbols_size", "<u8"),
+    ]
+)
+RECORD_DTYPE = np.dtype(
+    [
+        ("symbol_id", "<u4"),
+        ("currency", "S4"),
+        ("quantity", "<f8"),
+        ("cost", "<f8"),
+    ]
+)
+SYMBOL_SEPARATOR = b"\n"
+# one row per currency, in Currency order
+AGGREGATE_DTYPE = np.dtype(
+    [
+        ("currency", "S4"),
+        ("positions", "<i8"),
+        ("long_cost", "<f8"),
+        ("short_cost", "<f8"),
+        ("realized", "<f8"),
+    ]
+)
+CURRENCY_ROWS = {currency.value: row for row, currency in enumerate(Currency)}
+CURRENCY_CODES = np.array([currency.value for currency in Currency], dtype="S4")
+CURRENCY_ORDER = np.argsort(CURRENCY_CODES)
+SORTED_CURRENCY_CODES = CURRENCY_CODES[CURRENCY_ORDER]
+
+
+def _capacity(size: int) -> int:
+    capacity = INITIAL_CAPACITY
+    while capacity < size:
+        capacity *= 2
+    return capacity
+
+
+def _records_aggregates(records: np.ndarray, realized: np.ndarray) -> np.ndarray:
+    """Compute the aggregates rows of position records (see PortfolioAggregates).
+
+    Args:
+        records: the position records
+        realized: the realized gains of every currency, in Currency order
+    """
+    rows = np.empty(len(Currency), dtype=AGGREGATE_DTYPE)
+    currencies = CURRENCY_ORDER[
+        np.searchsorted(SORTED_CURRENCY_CODES, records["currency"])
+    ]
+    cost = records["cost"]
+    long_cost = np.where(records["quantity"] >= 0, cost, 0.0)
+    rows["currency"] = CURRENCY_CODES
+    rows["positions"] = np.bincount(currencies, minlength=len(Currency))
+    rows["long_cost"] = np.bincount(currencies, long_cost, minlength=len(Currency))
+    rows["short_cost"] = (
+        np.bincount(currencies, np.abs(cost), minlength=len(Currency))
+        - rows["long_cost"]
+    )
+    rows["realized"] = realized
+    return rows
+
+
+def _encode_symbols(symbols: List[str]) -> bytes:
+    for symbol in symbols:
+        if "\n" in symbol:
+            raise ValueError(f"Invalid position symbol {symbol!r}")
+    return SYMBOL_SEPARATOR.join(symbol.encode() for symbol in symbols)
+
+
+class BinaryStore(PositionStore):
+    def __init__(self, directory: PathLike, fsync: bool = False):
+        """Position store backed by a memory-mapped file of fixed-width records.
+
+        The file is made of a header, a section of `capacity` records (symbol id,
+        currency, quantity, cost) and a symbol dictionary section (the newline separated
+        symbols, a symbol id is its index in the dictionary). Records are read through
+        zero-copy NumPy views of the mapping and a trade on a known symbol only rewrites
+        its record. A liquidated position is kept as a tombstone record (zero quantity) so
+        its symbol id can be reused. A new symbol is written past the used records and
+        symbols, then committed by updating the header; the file is rewritten with twice
+        the capacity once every record slot is used.
+
+        The portfolio aggregates live in a second file of one fixed-width row per
+        currency. Only its realized gains are kept across positions updates: the
+        position count and exposure columns are refreshed from the records when the
+        file is mapped (to read the aggregates or record trades), then the rows touched
+        by a trade are rewritten in place with its record.
+
+        On first open, the positions (and realized gains) of an existing json store in the
+        same directory are imported.
+
+        Args:
+            directory: the directory holding the position file
+            fsync: whether every update is flushed to disk
+        """
+        self.directory = directory
+        self.path = os.path.join(directory, BINARY_FILE_NAME)
+        self.aggregates_path = os.path.join(directory, AGGREGATES_FILE_NAME)
+        self.fsync = fsync
+        self._lock = Lock()
+        self._file: Optional[IO] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._header: Optional[np.ndarray] = None
+        self._records: Optional[np.ndarray] = None
+        self._symbols: List[str] = []
+        self._index: Optional[Dict[str, int]] = None
+        self._aggregates: Optional[np.memmap] = None
+
+    def _write_file(self, positions: List[Position], capacity: Optional[int] = None):
+        """Atomically replace the file with the given positions."""
+        capacity = _capacity(len(positions)) if capacity is None else capacity
+        symbols = _encode_symbols([position.symbol for position in positions])
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header[0] = (
+            MAGIC,
+            VERSION,
+            RECORD_DTYPE.itemsize,
+            len(positions),
+            capacity,
+            len(symbols),
+        )
+        records = np.zeros(capacity, dtype=RECORD_DTYPE)
+        records["symbol_id"][: len(positions)] = np.arange(len(positions))
+        records["currency"][: len(positions)] = [
+            position.currency.value for position in positions
+        ]
+        records["quantity"][: len(positions)] = [
+            position.quantity for position in positions
+        ]
+        records["cost"][: len(positions)] = [position.cost for position in positions]
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header.tobytes())
+            f.write(records.tobytes())
+            f.write(symbols)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _write_aggregates(self, aggregates: PortfolioAggregates):
+        """Atomically replace the aggregates file."""
+        rows = np.zeros(len(Currency), dtype=AGGREGATE_DTYPE)
+        for row, currency in enumerate(Currency):
+            values = aggregates.currencies.get(currency.value, CurrencyAggregates())
+            rows[row] = (
+                currency.value,
+                values.positions,
+                values.long_cost,
+                values.short_cost,
+                values.realized,
+            )
+        tmp_path = f"{self.aggregates_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(rows.tobytes())
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.aggregates_path)
+
+    def _migrate(self):
+        positions = []
+        aggregates = PortfolioAggregates()
+        if has_json_store(self.directory):
+            json_store = JournalStore(self.directory)
+            positions = json_store.load_positions()
+            aggregates = json_store.load_aggregates()
+            logger.info(f"Migrated {len(positions)} positions to {self.path}")
+        self._write_file(positions)
+        self._write_aggregates(aggregates)
+
+    def _symbols_offset(self) -> int:
+        return (
+            HEADER_DTYPE.itemsize
+            + int(self._header["capacity"]) * RECORD_DTYPE.itemsize
+        )
+
+    def _map(self):
+        if self._mmap is not None:
+            return
+        if not os.path.exists(self.path):
+            self._migrate()
+        self._file = open(self.path, "r+b")
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        self._header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self._mmap)
+        if self._header["magic"] != MAGIC or self._header["version"] != VERSION:
+            self._unmap()
+            raise ValueError(f"Unsupported position file {self.path}")
+        self._records = np.ndarray(
+            (int(self._header["capacity"]),),
+            dtype=RECORD_DTYPE,
+            buffer=self._mmap,
+            offset=HEADER_DTYPE.itemsize,
+        )
+        self._mmap.seek(self._symbols_offset())
+        symbols = self._mmap.read(int(self._header["symbols_size"]))
+        self._symbols = symbols.decode().split("\n") if self._header["count"] else []
+        if len(self._symbols) != self._header["count"]:
+            self._unmap()
+            raise ValueError(f"Corrupted symbol dictionary in {self.path}")
+        self._index = None
+
+    def _map_aggregates(self):
+        """Map the aggregates file, refreshing its position columns from the records."""
+        if self._aggregates is not None:
+            return
+        realized = np.zeros(len(Currency))
+        if os.path.exists(self.aggregates_path):
+            rows = np.fromfile(self.aggregates_path, dtype=AGGREGATE_DTYPE)
+            if rows["currency"].tobytes() == CURRENCY_CODES.tobytes():
+                realized = rows["realized"]
+            else:
+                # older file version or written for other currencies
+                gains = self._rows_aggregates(rows).realized
+                realized = np.array(
+                    [gains.get(currency.value, 0.0) for currency in Currency]
+                )
+        rows = _records_aggregates(self._live(), realized)
+        fd = os.open(self.aggregates_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, rows.nbytes)
+            os.pwrite(fd, rows.tobytes(), 0)
+            if self.fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        self._aggregates = np.memmap(
+            self.aggregates_path, dtype=AGGREGATE_DTYPE, mode="r+"
+        )
+
+    @staticmethod
+    def _rows_aggregates(rows: np.ndarray) -> PortfolioAggregates:
+        used = (
+            (rows["positions"] != 0)
+            | (rows["long_cost"] != 0)
+            | (rows["short_cost"] != 0)
+            | (rows["realized"] != 0)
+        )
+        return PortfolioAggregates(
+            {
+                row["currency"].decode(): CurrencyAggregates(
+                    int(row["positions"]),
+                    float(row["long_cost"]),
+                    float(row["short_cost"]),
+                    float(row["realized"]),
+                )
+                for row in rows[used]
+            }
+        )
+
+    def _symbol_index(self) -> Dict[str, int]:
+        """Symbol -> id index, only built on the first symbol lookup."""
+        if self._index is None:
+            self._index = dict(zip(self._symbols, range(len(self._symbols))))
+        return self._index
+
+    def _unmap(self):
+        # views on the mapping must be released before it can be closed
+        self._header = None
+        self._records = None
+        self._aggregates = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _flush(self):
+        if self.fsync:
+            self._mmap.flush()
+            self._aggregates.flush()
+
+    def _live(self) -> np.ndarray:
+        records = self._records[: int(self._header["count"])]
+        return records[records["quantity"] != 0]
+
+    def _append(self, position: PositionRecord):
+        """Add the record and dictionary entry of a new symbol."""
+        count = int(self._header["count"])
+        # the aggregates rows do not change with the position file
+        aggregates = self._aggregates
+        if count == len(self._records):
+            positions = self._positions()
+            positions.append(position.to_model())
+            self._unmap()
+            self._write_file(positions, capacity=2 * count)
+            self._map()
+            self._aggregates = aggregates
+            return
+
+        entry = _encode_symbols([position.symbol])
+        if count:
+            entry = SYMBOL_SEPARATOR + entry
+        self._records[count] = (
+            count,
+            position.currency.value,
+            position.quantity,
+            position.cost,
+        )
+        symbols_size = int(self._header["symbols_size"])
+        end = self._symbols_offset() + symbols_size
+        self._unmap()
+        with open(self.path, "r+b") as f:
+            f.seek(end)
+            f.write(entry)
+            f.truncate()
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self._map()
+        self._aggregates = aggregates
+        # the record and symbol are only visible once the header is updated
+        self._header["count"] = count + 1
+        self._header["symbols_size"] = symbols_size + len(entry)
+        self._flush()
+        self._symbols.append(position.symbol)
+        if self._index is not None:
+            self._index[position.symbol] = count
+
+    def _position(self, row: int) -> Position:
+        return self._record(row).to_model()
+
+    def _record(self, row: int) -> PositionRecord:
+        record = self._records[row]
+        return PositionRecord(
+            float(record["quantity"]),
+            float(record["cost"]),
+            self._symbols[row],
+            Currency(record["currency"].decode()),
+        )
+
+    def _positions(self) -> List[Position]:
+        count = int(self._header["count"])
+        rows = np.flatnonzero(self._records["quantity"][:count])
+        return [self._position(row) for row in rows]
+
+    def load_positions(self) -> List[Position]:
+        with self._lock:
+            self._map()
+            return self._positions()
+
+    def load_position(self, symbol: str) -> Optional[Position]:
+        with self._lock:
+            self._map()
+            row = self._symbol_index().get(symbol)
+            if row is None or self._records["quantity"][row] == 0:
+                return None
+            return self._position(row)
+
+    def load_book(self) -> PortfolioBook:
+        with self._lock:
+            self._map()
+            live = self._live()
+            return PortfolioBook.from_arrays(
+                np.asarray(self._symbols, dtype=object)[live["symbol_id"]],
+                live["quantity"],
+                live["cost"],
+                np.char.decode(live["currency"]),
+            )
+
+    def load_aggregates(self) -> PortfolioAggregates:
+        with self._lock:
+            self._map()
+            self._map_aggregates()
+            return self._rows_aggregates(self._aggregates)
+
+    def store_positions(self, positions: List[Position]):
+        with self._lock:
+            self._unmap()
+            if not os.path.exists(self.path):
+                self._migrate()
+            self._write_file(positions)
+
+    def _update_aggregates(
+        self,
+        current: Optional[PositionRecord],
+        position: Optional[PositionRecord],
+        pnl: Optional[PnLRecord],
+        trade: Trade,
+    ):
+        """Apply a trade to the aggregates rows it touches."""
+        currencies = {trade.currency.value}
+        for record in (current, position):
+            if record is not None:
+                currencies.add(record.currency.value)
+        rows = [CURRENCY_ROWS[currency] for currency in currencies]
+        aggregates = self._rows_aggregates(self._aggregates[rows])
+        aggregates.update(current, position, pnl, trade.currency)
+        self._store_aggregates(aggregates)
+
+    def _store_aggregates(self, aggregates: PortfolioAggregates):
+        """Rewrite in place the aggregates rows of the given currencies."""
+        for currency, values in aggregates.currencies.items():
+            self._aggregates[CURRENCY_ROWS[currency]] = (
+                currency,
+                values.positions,
+                values.long_cost,
+                values.short_cost,
+                values.realized,
+            )
+
+    def record_trade(self, trade: Trade) -> Tuple[Optional[Position], Optional[PnL]]:
+        with self._lock:
+            self._map()
+            self._map_aggregates()
+            row = self._symbol_index().get(trade.symbol)
+            current = None
+            if row is not None and self._records["quantity"][row] != 0:
+                current = self._record(row)
+            position, pnl = apply_trade(
+                TradeRecord.from_model(trade),
+                current.copy() if current is not None else None,
+            )
+            if row is None:
+                self._append(position)
+                self._update_aggregates(current, position, pnl, trade)
+                self._flush()
+                return position.to_model(), pnl
+
+            if position is None:
+                self._records["quantity"][row] = 0
+                self._records["cost"][row] = 0
+            else:
+                self._records[row] = (
+                    row,
+                    position.currency.value,
+                    position.quantity,
+                    position.cost,
+                )
+            self._update_aggregates(current, position, pnl, trade)
+            self._flush()
+            return (
+                position.to_model() if position is not None else None,
+                pnl.to_model() if pnl is not None else None,
+            )
+
+    def record_trades(self, trades: List[Trade]) -> List[Optional[PnL]]:
+        """Apply trades in order, flushing the mapping once.
+
+        Known symbols are updated in place. When the trades open positions on new
+        symbols, the file is rewritten once with them instead of appending every symbol.
+        """
+        with self._lock:
+            self._map()
+            self._map_aggregates()
+            index = self._symbol_index()
+            aggregates = self._rows_aggregates(self._aggregates)
+            new: Dict[str, PositionRecord] = {}
+            pnls = []
+            for trade in trades:
+                row = index.get(trade.symbol)
+                if row is None:
+                    current = new.get(trade.symbol)
+                elif self._records["quantity"][row] != 0:
+                    current = self._record(row)
+                else:
+                    current = None
+                position, pnl = apply_trade(
+                    TradeRecord.from_model(trade),
+                    current.copy() if current is not None else None,
+                )
+                aggregates.update(current, position, pnl, trade.currency)
+                if row is None:
+                    if position is None:
+                        del new[trade.symbol]
+                    else:
+                        new[trade.symbol] = position
+                elif position is None:
+                    self._records["quantity"][row] = 0
+                    self._records["cost"][row] = 0
+                else:
+                    self._records[row] = (
+                        row,
+                        position.currency.value,
+                        position.quantity,
+                        position.cost,
+                    )
+                pnls.append(pnl.to_model() if pnl is not None else None)
+
+            if new:
+                positions = self._positions()
+                positions.extend(position.to_model() for position in new.values())
+                self._unmap()
+                self._write_file(positions)
+                self._write_aggregates(aggregates)
+                self._map()
+            else:
+                self._store_aggregates(aggregates)
+                self._flush()
+            return pnls
+
+    def close(self):
+        with self._lock:
+            self._unmap()
+
+
+def get_binary_store(directory: PathLike) -> PositionStore:
+    return BinaryStore(
+        directory,
+        fsync=env_flag(ATCMONEY_BINARY_FSYNC),
+    )
@@ -0,0 +1,385 @@
+import json
+import os
+import time
+from logging import getLogger
+from os import PathLike
+from typing import IO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from libs.common.aggregates import PortfolioAggregates
+from libs.common.book import PortfolioBook
+from libs.common.engine import TradeBatch, apply_trades, realized_by_currency
+from libs.common.env import env_flag
+from libs.common.position import Position
+from libs.common.records import PositionRecord, TradeRecord, apply_trade
+from libs.common.trade import PnL, Side, Trade
+from libs.store.store import JournalEntry, PositionStore
+
+logger = getLogger(__name__)
+
+SNAPSHOT_FILE_NAME = ".positions.json"
+JOURNAL_FILE_NAME = ".trades.jsonl"
+ARCHIVE_FILE_NAME = ".trades.archive.jsonl"
+DEFAULT_SNAPSHOT_INTERVAL = 1000
+ATCMONEY_JOURNAL_FSYNC = "ATCMONEY_JOURNAL_FSYNC"
+ATCMONEY_SNAPSHOT_INTERVAL = "ATCMONEY_SNAPSHOT_INTERVAL"
+
+
+def position_record(position: Union[Position, PositionRecord]) -> Dict:
+    return {
+        "quantity": position.quantity,
+        "cost": position.cost,
+        "symbol": position.symbol,
+        "currency": position.currency.value,
+    }
+
+
+def trade_record(sequence: int, timestamp: float, trade: Trade) -> Dict:
+    return {
+        "seq": sequence,
+        "ts": timestamp,
+        "symbol": trade.symbol,
+        "side": trade.side.value,
+        "currency": trade.currency.value,
+        "quantity": trade.quantity,
+        "unit_price": trade.unit_price,
+    }
+
+
+def trade_batch(records: List[Dict]) -> TradeBatch:
+    return TradeBatch(
+        symbols=[record["symbol"] for record in records],
+        sides=[record["side"] == Side.BUY for record in records],
+        currencies=[record["currency"] for record in records],
+        quantities=[record["quantity"] for record in records],
+        unit_prices=[record["unit_price"] for record in records],
+    )
+
+
+def has_json_store(directory: PathLike) -> bool:
+    """Return whether a directory holds a journal store (snapshot, journal or archive)."""
+    return any(
+        os.path.exists(os.path.join(directory, name))
+        for name in (SNAPSHOT_FILE_NAME, JOURNAL_FILE_NAME, ARCHIVE_FILE_NAME)
+    )
+
+
+class JournalStore(PositionStore):
+    def __init__(
+        self,
+        directory: PathLike,
+        fsync: bool = False,
+        snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL,
+        clock: Callable[[], float] = time.time,
+    ):
+        """Position store made of an append-only trade journal and position snapshots.
+
+        Recording a trade appends one line to the journal. Every `snapshot_interval` trades,
+        the positions are written to a snapshot (tagged with the last journal sequence
+        number) and the journal is compacted: its records are moved to the archive so the
+        journal only holds the trades after the latest snapshot. Positions are recovered by
+        loading the snapshot and replaying the journal. The archive plus the journal is the
+        full trade history.
+
+        The recovered positions are kept in memory, so only a long-lived store (i.e the
+        daemon) records a trade with a single append. The first call on a new store, so
+        every cli invocation, costs O(snapshot + journal) to load the snapshot and replay
+        up to `snapshot_interval` journal records.
+
+        The snapshot also holds the realized gains of the trades up to its sequence, the
+        portfolio aggregates are rebuilt from it when loading and then updated on every
+        trade (see PortfolioAggregates).
+
+        A legacy snapshot (a json list of positions) is read as a snapshot at sequence 0.
+
+        Args:
+            directory: the directory holding the snapshot, journal and archive files
+            fsync: whether every journal append is fsync-ed to disk
+            snapshot_interval: the number of trades between two snapshots
+            clock: function returning the current time in seconds since epoch
+        """
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE_NAME)
+        self.journal_path = os.path.join(directory, JOURNAL_FILE_NAME)
+        self.archive_path = os.path.join(directory, ARCHIVE_FILE_NAME)
+        self.fsync = fsync
+        self.snapshot_interval = snapshot_interval
+        self.clock = clock
+        self.sequence = 0
+        self.snapshot_sequence = 0
+        self._positions: Optional[Dict[str, PositionRecord]] = None
+        self._aggregates: Optional[PortfolioAggregates] = None
+        self._journal: Optional[IO] = None
+
+    def _read_snapshot(
+        self,
+    ) -> Tuple[List[Position], int, Optional[Dict[str, float]]]:
+        """Read the snapshot positions, sequence and realized gains (None if unknown)."""
+        try:
+            with open(self.snapshot_path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return [], 0, {}
+        if isinstance(data, list):
+            return [Position(**position) for position in data], 0, None
+        return (
+            [Position(**position) for position in data["positions"]],
+            int(data["sequence"]),
+            data.get("realized"),
+        )
+
+    def _write_snapshot(
+        self,
+        positions: List[Union[Position, PositionRecord]],
+        sequence: int,
+        realized: Dict[str, float],
+    ):
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "sequence": sequence,
+                    "positions": [position_record(p) for p in positions],
+                    "realized": realized,
+                },
+                f,
+            )
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _read_records(self, path: str) -> Iterator[Dict]:
+        """Read journal records, a torn trailing line (crash during append) is dropped."""
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            valid_size = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                valid_size += len(line)
+                yield json.loads(line)
+            torn = f.tell() > valid_size
+        if torn and path == self.journal_path:
+            logger.warning(f"Dropping torn record at the end of {path}")
+            with open(path, "r+b") as f:
+                f.truncate(valid_size)
+
+    def _load(self) -> Dict[str, PositionRecord]:
+        if self._positions is not None:
+            return self._positions
+
+        positions, sequence, realized = self._read_snapshot()
+        if realized is None:
+            realized = self._history_realized(sequence)
+        tail = [
+            record
+            for record in self._read_records(self.journal_path)
+            if record["seq"] > sequence
+        ]
+        if tail:
+            batch = trade_batch(tail)
+            result = apply_trades(batch, positions)
+            positions = result.book.to_positions()
+            for currency, gains in realized_by_currency(batch, result).items():
+                realized[currency] = realized.get(currency, 0.0) + gains
+        self.snapshot_sequence = sequence
+        self.sequence = tail[-1]["seq"] if tail else sequence
+        self._positions = {
+            position.symbol: PositionRecord.from_model(position)
+            for position in positions
+        }
+        self._aggregates = PortfolioAggregates.from_positions(positions, realized)
+        return self._positions
+
+    def _history_realized(self, sequence: int) -> Dict[str, float]:
+        """Replay the trade history up to a sequence to get its realized gains."""
+        records = [
+            record for record in self._records_history() if record["seq"] <= sequence
+        ]
+        if not records:
+            return {}
+        batch = trade_batch(records)
+        return realized_by_currency(batch, apply_trades(batch))
+
+    def _append(self, *records: Dict):
+        if self._journal is None:
+            self._journal = open(self.journal_path, "a")
+        self._journal.write("".join(json.dumps(record) + "\n" for record in records))
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+    def _compact(self):
+        """Move the journal records, all covered by the latest snapshot, to the archive."""
+        self.close()
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, "rb") as journal:
+            records = journal.read()
+        if records:
+            with open(self.archive_path, "ab") as archive:
+                archive.write(records)
+                archive.flush()
+                if self.fsync:
+                    os.fsync(archive.fileno())
+        open(self.journal_path, "w").close()
+
+    def snapshot(self):
+        """Write a snapshot of the current positions and compact the journal."""
+        positions = self._load()
+        realized = self._aggregates.realized
+        self._write_snapshot(list(positions.values()), self.sequence, realized)
+        # rebuilt from the positions so that running sums do not drift
+        self._aggregates = PortfolioAggregates.from_positions(
+            positions.values(), realized
+        )
+        self.snapshot_sequence = self.sequence
+        self._compact()
+
+    def load_positions(self) -> List[Position]:
+        return [position.to_model() for position in self._load().values()]
+
+    def load_book(self) -> PortfolioBook:
+        positions = list(self._load().values())
+        return PortfolioBook.from_arrays(
+            [position.symbol for position in positions],
+            [position.quantity for position in positions],
+            [position.cost for position in positions],
+            [position.currency for position in positions],
+        )
+
+    def load_position(self, symbol: str) -> Optional[Position]:
+        position = self._load().get(symbol)
+        return position.to_model() if position is not None else None
+
+    def load_aggregates(self) -> PortfolioAggregates:
+        self._load()
+        return PortfolioAggregates.from_dict(self._aggregates.to_dict())
+
+    def store_positions(self, positions: List[Position]):
+        realized = {}
+        try:
+            self._load()
+            realized = self._aggregates.realized
+        except (ValueError, KeyError, TypeError):
+            logger.warning(
+                f"Overwriting unreadable position snapshot {self.snapshot_path}"
+            )
+            for record in self._read_records(self.journal_path):
+                self.sequence = max(self.sequence, record["seq"])
+        self._positions = {
+            position.symbol: PositionRecord.from_model(position)
+            for position in positions
+        }
+        self._aggregates = PortfolioAggregates.from_positions(positions, realized)
+        self.snapshot()
+
+    def record_trade(self, trade: Trade) -> Tuple[Optional[Position], Optional[PnL]]:
+        positions = self._load()
+        current = positions.get(trade.symbol)
+        position, pnl = apply_trade(
+            TradeRecord.from_model(trade),
+            current.copy() if current is not None else None,
+        )
+        self._append(trade_record(self.sequence + 1, self.clock(), trade))
+        self.sequence += 1
+        self._aggregates.update(current, position, pnl, trade.currency)
+        if position is None:
+            del positions[trade.symbol]
+        else:
+            positions[trade.symbol] = position
+
+        if self.sequence - self.snapshot_sequence >= self.snapshot_interval:
+            self.snapshot()
+        return (
+            position.to_model() if position is not None else None,
+            pnl.to_model() if pnl is not None else None,
+        )
+
+    def record_trades(self, trades: List[Trade]) -> List[Optional[PnL]]:
+        """Apply trades in order, appending them to the journal in a single write."""
+        positions = self._load()
+        aggregates = PortfolioAggregates.from_dict(self._aggregates.to_dict())
+        # positions changed by the trades (None once liquidated), only applied to the
+        # store once every trade is journaled
+        changes: Dict[str, Optional[PositionRecord]] = {}
+        timestamp = self.clock()
+        records, pnls = [], []
+        for trade in trades:
+            current = (
+                changes[trade.symbol]
+                if trade.symbol in changes
+                else positions.get(trade.symbol)
+            )
+            position, pnl = apply_trade(
+                TradeRecord.from_model(trade),
+                current.copy() if current is not None else None,
+            )
+            records.append(
+                trade_record(self.sequence + len(records) + 1, timestamp, trade)
+            )
+            aggregates.update(current, position, pnl, trade.currency)
+            changes[trade.symbol] = position
+            pnls.append(pnl.to_model() if pnl is not None else None)
+        if not records:
+            return pnls
+
+        self._append(*records)
+        self.sequence += len(records)
+        self._aggregates = aggregates
+        for symbol, position in changes.items():
+            if position is None:
+                positions.pop(symbol, None)
+            else:
+                positions[symbol] = position
+
+        if self.sequence - self.snapshot_sequence >= self.snapshot_interval:
+            self.snapshot()
+        return pnls
+
+    def _records_history(self) -> Iterator[Dict]:
+        """Read the full trade history records (archive then journal) in sequence order."""
+        last_sequence = 0
+        for path in (self.archive_path, self.journal_path):
+            for record in self._read_records(path):
+                # a crash during compaction can leave records both archived and journaled
+                if record["seq"] <= last_sequence:
+                    continue
+                last_sequence = record["seq"]
+                yield record
+
+    def read_journal(self) -> Iterator[JournalEntry]:
+        """Read the full trade history (archive then journal) in sequence order."""
+        for record in self._records_history():
+            yield JournalEntry(
+                sequence=record["seq"],
+                timestamp=record["ts"],
+                trade=Trade(
+                    symbol=record["symbol"],
+                    side=record["side"],
+                    currency=record["currency"],
+                    quantity=record["quantity"],
+                    unit_price=record["unit_price"],
+                ),
+            )
+
+    def read_trade_batch(self) -> TradeBatch:
+        """Read the full trade history into a batch, without building a Trade per record."""
+        return trade_batch(list(self._records_history()))
+
+    def close(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+def get_journal_store(directory: PathLike) -> PositionStore:
+    return JournalStore(
+        directory,
+        fsync=env_flag(ATCMONEY_JOURNAL_FSYNC),
+        snapshot_interval=int(
+            os.environ.get(ATCMONEY_SNAPSHOT_INTERVAL, DEFAULT_SNAPSHOT_INTERVAL)
+        ),
+    )
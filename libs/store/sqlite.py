@@ -0,0 +1,428 @@
+import os
+import sqlite3
+import time
+from logging import getLogger
+from os import PathLike
+from threading import Lock
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from libs.common.aggregates import CurrencyAggregates, PortfolioAggregates
+from libs.common.book import PortfolioBook
+from libs.common.currency import Currency
+from libs.common.engine import TradeBatch, apply_trades, realized_by_currency
+from libs.common.position import Position
+from libs.common.records import PositionRecord, TradeRecord, apply_trade
+from libs.common.trade import PnL, Trade
+from libs.store.journal import JournalStore, has_json_store, trade_batch
+from libs.store.store import JournalEntry, PositionStore
+
+logger = getLogger(__name__)
+
+DATABASE_FILE_NAME = ".positions.sqlite3"
+ATCMONEY_SQLITE_SYNCHRONOUS = "ATCMONEY_SQLITE_SYNCHRONOUS"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    symbol TEXT PRIMARY KEY,
+    quantity REAL NOT NULL,
+    cost REAL NOT NULL,
+    currency TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS trades (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    symbol TEXT NOT NULL,
+    side TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    quantity REAL NOT NULL,
+    unit_price REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS aggregates (
+    currency TEXT PRIMARY KEY,
+    positions INTEGER NOT NULL,
+    long_cost REAL NOT NULL,
+    short_cost REAL NOT NULL,
+    realized REAL NOT NULL
+) WITHOUT ROWID;
+"""
+MIGRATED_KEY = "migrated_from_json"
+AGGREGATES_KEY = "aggregates"
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA", "0", "1", "2", "3")
+# bound on the parameters of a query, below the SQLite default limit
+SYMBOLS_PER_QUERY = 500
+
+
+def _position(row: Tuple) -> Position:
+    return _record(row).to_model()
+
+
+def _record(row: Tuple) -> PositionRecord:
+    symbol, quantity, cost, currency = row
+    return PositionRecord(quantity, cost, symbol, Currency(currency))
+
+
+class SQLiteStore(PositionStore):
+    def __init__(
+        self,
+        directory: PathLike,
+        synchronous: str = "NORMAL",
+        clock: Callable[[], float] = time.time,
+    ):
+        """Position store backed by a SQLite database in WAL mode.
+
+        Positions are indexed by symbol so reading or updating one symbol is O(log n), and
+        each trade updates its position and appends to the trades table in one transaction.
+        On first open, positions and trade history of an existing json store in the same
+        directory are migrated into the database. The portfolio aggregates are kept per
+        currency in their own table, updated in the transaction of every trade.
+
+        Args:
+            directory: the directory holding the database
+            synchronous: SQLite synchronous pragma (OFF, NORMAL, FULL, EXTRA or 0 to 3),
+                FULL to sync every commit to disk
+            clock: function returning the current time in seconds since epoch
+
+        Raises:
+            ValueError if the synchronous mode is not a SQLite one
+        """
+        synchronous = str(synchronous).strip().upper()
+        if synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(
+                f"Invalid SQLite synchronous mode {synchronous!r},"
+                f" expected one of {', '.join(SYNCHRONOUS_MODES)}"
+            )
+        self.directory = directory
+        self.path = os.path.join(directory, DATABASE_FILE_NAME)
+        self.clock = clock
+        self._lock = Lock()
+        self._connection = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(f"PRAGMA synchronous={synchronous}")
+        self._connection.executescript(SCHEMA)
+        self._migrate()
+        self._init_aggregates()
+
+    def _migrate(self):
+        """Import the json store of the directory, once."""
+        with self._lock, self._transaction() as cursor:
+            if cursor.execute(
+                "SELECT 1 FROM meta WHERE key = ?", (MIGRATED_KEY,)
+            ).fetchone():
+                return
+            cursor.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?)", (MIGRATED_KEY, "1")
+            )
+            if not has_json_store(self.directory):
+                return
+
+            json_store = JournalStore(self.directory)
+            positions = json_store.load_positions()
+            cursor.executemany(
+                "INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?)",
+                [(p.symbol, p.quantity, p.cost, p.currency.value) for p in positions],
+            )
+            cursor.executemany(
+                "INSERT INTO trades VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        entry.sequence,
+                        entry.timestamp,
+                        entry.trade.symbol,
+                        entry.trade.side.value,
+                        entry.trade.currency.value,
+                        entry.trade.quantity,
+                        entry.trade.unit_price,
+                    )
+                    for entry in json_store.read_journal()
+                ],
+            )
+            logger.info(f"Migrated {len(positions)} positions to {self.path}")
+
+    def _init_aggregates(self):
+        """Compute the aggregates of the positions and trade history, once."""
+        with self._lock, self._transaction() as cursor:
+            if cursor.execute(
+                "SELECT 1 FROM meta WHERE key = ?", (AGGREGATES_KEY,)
+            ).fetchone():
+                return
+            cursor.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?)", (AGGREGATES_KEY, "1")
+            )
+            positions = cursor.execute(
+                "SELECT symbol, quantity, cost, currency FROM positions"
+            ).fetchall()
+            records = self._trade_records(cursor)
+            realized = {}
+            if records:
+                batch = trade_batch(records)
+                realized = realized_by_currency(batch, apply_trades(batch))
+            self._write_aggregates(
+                cursor,
+                PortfolioAggregates.from_positions(map(_record, positions), realized),
+            )
+
+    @staticmethod
+    def _trade_records(cursor: sqlite3.Cursor) -> List[Dict]:
+        """Read the recorded trades in sequence order as journal records."""
+        return [
+            {
+                "symbol": symbol,
+                "side": side,
+                "currency": currency,
+                "quantity": quantity,
+                "unit_price": unit_price,
+            }
+            for symbol, side, currency, quantity, unit_price in cursor.execute(
+                "SELECT symbol, side, currency, quantity, unit_price"
+                " FROM trades ORDER BY seq"
+            )
+        ]
+
+    def _read_aggregates(
+        self, cursor: sqlite3.Cursor, currencies: Optional[Iterable[str]] = None
+    ) -> PortfolioAggregates:
+        query = "SELECT currency, positions, long_cost, short_cost, realized FROM aggregates"
+        if currencies is None:
+            rows = cursor.execute(query).fetchall()
+        else:
+            currencies = list(currencies)
+            rows = cursor.execute(
+                f"{query} WHERE currency IN ({', '.join('?' * len(currencies))})",
+                currencies,
+            ).fetchall()
+        return PortfolioAggregates(
+            {row[0]: CurrencyAggregates(*row[1:]) for row in rows}
+        )
+
+    def _write_aggregates(
+        self, cursor: sqlite3.Cursor, aggregates: PortfolioAggregates
+    ):
+        cursor.executemany(
+            "INSERT OR REPLACE INTO aggregates VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    currency,
+                    values.positions,
+                    values.long_cost,
+                    values.short_cost,
+                    values.realized,
+                )
+                for currency, values in aggregates.currencies.items()
+            ],
+        )
+
+    def _transaction(self) -> "_Transaction":
+        return _Transaction(self._connection)
+
+    def load_positions(self) -> List[Position]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT symbol, quantity, cost, currency FROM positions"
+            ).fetchall()
+        return [_position(row) for row in rows]
+
+    def load_book(self) -> PortfolioBook:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT symbol, quantity, cost, currency FROM positions"
+            ).fetchall()
+        if not rows:
+            return PortfolioBook()
+        return PortfolioBook.from_arrays(*zip(*rows))
+
+    def load_position(self, symbol: str) -> Optional[Position]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT symbol, quantity, cost, currency FROM positions WHERE symbol = ?",
+                (symbol,),
+            ).fetchone()
+        return _position(row) if row is not None else None
+
+    def load_aggregates(self) -> PortfolioAggregates:
+        with self._lock:
+            return self._read_aggregates(self._connection.cursor())
+
+    def store_positions(self, positions: List[Position]):
+        with self._lock, self._transaction() as cursor:
+            realized = self._read_aggregates(cursor).realized
+            cursor.execute("DELETE FROM positions")
+            cursor.executemany(
+                "INSERT INTO positions VALUES (?, ?, ?, ?)",
+                [(p.symbol, p.quantity, p.cost, p.currency.value) for p in positions],
+            )
+            cursor.execute("DELETE FROM aggregates")
+            self._write_aggregates(
+                cursor, PortfolioAggregates.from_positions(positions, realized)
+            )
+
+    def record_trade(self, trade: Trade) -> Tuple[Optional[Position], Optional[PnL]]:
+        with self._lock, self._transaction() as cursor:
+            row = cursor.execute(
+                "SELECT symbol, quantity, cost, currency FROM positions WHERE symbol = ?",
+                (trade.symbol,),
+            ).fetchone()
+            current = _record(row) if row is not None else None
+            position, pnl = apply_trade(
+                TradeRecord.from_model(trade),
+                current.copy() if current is not None else None,
+            )
+            if position is None:
+                cursor.execute(
+                    "DELETE FROM positions WHERE symbol = ?", (trade.symbol,)
+                )
+            else:
+                cursor.execute(
+                    "INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?)",
+                    (
+                        position.symbol,
+                        position.quantity,
+                        position.cost,
+                        position.currency.value,
+                    ),
+                )
+            cursor.execute(
+                "INSERT INTO trades (ts, symbol, side, currency, quantity, unit_price)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    self.clock(),
+                    trade.symbol,
+                    trade.side.value,
+                    trade.currency.value,
+                    trade.quantity,
+                    trade.unit_price,
+                ),
+            )
+            currencies = {trade.currency.value}
+            for record in (current, position):
+                if record is not None:
+                    currencies.add(record.currency.value)
+            aggregates = self._read_aggregates(cursor, currencies)
+            aggregates.update(current, position, pnl, trade.currency)
+            self._write_aggregates(cursor, aggregates)
+        return (
+            position.to_model() if position is not None else None,
+            pnl.to_model() if pnl is not None else None,
+        )
+
+    def record_trades(self, trades: List[Trade]) -> List[Optional[PnL]]:
+        """Apply trades in order in a single transaction.
+
+        The positions of the traded symbols are read once and written back once.
+        """
+        symbols = list(dict.fromkeys(trade.symbol for trade in trades))
+        with self._lock, self._transaction() as cursor:
+            positions = {}
+            for start in range(0, len(symbols), SYMBOLS_PER_QUERY):
+                stop = start + SYMBOLS_PER_QUERY
+                selected = symbols[start:stop]
+                positions.update(
+                    (row[0], _record(row))
+                    for row in cursor.execute(
+                        "SELECT symbol, quantity, cost, currency FROM positions"
+                        f" WHERE symbol IN ({', '.join('?' * len(selected))})",
+                        selected,
+                    )
+                )
+            aggregates = self._read_aggregates(cursor)
+            timestamp = self.clock()
+            pnls = []
+            for trade in trades:
+                current = positions.get(trade.symbol)
+                position, pnl = apply_trade(
+                    TradeRecord.from_model(trade),
+                    current.copy() if current is not None else None,
+                )
+                aggregates.update(current, position, pnl, trade.currency)
+                positions[trade.symbol] = position
+                pnls.append(pnl.to_model() if pnl is not None else None)
+
+            cursor.executemany(
+                "DELETE FROM positions WHERE symbol = ?",
+                [(symbol,) for symbol, record in positions.items() if record is None],
+            )
+            cursor.executemany(
+                "INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        record.symbol,
+                        record.quantity,
+                        record.cost,
+                        record.currency.value,
+                    )
+                    for record in positions.values()
+                    if record is not None
+                ],
+            )
+            cursor.executemany(
+                "INSERT INTO trades (ts, symbol, side, currency, quantity, unit_price)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        timestamp,
+                        trade.symbol,
+                        trade.side.value,
+                        trade.currency.value,
+                        trade.quantity,
+                        trade.unit_price,
+                    )
+                    for trade in trades
+                ],
+            )
+            self._write_aggregates(cursor, aggregates)
+        return pnls
+
+    def read_journal(self) -> Iterator[JournalEntry]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT seq, ts, symbol, side, currency, quantity, unit_price"
+                " FROM trades ORDER BY seq"
+            ).fetchall()
+        for seq, ts, symbol, side, currency, quantity, unit_price in rows:
+            yield JournalEntry(
+                sequence=seq,
+                timestamp=ts,
+                trade=Trade(
+                    symbol=symbol,
+                    side=side,
+                    currency=currency,
+                    quantity=quantity,
+                    unit_price=unit_price,
+                ),
+            )
+
+    def read_trade_batch(self) -> TradeBatch:
+        with self._lock:
+            records = self._trade_records(self._connection.cursor())
+        return trade_batch(records)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class _Transaction:
+    """Context manager running statements in an immediate (write locked) transaction."""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def __enter__(self) -> sqlite3.Cursor:
+        self.cursor = self.connection.cursor()
+        self.cursor.execute("BEGIN IMMEDIATE")
+        return self.cursor
+
+    def __exit__(self, exc_type, *_):
+        self.cursor.execute("ROLLBACK" if exc_type is not None else "COMMIT")
+        self.cursor.close()
+
+
+def get_sqlite_store(directory: PathLike) -> PositionStore:
+    return SQLiteStore(
+        directory, synchronous=os.environ.get(ATCMONEY_SQLITE_SYNCHRONOUS, "NORMAL")
+    )
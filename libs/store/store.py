@@ -0,0 +1,135 @@
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+from libs.common.aggregates import PortfolioAggregates
+from libs.common.book import PortfolioBook
+from libs.common.engine import TradeBatch
+from libs.common.position import Position, add_trade_to_position
+from libs.common.trade import PnL, Trade
+
+
+@dataclass
+class JournalEntry:
+    """A trade recorded by a position store.
+
+    Args:
+        sequence: the sequence number of the trade, starting at 1
+        timestamp: the time the trade was recorded in seconds since epoch
+        trade: the recorded trade
+    """
+
+    sequence: int
+    timestamp: float
+    trade: Trade
+
+
+class PositionStore:
+    def load_positions(self) -> List[Position]:
+        """Load every stored position.
+
+        Returns:
+            The stored positions
+        """
+        pass
+
+    def load_position(self, symbol: str) -> Optional[Position]:
+        """Load the stored position for a symbol.
+
+        Args:
+            symbol: the position symbol
+
+        Returns:
+            The position or None if there is no position for the symbol
+        """
+        for position in self.load_positions():
+            if position.symbol == symbol:
+                return position
+        return None
+
+    def load_book(self) -> PortfolioBook:
+        """Load every stored position into a columnar book.
+
+        Returns:
+            The book of stored positions
+        """
+        return PortfolioBook(self.load_positions())
+
+    def load_aggregates(self) -> PortfolioAggregates:
+        """Load the portfolio aggregates (position count, exposure and realized gains).
+
+        Stores keeping the aggregates up to date on every trade return them without
+        aggregating every position (the json store still loads its snapshot and replays
+        the journal tail to get them), by default they are computed from the positions
+        and do not include realized gains.
+
+        Returns:
+            The aggregates of the stored positions and recorded trades
+        """
+        return PortfolioAggregates.from_positions(self.load_positions())
+
+    def store_positions(self, positions: List[Position]):
+        """Replace every stored position.
+
+        Args:
+            positions: the positions to store
+        """
+        pass
+
+    def record_trade(self, trade: Trade) -> Tuple[Optional[Position], Optional[PnL]]:
+        """Apply a trade to the stored position of its symbol and persist the result.
+
+        Args:
+            trade: incoming trade
+
+        Returns:
+            The (position, pnl) tuple returned by add_trade_to_position
+        """
+        positions = {position.symbol: position for position in self.load_positions()}
+        position, pnl = add_trade_to_position(trade, positions.get(trade.symbol))
+        if position is None:
+            del positions[trade.symbol]
+        else:
+            positions[trade.symbol] = position
+        self.store_positions(list(positions.values()))
+        return position, pnl
+
+    def record_trades(self, trades: List[Trade]) -> List[Optional[PnL]]:
+        """Apply trades in order and persist the resulting positions at once.
+
+        Args:
+            trades: incoming trades, in execution order
+
+        Returns:
+            The pnl of every trade returned by add_trade_to_position
+        """
+        positions = {position.symbol: position for position in self.load_positions()}
+        pnls = []
+        for trade in trades:
+            position, pnl = add_trade_to_position(trade, positions.get(trade.symbol))
+            if position is None:
+                del positions[trade.symbol]
+            else:
+                positions[trade.symbol] = position
+            pnls.append(pnl)
+        self.store_positions(list(positions.values()))
+        return pnls
+
+    def read_journal(self) -> Iterator[JournalEntry]:
+        """Read the recorded trade history in sequence order.
+
+        Returns:
+            An iterator of journal entries, empty if the store does not keep trades
+        """
+        return iter(())
+
+    def read_trade_batch(self) -> TradeBatch:
+        """Read the recorded trade history in sequence order into a columnar batch.
+
+        Returns:
+            The batch of recorded trades, empty if the store does not keep trades
+        """
+        return TradeBatch.from_trades(entry.trade for entry in self.read_journal())
+
+    def close(self):
+        """Release resources (i.e open files) held by the store."""
+        pass
@@ -0,0 +1,22 @@
+from libs.common.currency import Currency
+from libs.common.trade import Side, Trade
+
+
+def buy(symbol: str, quantity: float, unit_price: float) -> Trade:
+    return Trade(
+        symbol=symbol,
+        side=Side.BUY,
+        currency=Currency.USD,
+        quantity=quantity,
+        unit_price=unit_price,
+    )
+
+
+def sell(symbol: str, quantity: float, unit_price: float) -> Trade:
+    return Trade(
+        symbol=symbol,
+        side=Side.SELL,
+        currency=Currency.USD,
+        quantity=-quantity,
+        unit_price=unit_price,
+    )
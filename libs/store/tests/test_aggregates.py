@@ -0,0 +1,158 @@
+import json
+import random
+
+import numpy as np
+import pytest
+
+from libs.common.aggregates import PortfolioAggregates
+from libs.common.currency import Currency
+from libs.common.engine import TradeBatch
+from libs.common.position import Position
+from libs.common.trade import Side, Trade
+from libs.store import StoreFactory, StoreType
+from libs.store.journal import JOURNAL_FILE_NAME, SNAPSHOT_FILE_NAME, JournalStore
+from libs.store.tests.conftest import buy, sell
+
+
+def random_trades(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    trades = []
+    for _ in range(count):
+        side = rng.choice([Side.BUY, Side.SELL])
+        quantity = float(rng.randint(1, 20))
+        trades.append(
+            Trade(
+                symbol=f"SYM{rng.randrange(10)}",
+                side=side,
+                currency=rng.choice([Currency.USD, Currency.EUR]),
+                quantity=quantity if side == Side.BUY else -quantity,
+                unit_price=float(rng.randint(1, 500)),
+            )
+        )
+    return trades
+
+
+def assert_aggregates_equal(actual: PortfolioAggregates, expected: PortfolioAggregates):
+    assert actual.positions == expected.positions
+    for currency, values in expected.currencies.items():
+        if not values.positions and not values.realized:
+            continue
+        assert actual.currencies[currency].positions == values.positions
+        assert actual.currencies[currency].long_cost == pytest.approx(values.long_cost)
+        assert actual.currencies[currency].short_cost == pytest.approx(
+            values.short_cost
+        )
+        assert actual.currencies[currency].realized == pytest.approx(values.realized)
+
+
+@pytest.mark.parametrize("store_type", list(StoreType))
+def test_aggregates_follow_trades(store_type, tmp_path):
+    store = StoreFactory[store_type](tmp_path)
+    realized = {}
+    for trade in random_trades(300):
+        _, pnl = store.record_trade(trade)
+        if pnl is not None:
+            code = trade.currency.value
+            realized[code] = realized.get(code, 0.0) + pnl.absolute_gains
+
+    expected = PortfolioAggregates.from_positions(store.load_positions(), realized)
+    assert_aggregates_equal(store.load_aggregates(), expected)
+    store.close()
+
+    reopened = StoreFactory[store_type](tmp_path)
+    assert_aggregates_equal(reopened.load_aggregates(), expected)
+    reopened.close()
+
+
+@pytest.mark.parametrize("store_type", list(StoreType))
+def test_record_trades_matches_record_trade(store_type, tmp_path):
+    (tmp_path / "single").mkdir()
+    (tmp_path / "batch").mkdir()
+    trades = random_trades(300, seed=1)
+    expected = StoreFactory[store_type](tmp_path / "single")
+    expected_pnls = [expected.record_trade(trade)[1] for trade in trades]
+
+    store = StoreFactory[store_type](tmp_path / "batch")
+    pnls = []
+    for start in range(0, len(trades), 64):
+        stop = start + 64
+        pnls.extend(store.record_trades(trades[start:stop]))
+    assert pnls == expected_pnls
+    assert sorted(store.load_positions(), key=lambda p: p.symbol) == sorted(
+        expected.load_positions(), key=lambda p: p.symbol
+    )
+    assert_aggregates_equal(store.load_aggregates(), expected.load_aggregates())
+    assert [entry.trade for entry in store.read_journal()] == [
+        entry.trade for entry in expected.read_journal()
+    ]
+    store.close()
+
+    reopened = StoreFactory[store_type](tmp_path / "batch")
+    assert len(reopened.load_positions()) == len(expected.load_positions())
+    assert_aggregates_equal(reopened.load_aggregates(), expected.load_aggregates())
+    reopened.close()
+    expected.close()
+
+
+@pytest.mark.parametrize("store_type", list(StoreType))
+def test_store_positions_keeps_realized_gains(store_type, tmp_path):
+    store = StoreFactory[store_type](tmp_path)
+    store.record_trade(buy("GOOGL", 10, 100))
+    store.record_trade(sell("GOOGL", 4, 150))
+    store.record_trade(sell("MSFT", 2, 50))
+    store.store_positions(
+        [Position(symbol="AAPL", quantity=1, cost=10, currency=Currency.USD)]
+    )
+
+    aggregates = store.load_aggregates().currencies["USD"]
+    assert aggregates.positions == 1
+    assert aggregates.long_cost == 10
+    assert aggregates.short_cost == 0
+    assert aggregates.gross_exposure == aggregates.net_exposure == 10
+    assert aggregates.realized == 200
+    store.close()
+
+
+def test_journal_aggregates_are_rebuilt_from_history(tmp_path):
+    store = JournalStore(tmp_path, snapshot_interval=2)
+    store.record_trade(buy("GOOGL", 10, 100))
+    store.record_trade(sell("GOOGL", 4, 150))
+    store.record_trade(sell("GOOGL", 1, 50))
+
+    # snapshot written before aggregates were kept
+    with open(tmp_path / SNAPSHOT_FILE_NAME) as f:
+        snapshot = json.load(f)
+    del snapshot["realized"]
+    with open(tmp_path / SNAPSHOT_FILE_NAME, "w") as f:
+        json.dump(snapshot, f)
+    assert (tmp_path / JOURNAL_FILE_NAME).read_text().count("\n") == 1
+
+    aggregates = JournalStore(tmp_path).load_aggregates().currencies["USD"]
+    assert aggregates.realized == 200 - 50
+    assert aggregates.positions == 1
+    assert aggregates.long_cost == 500
+
+
+@pytest.mark.parametrize("store_type", list(StoreType))
+def test_read_trade_batch_matches_read_journal(store_type, tmp_path):
+    store = StoreFactory[store_type](tmp_path)
+    store.record_trades(random_trades(50, seed=2))
+
+    batch = store.read_trade_batch()
+    expected = TradeBatch.from_trades(entry.trade for entry in store.read_journal())
+    for field in ("symbols", "sides", "currencies", "quantities", "unit_prices"):
+        np.testing.assert_array_equal(getattr(batch, field), getattr(expected, field))
+    store.close()
+
+
+@pytest.mark.parametrize("store_type", list(StoreType))
+def test_load_book_matches_load_positions(store_type, tmp_path):
+    store = StoreFactory[store_type](tmp_path)
+    assert len(store.load_book()) == 0
+    store.record_trades(random_trades(50, seed=3))
+
+    book = store.load_book()
+    positions = sorted(store.load_positions(), key=lambda position: position.symbol)
+    assert sorted(book.to_positions(), key=lambda p: p.symbol) == positions
+    assert all(isinstance(p.currency, Currency) for p in book.to_positions())
+    store.close()
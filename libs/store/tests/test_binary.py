@@ -0,0 +1,129 @@
+import os
+
+import numpy as np
+import pytest
+
+from libs.common.currency import Currency
+from libs.common.position import Position
+from libs.store import StoreFactory, StoreType
+from libs.store.binary import HEADER_DTYPE, INITIAL_CAPACITY, RECORD_DTYPE, BinaryStore
+from libs.store.journal import JournalStore
+from libs.store.tests.conftest import buy, sell
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = BinaryStore(tmp_path)
+    yield store
+    store.close()
+
+
+def test_factory_instance(tmp_path):
+    assert isinstance(StoreFactory[StoreType.BINARY](tmp_path), BinaryStore)
+
+
+def test_record_trade_round_trip(store, tmp_path):
+    store.record_trade(buy("GOOGL", 10, 100))
+    store.record_trade(buy("MSFT", 1, 200))
+    _, pnl = store.record_trade(sell("GOOGL", 5, 120))
+    assert pnl.absolute_gains == 100
+    store.close()
+
+    reopened = BinaryStore(tmp_path)
+    assert reopened.load_position("GOOGL") == Position(
+        symbol="GOOGL", quantity=5, cost=500, currency=Currency.USD
+    )
+    assert [p.symbol for p in reopened.load_positions()] == ["GOOGL", "MSFT"]
+    assert reopened.load_position("TSLA") is None
+    reopened.close()
+
+
+def test_update_is_in_place(store):
+    store.record_trade(buy("GOOGL", 10, 100))
+    store.record_trade(buy("MSFT", 1, 200))
+    size = os.path.getsize(store.path)
+    with open(store.path, "rb") as f:
+        before = f.read()
+
+    store.record_trade(buy("GOOGL", 1, 100))
+    with open(store.path, "rb") as f:
+        after = f.read()
+    assert len(after) == size
+    changed = [i for i in range(size) if before[i] != after[i]]
+    first = HEADER_DTYPE.itemsize
+    assert first <= min(changed) and max(changed) < first + RECORD_DTYPE.itemsize
+
+
+def test_liquidated_symbol_is_reused(store, tmp_path):
+    store.record_trade(buy("GOOGL", 10, 100))
+    store.record_trade(sell("GOOGL", 10, 100))
+    assert store.load_positions() == []
+    store.record_trade(sell("GOOGL", 2, 50))
+    store.close()
+
+    reopened = BinaryStore(tmp_path)
+    assert reopened.load_position("GOOGL").quantity == -2
+    assert reopened._header["count"] == 1
+    reopened.close()
+
+
+def test_capacity_growth(store, tmp_path):
+    for i in range(INITIAL_CAPACITY + 1):
+        store.record_trade(buy(f"S{i}", 1, i + 1))
+    aggregates = store.load_aggregates().currencies["USD"]
+    assert aggregates.positions == INITIAL_CAPACITY + 1
+    assert aggregates.long_cost == sum(range(1, INITIAL_CAPACITY + 2))
+    store.close()
+
+    reopened = BinaryStore(tmp_path)
+    assert len(reopened.load_positions()) == INITIAL_CAPACITY + 1
+    assert reopened._header["capacity"] == 2 * INITIAL_CAPACITY
+    assert reopened.load_position(f"S{INITIAL_CAPACITY}").cost == INITIAL_CAPACITY + 1
+    reopened.close()
+
+
+def test_load_book(store):
+    store.record_trade(buy("GOOGL", 10, 100))
+    store.record_trade(buy("MSFT", 2, 200))
+    store.record_trade(sell("GOOGL", 10, 100))
+    book = store.load_book()
+    assert list(book.symbols) == ["MSFT"]
+    np.testing.assert_array_equal(book.costs, [400])
+
+
+def test_store_positions(store):
+    store.record_trade(buy("GOOGL", 1, 100))
+    position = Position(symbol="MSFT", quantity=2, cost=10, currency=Currency.USD)
+    store.store_positions([position])
+    assert store.load_positions() == [position]
+
+
+def test_migration_from_json_store(tmp_path):
+    journal = JournalStore(tmp_path)
+    journal.record_trade(buy("GOOGL", 10, 100))
+    journal.snapshot()
+    journal.close()
+
+    store = BinaryStore(tmp_path)
+    assert store.load_position("GOOGL").quantity == 10
+    store.close()
+
+
+def test_migration_from_journal_without_snapshot(tmp_path):
+    journal = JournalStore(tmp_path)
+    journal.record_trade(buy("GOOGL", 10, 100))
+    journal.record_trade(sell("GOOGL", 4, 150))
+    journal.close()
+    assert not (tmp_path / ".positions.json").exists()
+
+    store = BinaryStore(tmp_path)
+    assert store.load_position("GOOGL").quantity == 6
+    assert store.load_aggregates().currencies["USD"].realized == 200
+    store.close()
+
+
+def test_unsupported_file(tmp_path):
+    with open(tmp_path / ".positions.bin", "wb") as f:
+        f.write(b"\x00" * 64)
+    with pytest.raises(ValueError):
+        BinaryStore(tmp_path).load_positions()
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from libs.common.currency import Currency
+from libs.common.position import Position
+from libs.store.journal import JournalStore
+from libs.store.tests.conftest import buy, sell
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JournalStore(tmp_path, snapshot_interval=3)
+
+
+def test_record_trade_appends_one_line(store):
+    position, pnl = store.record_trade(buy("GOOGL", 10, 100))
+    assert pnl is None
+    assert position.quantity == 10
+    store.record_trade(buy("MSFT", 1, 200))
+
+    with open(store.journal_path) as f:
+        lines = f.readlines()
+    assert [json.loads(line)["seq"] for line in lines] == [1, 2]
+
+
+def test_positions_are_recovered_from_journal(store, tmp_path):
+    store.record_trade(buy("GOOGL", 10, 100))
+    store.record_trade(sell("GOOGL", 4, 110))
+    store.close()
+
+    recovered = JournalStore(tmp_path, snapshot_interval=3)
+    position = recovered.load_position("GOOGL")
+    assert position.quantity == 6
+    assert position.cost == 600
+    assert recovered.sequence == 2
+
+
+def test_snapshot_and_compaction(store, tmp_path):
+    for _ in range(4):
+        store.record_trade(buy("GOOGL", 1, 100))
+
+    with open(store.snapshot_path) as f:
+        assert json.load(f)["sequence"] == 3
+    with open(store.journal_path) as f:
+        assert len(f.readlines()) == 1
+
+    recovered = JournalStore(tmp_path)
+    assert recovered.load_position("GOOGL").quantity == 4
+    history = list(recovered.read_journal())
+    assert [entry.sequence for entry in history] == [1, 2, 3, 4]
+    assert history[0].trade == buy("GOOGL", 1, 100)
+
+
+def test_liquidated_position_is_removed(store, tmp_path):
+    store.record_trade(buy("GOOGL", 10, 100))
+    _, pnl = store.record_trade(sell("GOOGL", 10, 120))
+    assert pnl.absolute_gains == 200
+    assert store.load_position("GOOGL") is None
+    assert JournalStore(tmp_path).load_positions() == []
+
+
+def test_legacy_snapshot_is_loaded(tmp_path):
+    position = Position(symbol="GOOGL", quantity=1, cost=100, currency=Currency.USD)
+    with open(tmp_path / ".positions.json", "w") as f:
+        json.dump([json.loads(position.json())], f)
+
+    store = JournalStore(tmp_path)
+    assert store.load_positions() == [position]
+    store.record_trade(buy("GOOGL", 1, 100))
+    assert JournalStore(tmp_path).load_position("GOOGL").quantity == 2
+
+
+def test_torn_record_is_dropped(store, tmp_path):
+    store.record_trade(buy("GOOGL", 1, 100))
+    store.close()
+    with open(store.journal_path, "a") as f:
+        f.write('{"seq": 2, "ts": 0, "sym')
+
+    recovered = JournalStore(tmp_path)
+    assert recovered.load_position("GOOGL").quantity == 1
+    recovered.record_trade(buy("GOOGL", 1, 100))
+    assert JournalStore(tmp_path).load_position("GOOGL").quantity == 2
+
+
+def test_store_positions_replaces_book(store, tmp_path):
+    store.record_trade(buy("GOOGL", 1, 100))
+    position = Position(symbol="MSFT", quantity=2, cost=10, currency=Currency.USD)
+    store.store_positions([position])
+    assert JournalStore(tmp_path).load_positions() == [position]
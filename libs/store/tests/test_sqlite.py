@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+from libs.common.currency import Currency
+from libs.common.position import Position
+from libs.store import StoreFactory, StoreType
+from libs.store.journal import JournalStore
+from libs.store.sqlite import SQLiteStore
+from libs.store.tests.conftest import buy, sell
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteStore(tmp_path)
+    yield store
+    store.close()
+
+
+def test_factory_instance(tmp_path):
+    store = StoreFactory[StoreType.SQLITE](tmp_path)
+    assert isinstance(store, SQLiteStore)
+    store.close()
+
+
+def test_wal_mode(store):
+    mode = store._connection.execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == "wal"
+
+
+def test_synchronous_mode(tmp_path):
+    store = SQLiteStore(tmp_path, synchronous="full")
+    assert store._connection.execute("PRAGMA synchronous").fetchone()[0] == 2
+    store.close()
+    with pytest.raises(ValueError):
+        SQLiteStore(tmp_path, synchronous="NORMAL; DROP TABLE positions")
+
+
+def test_record_trade_updates_single_symbol(store, tmp_path):
+    store.record_trade(buy("GOOGL", 10, 100))
+    store.record_trade(buy("MSFT", 1, 200))
+    _, pnl = store.record_trade(sell("GOOGL", 5, 120))
+    assert pnl.absolute_gains == 100
+
+    store.close()
+    reopened = SQLiteStore(tmp_path)
+    assert reopened.load_position("GOOGL").quantity == 5
+    assert reopened.load_position("GOOGL").cost == 500
+    assert reopened.load_position("TSLA") is None
+    assert [e.sequence for e in reopened.read_journal()] == [1, 2, 3]
+    reopened.close()
+
+
+def test_liquidation_deletes_row(store):
+    store.record_trade(buy("GOOGL", 10, 100))
+    store.record_trade(sell("GOOGL", 10, 100))
+    assert store.load_positions() == []
+
+
+def test_failed_trade_is_rolled_back(store):
+    store.record_trade(buy("GOOGL", 10, 0))
+    with pytest.raises(ZeroDivisionError):
+        store.record_trade(sell("GOOGL", 5, 10))
+    assert store.load_position("GOOGL").quantity == 10
+    assert len(list(store.read_journal())) == 1
+
+
+def test_store_positions(store):
+    position = Position(symbol="MSFT", quantity=2, cost=10, currency=Currency.USD)
+    store.record_trade(buy("GOOGL", 10, 100))
+    store.store_positions([position])
+    assert store.load_positions() == [position]
+
+
+def test_migration_from_json_store(tmp_path):
+    journal = JournalStore(tmp_path)
+    journal.record_trade(buy("GOOGL", 10, 100))
+    journal.record_trade(buy("MSFT", 1, 200))
+    journal.snapshot()
+    journal.record_trade(sell("MSFT", 1, 200))
+    journal.close()
+
+    store = SQLiteStore(tmp_path)
+    assert [p.symbol for p in store.load_positions()] == ["GOOGL"]
+    assert [e.sequence for e in store.read_journal()] == [1, 2, 3]
+    store.record_trade(buy("AAPL", 1, 1))
+    assert [e.sequence for e in store.read_journal()][-1] == 4
+    store.close()
+
+    # migration only runs once
+    with open(tmp_path / ".positions.json", "w") as f:
+        json.dump([], f)
+    store = SQLiteStore(tmp_path)
+    assert len(store.load_positions()) == 2
+    store.close()
+
+
+def test_migration_from_journal_without_snapshot(tmp_path):
+    journal = JournalStore(tmp_path)
+    journal.record_trade(buy("GOOGL", 10, 100))
+    journal.close()
+    assert not (tmp_path / ".positions.json").exists()
+
+    store = SQLiteStore(tmp_path)
+    assert store.load_position("GOOGL").quantity == 10
+    assert [e.trade for e in store.read_journal()] == [buy("GOOGL", 10, 100)]
+    assert store.load_aggregates().currencies["USD"].long_cost == 1000
+    store.close()